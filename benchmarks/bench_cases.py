@@ -0,0 +1,202 @@
+"""Synthetic benchmark cases for the Python hot paths.
+
+Each case maps a size to a zero-argument callable; the runner times the
+callable and reports the cost per call. Sizes grow roughly by 10x so a
+change in complexity (not only in constant factors) is visible.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hr_zone_sync import (  # noqa: E402
+    IndexedHrExtractor,
+    SportIndex,
+    compute_hrr_zones,
+    compute_hrr_zones_batch,
+    extract_hr_fields_from_athlete_payload,
+)
+from scripts.scan_secrets import scan_file, scan_file_by_lines  # noqa: E402
+from scripts.weekly_metrics import ActivityColumns, WellnessColumns, rollup_weekly_metrics  # noqa: E402
+from tests.eval_harness import (  # noqa: E402
+    FIXTURES_DIR,
+    GOLDEN_WEEKS_PATH,
+    _collect_forbidden_paths,
+    diversity_checks,
+    guardrail_checks,
+    limit_checks,
+)
+
+WORKFLOW_PATH = ROOT / "workflows" / "running_coach_workflow.json"
+# Generated scan inputs live here and are removed when the process exits.
+_SCRATCH = tempfile.TemporaryDirectory(prefix="rc-bench-")
+
+Case = Callable[[int], Callable[[], object]]
+
+
+def synthetic_plan(note_chars: int) -> dict:
+    """The first valid fixture with every day's note padded to ``note_chars``."""
+    plan = json.loads((FIXTURES_DIR / "weekly_plan_valid_1.json").read_text())
+    filler = "cadence drills and mobility work " * (note_chars // 32 + 1)
+    for day in plan["activityPlan"]["days"]:
+        day["note"] = filler[:note_chars]
+    return plan
+
+
+def synthetic_golden_dataset(fixture_count: int) -> dict:
+    dataset = json.loads(GOLDEN_WEEKS_PATH.read_text())
+    base = dataset["fixtures"]
+    dataset["fixtures"] = [copy.deepcopy(base[index % len(base)]) for index in range(fixture_count)]
+    return dataset
+
+
+def synthetic_athlete_payload(sport_count: int) -> list[dict]:
+    """Athlete export whose Run sport settings sit behind ``sport_count`` other sports."""
+    sports = [{"types": ["Ride", f"VirtualRide{index}"], "max_hr": 190, "lthr": 170} for index in range(sport_count)]
+    sports.append({"types": ["Run", "VirtualRun"], "max_hr": 202, "lthr": 183})
+    history = [{"id": f"i{index}", "sportSettings": sports[:-1]} for index in range(max(1, sport_count // 10))]
+    return [*history, {"id": "i372001", "icu_resting_hr": 52, "sportSettings": sports}]
+
+
+def synthetic_scan_file(kilobytes: int, ascii_only: bool = False) -> Path:
+    """A temp file of roughly ``kilobytes`` KB built from the main workflow export."""
+    chunk = WORKFLOW_PATH.read_text()
+    if ascii_only:
+        chunk = chunk.encode("ascii", "ignore").decode("ascii")
+    repeats = max(1, kilobytes * 1024 // len(chunk))
+    path = Path(_SCRATCH.name) / f"workflow_{kilobytes}kb{'_ascii' if ascii_only else ''}.json"
+    path.write_text("\n".join([chunk] * repeats))
+    return path
+
+
+def synthetic_training_history(weeks: int) -> tuple[list[dict], list[dict]]:
+    """Ten activities and seven wellness entries per week, starting on a Monday."""
+    start = datetime(2016, 1, 4, tzinfo=timezone.utc)
+    types = ("Run", "Run", "Run", "Ride", "VirtualRide", "WeightTraining", "Swim")
+    names = ("Easy run", "VO2 5x3'", "Tempo 20'", "Long run", "Morning Ride")
+    activities = [
+        {
+            "icu_athlete_id": "i372001",
+            "start_date": (start + timedelta(hours=17 * index)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "type": types[index % len(types)],
+            "name": names[index % len(names)],
+            "distance": 1000.0 + index % 20000,
+            "elapsed_time": 600 + index % 7200,
+            "trimp": 10.5 + index % 200,
+        }
+        for index in range(weeks * 10)
+    ]
+    wellness = [
+        {"id": (start + timedelta(days=day)).date().isoformat(), "ctl": 40 + day % 30, "atl": 35.5, "hrv": 60 + day % 9}
+        for day in range(weeks * 7)
+    ]
+    return activities, wellness
+
+
+def guardrail_case(size: int) -> Callable[[], object]:
+    plan = synthetic_plan(size)
+    return lambda: guardrail_checks(plan)
+
+
+def diversity_case(size: int) -> Callable[[], object]:
+    plan = synthetic_plan(size)
+    return lambda: diversity_checks(plan)
+
+
+def limit_case(size: int) -> Callable[[], object]:
+    plan = synthetic_plan(size)
+    return lambda: limit_checks(plan)
+
+
+def forbidden_paths_case(size: int) -> Callable[[], object]:
+    dataset = synthetic_golden_dataset(size)
+    return lambda: _collect_forbidden_paths(dataset)
+
+
+def extract_hr_fields_case(size: int) -> Callable[[], object]:
+    payload = synthetic_athlete_payload(size)
+    return lambda: extract_hr_fields_from_athlete_payload(payload)
+
+
+def sport_index_case(size: int) -> Callable[[], object]:
+    payload = synthetic_athlete_payload(size)
+    return lambda: SportIndex.build(payload).hr_fields()
+
+
+def indexed_extractor_case(size: int) -> Callable[[], object]:
+    payload = synthetic_athlete_payload(size)
+    extractor = IndexedHrExtractor()
+    return lambda: extractor.extract(payload)
+
+
+def hrr_zones_case(size: int) -> Callable[[], object]:
+    pairs = [(180 + index % 25, 45 + index % 15) for index in range(size)]
+    return lambda: [compute_hrr_zones(hr_max, hr_rest) for hr_max, hr_rest in pairs]
+
+
+def hrr_zones_batch_case(size: int) -> Callable[[], object]:
+    hr_max = [180 + index % 25 for index in range(size)]
+    hr_rest = [45 + index % 15 for index in range(size)]
+    return lambda: compute_hrr_zones_batch(hr_max, hr_rest)
+
+
+def scan_file_case(size: int) -> Callable[[], object]:
+    path = synthetic_scan_file(size)
+    return lambda: scan_file(path)
+
+
+def scan_file_ascii_case(size: int) -> Callable[[], object]:
+    path = synthetic_scan_file(size, ascii_only=True)
+    return lambda: scan_file(path)
+
+
+def scan_file_by_lines_case(size: int) -> Callable[[], object]:
+    path = synthetic_scan_file(size)
+    return lambda: scan_file_by_lines(path)
+
+
+def weekly_metrics_rollup_case(size: int) -> Callable[[], object]:
+    activities, wellness = synthetic_training_history(size)
+    return lambda: rollup_weekly_metrics(activities, wellness)
+
+
+def weekly_metrics_columns_case(size: int) -> Callable[[], object]:
+    activities, wellness = synthetic_training_history(size)
+    activity_columns = ActivityColumns.from_records(activities)
+    wellness_columns = WellnessColumns.from_records(wellness)
+    return lambda: rollup_weekly_metrics(activity_columns, wellness_columns)
+
+
+def calibration_case(size: int) -> Callable[[], object]:
+    """Fixed pure-Python workload used to normalize timings across machines."""
+    return lambda: sum(index * index for index in range(size))
+
+
+# name -> (case factory, sizes, size unit)
+CASES: dict[str, tuple[Case, tuple[int, ...], str]] = {
+    "calibration": (calibration_case, (100_000,), "iterations"),
+    "guardrail_checks": (guardrail_case, (0, 200, 2000), "note chars/day"),
+    "diversity_checks": (diversity_case, (0, 200, 2000), "note chars/day"),
+    "limit_checks": (limit_case, (0, 200, 2000), "note chars/day"),
+    "_collect_forbidden_paths": (forbidden_paths_case, (5, 50, 500), "fixtures"),
+    "extract_hr_fields_from_athlete_payload": (extract_hr_fields_case, (10, 100, 1000), "sports"),
+    "sport_index_build": (sport_index_case, (10, 100, 1000), "sports"),
+    "indexed_extractor_memo_hit": (indexed_extractor_case, (10, 100, 1000), "sports"),
+    "compute_hrr_zones": (hrr_zones_case, (100, 1000, 10000), "athletes"),
+    "compute_hrr_zones_batch": (hrr_zones_batch_case, (100, 1000, 10000), "athletes"),
+    "scan_file": (scan_file_case, (100, 1000, 5000), "KB"),
+    "scan_file_ascii": (scan_file_ascii_case, (100, 1000, 5000), "KB"),
+    "scan_file_by_lines": (scan_file_by_lines_case, (100, 1000, 5000), "KB"),
+    "weekly_metrics_rollup": (weekly_metrics_rollup_case, (1, 52, 520), "weeks"),
+    "weekly_metrics_rollup_columns": (weekly_metrics_columns_case, (1, 52, 520), "weeks"),
+}
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-plan day classification cost, legacy scans vs compiled classifier.
+
+The legacy functions below are the pre-classifier guardrail/diversity rules,
+kept verbatim so both implementations can be timed and compared on the same
+plans. Every synthetic plan is also checked for identical errors.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.eval_harness import (  # noqa: E402
+    EASY_TOKENS,
+    FIXTURES_DIR,
+    GYM_TOKENS,
+    HARD_TOKENS,
+    LONG_TOKENS,
+    REST_TOKENS,
+    RUN_TOKENS,
+    classify_days,
+    classify_text,
+    contains_token,
+    diversity_checks,
+    guardrail_checks,
+    normalize_day,
+)
+
+
+def legacy_guardrail_checks(plan: dict) -> list[str]:
+    errors: list[str] = []
+    days = plan.get("activityPlan", {}).get("days", [])
+    if not isinstance(days, list) or len(days) != 7:
+        return errors
+
+    normalized_days = [normalize_day(day.get("day", "")) for day in days]
+    unique_days = set(normalized_days)
+    if len(unique_days) != 7:
+        errors.append("guardrail: days must cover all weekdays exactly once")
+    for name in ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]:
+        if name not in unique_days:
+            errors.append(f"guardrail: missing weekday {name}")
+
+    def activity_text(day: dict) -> str:
+        return f"{day.get('activity','')} {day.get('goal','')} {day.get('note','')}".lower()
+
+    def intensity_text(day: dict) -> str:
+        return (day.get("intensity") or "").lower()
+
+    def is_hard(day: dict) -> bool:
+        return contains_token(intensity_text(day), HARD_TOKENS) or contains_token(activity_text(day), HARD_TOKENS)
+
+    def is_easy(day: dict) -> bool:
+        return contains_token(intensity_text(day), EASY_TOKENS) or contains_token(activity_text(day), EASY_TOKENS)
+
+    def is_rest(day: dict) -> bool:
+        return contains_token(activity_text(day), REST_TOKENS) or (day.get("intensity", "").strip() in {"-", "--", "—", "–"})
+
+    def is_long(day: dict) -> bool:
+        return contains_token(activity_text(day), LONG_TOKENS)
+
+    hard_count = sum(1 for day in days if is_hard(day))
+    if hard_count > 2:
+        errors.append(f"guardrail: too many hard sessions ({hard_count} > 2)")
+
+    for i in range(1, len(days)):
+        if is_hard(days[i]) and is_hard(days[i - 1]):
+            errors.append(f"guardrail: back-to-back hard sessions (days {i} and {i + 1})")
+
+    if not any(is_rest(day) or is_easy(day) for day in days):
+        errors.append("guardrail: must include at least one rest or recovery day")
+
+    long_count = sum(1 for day in days if is_long(day))
+    if long_count > 1:
+        errors.append("guardrail: only one long run per week")
+
+    for idx, day in enumerate(days, start=1):
+        if is_long(day) and is_hard(day):
+            errors.append(f"guardrail: long run cannot be hard intensity (day {idx})")
+
+    for name in ["martes", "jueves", "sabado"]:
+        day = next((d for d in days if normalize_day(d.get("day", "")) == name), None)
+        if day and not contains_token(activity_text(day), GYM_TOKENS):
+            errors.append(f"guardrail: {name} should include gym/strength")
+
+    return errors
+
+
+def legacy_diversity_checks(plan: dict) -> list[str]:
+    errors: list[str] = []
+    days = plan.get("activityPlan", {}).get("days", [])
+    if not isinstance(days, list) or len(days) != 7:
+        return errors
+
+    activities = {str(day.get("activity", "")).strip().lower() for day in days}
+    activities.discard("")
+    if len(activities) < 3:
+        errors.append("diversity: expected at least 3 unique activity labels")
+
+    def activity_text(day: dict) -> str:
+        return f"{day.get('activity','')} {day.get('goal','')} {day.get('note','')}".lower()
+
+    if not any(contains_token(activity_text(day), GYM_TOKENS) for day in days):
+        errors.append("diversity: expected at least one gym/strength day")
+
+    if not any(contains_token(activity_text(day), RUN_TOKENS) for day in days):
+        errors.append("diversity: expected at least one run session")
+
+    return errors
+
+
+WORDS = sorted(
+    set(HARD_TOKENS + EASY_TOKENS + REST_TOKENS + LONG_TOKENS + GYM_TOKENS + RUN_TOKENS)
+    | {"Mobility", "drills", "cadence", "hills", "bike", "swim", "core", "Z3", "--", "—"}
+)
+
+
+def synthetic_plans(count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    base_paths = sorted(FIXTURES_DIR.glob("weekly_plan_valid_*.json"))
+    bases = [json.loads(path.read_text()) for path in base_paths]
+    plans: list[dict] = []
+    for _ in range(count):
+        plan = copy.deepcopy(rng.choice(bases))
+        for day in plan["activityPlan"]["days"]:
+            for field in ("activity", "goal", "note", "intensity"):
+                if rng.random() < 0.5:
+                    day[field] = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        plans.append(plan)
+    return plans
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plans", type=int, default=2000, help="Number of synthetic plans.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is reported).")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    plans = synthetic_plans(args.plans, args.seed)
+    mismatches = [
+        index
+        for index, plan in enumerate(plans)
+        if legacy_guardrail_checks(plan) != guardrail_checks(plan)
+        or legacy_diversity_checks(plan) != diversity_checks(plan)
+    ]
+    if mismatches:
+        print(f"Classifier disagrees with legacy rules on {len(mismatches)} plans (first: {mismatches[0]}).")
+        return 1
+
+    def run_legacy() -> None:
+        for plan in plans:
+            legacy_guardrail_checks(plan)
+            legacy_diversity_checks(plan)
+
+    def run_classifier() -> None:
+        # Same path as evaluate_plan: classify each day once, share the flags.
+        for plan in plans:
+            day_flags = classify_days(plan)
+            guardrail_checks(plan, day_flags)
+            diversity_checks(plan, day_flags)
+
+    def run_classifier_cold() -> None:
+        classify_text.cache_clear()
+        run_classifier()
+
+    def per_plan(func) -> float:
+        return min(timeit.repeat(func, number=1, repeat=args.repeat)) / len(plans) * 1e6
+
+    legacy = per_plan(run_legacy)
+    cold = per_plan(run_classifier_cold)
+    warm = per_plan(run_classifier)
+    print(f"Plans: {len(plans)} (outputs identical)")
+    print(f"Legacy token scans:           {legacy:8.1f} us/plan")
+    print(f"Compiled classifier (cold):   {cold:8.1f} us/plan  ({legacy / cold:.2f}x)")
+    print(f"Compiled classifier (cached): {warm:8.1f} us/plan  ({legacy / warm:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
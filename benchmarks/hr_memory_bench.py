@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Memory benchmark: per-athlete HR profile footprint, dict/dataclass vs slotted/array layout.
+
+``LegacyHrFields`` below is the pre-slots ``HrFields`` definition, kept so both
+layouts can be measured side by side. Each athlete keeps ``--weeks`` history
+entries of (HrFields, zones); every compact entry is checked to convert back
+to the same dict payload.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hr_zone_sync import HrFields, ZoneTable, compute_hrr_zones  # noqa: E402
+
+
+@dataclass(frozen=True)
+class LegacyHrFields:
+    hr_max: int | None
+    hr_rest: int | None
+    lthr: int | None
+
+
+def synthetic_history(athletes: int, weeks: int, seed: int) -> list[list[tuple[int, int, int]]]:
+    rng = random.Random(seed)
+    history = []
+    for _ in range(athletes):
+        hr_max, hr_rest = rng.randint(170, 210), rng.randint(40, 65)
+        history.append(
+            [(hr_max - week // 10, hr_rest + rng.randint(-2, 2), hr_max - 20 - rng.randint(0, 5)) for week in range(weeks)]
+        )
+    return history
+
+
+def build_legacy(history: list[list[tuple[int, int, int]]]) -> list:
+    return [
+        [(LegacyHrFields(hr_max, hr_rest, lthr), compute_hrr_zones(hr_max, hr_rest)) for hr_max, hr_rest, lthr in weeks]
+        for weeks in history
+    ]
+
+
+def build_compact(history: list[list[tuple[int, int, int]]]) -> list:
+    return [
+        [(HrFields(hr_max, hr_rest, lthr), ZoneTable.from_hrr(hr_max, hr_rest)) for hr_max, hr_rest, lthr in weeks]
+        for weeks in history
+    ]
+
+
+def measure(build: Callable[[], list]) -> tuple[list, int]:
+    """Build the structure and return it with the bytes still allocated afterwards."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--athletes", type=int, default=500, help="Number of synthetic athletes.")
+    parser.add_argument("--weeks", type=int, default=52, help="History entries per athlete.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.athletes, args.weeks, args.seed)
+    legacy, legacy_bytes = measure(lambda: build_legacy(history))
+    compact, compact_bytes = measure(lambda: build_compact(history))
+
+    for legacy_weeks, compact_weeks in zip(legacy, compact):
+        for (old_fields, old_zones), (fields, zones) in zip(legacy_weeks, compact_weeks):
+            if zones.to_dict() != old_zones or (fields.hr_max, fields.hr_rest, fields.lthr) != (
+                old_fields.hr_max,
+                old_fields.hr_rest,
+                old_fields.lthr,
+            ):
+                print("Compact representation does not round-trip to the legacy payload.")
+                return 1
+
+    entries = args.athletes * args.weeks
+    print(f"Athletes: {args.athletes}, weeks of history: {args.weeks} (round-trip identical)")
+    print(f"dict + dataclass:     {legacy_bytes / args.athletes:>10.0f} B/athlete  {legacy_bytes / entries:>7.0f} B/entry")
+    print(f"ZoneTable + slots:    {compact_bytes / args.athletes:>10.0f} B/athlete  {compact_bytes / entries:>7.0f} B/entry")
+    print(f"Reduction: {legacy_bytes / compact_bytes:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Plan-generation throughput against a local fake LLM, per concurrency limit.
+
+A ``ThreadingHTTPServer`` answers ``/v1/chat/completions`` after a fixed
+latency (plus jitter) with a valid weekly plan. For every ``--limits`` value a
+fresh ``PlanScheduler`` generates plans for ``--athletes`` synthetic athletes,
+validating each with the workflow's Validate node and writing to in-memory
+sinks that sleep ``--write-ms`` per batch. Throughput should grow close to
+linearly with the limit until the fake server, the validator or the writers
+become the bottleneck.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.plan_scheduler import ChatClient, NodeValidator, PlanScheduler  # noqa: E402
+
+PLAN_PATH = ROOT / "tests" / "fixtures" / "weekly_plan_valid_1.json"
+
+
+class FakeChatServer:
+    """OpenAI-shaped chat completions with a fixed latency and in-flight tracking."""
+
+    def __init__(self, latency_s: float, jitter_s: float = 0.0, content: str | None = None) -> None:
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.content = content if content is not None else PLAN_PATH.read_text()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))))
+                with fake.lock:
+                    fake.requests += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                time.sleep(fake.latency_s + random.random() * fake.jitter_s)
+                with fake.lock:
+                    fake.in_flight -= 1
+                body = json.dumps({"choices": [{"index": 0, "message": {"role": "assistant", "content": fake.content}}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def contexts(athletes: int) -> list[dict]:
+    return [
+        {
+            "athleteId": athlete,
+            "runId": f"bench-{athlete}",
+            "promptVersion": "bench",
+            "modelId": "gpt-5",
+            "prompt": "Eres un entrenador de running.",
+            "metrics": {"runCount": 4, "runDistanceKm": 42.0},
+            "history": [],
+        }
+        for athlete in range(athletes)
+    ]
+
+
+def sleeping_sink(write_s: float):
+    def write(ops: list[dict]) -> None:
+        time.sleep(write_s)
+
+    return write
+
+
+async def measure(url: str, limit: int, athletes: int, validator: NodeValidator, write_s: float) -> dict:
+    chat = ChatClient(url, api_key="", pool_size=limit)
+    scheduler = PlanScheduler(
+        chat.complete,
+        validator,
+        sleeping_sink(write_s),
+        sleeping_sink(write_s),
+        llm_concurrency=limit,
+        validator_workers=validator.workers,
+    )
+    try:
+        async for _ in scheduler.run(contexts(athletes)):
+            pass
+    finally:
+        scheduler.close()
+        chat.close()
+    stats = scheduler.stats.as_dict()
+    return {
+        "limit": limit,
+        "athletes": athletes,
+        "failed": stats["failed"],
+        "maxInFlight": stats["max_llm_in_flight"],
+        "seconds": stats["elapsed_s"],
+        "plansPerSecond": stats["plansPerSecond"],
+        "blockedWrites": scheduler.snapshots.blocked_puts + scheduler.run_events.blocked_puts,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--athletes", type=int, default=200)
+    parser.add_argument("--limits", default="1,2,4,8,16,32", help="Comma-separated LLM concurrency limits.")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake LLM latency per call.")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--write-ms", type=float, default=2.0, help="Sink latency per batch write.")
+    parser.add_argument("--validator-workers", type=int, default=2)
+    parser.add_argument("--output", type=Path, help="Write results as JSON.")
+    args = parser.parse_args()
+
+    server = FakeChatServer(args.latency_ms / 1000, args.jitter_ms / 1000)
+    validator = NodeValidator(args.validator_workers)
+    results = []
+    try:
+        print(f"{'limit':>6} {'plans/s':>9} {'seconds':>8} {'in-flight':>10} {'speedup':>8}")
+        for limit in [int(value) for value in args.limits.split(",")]:
+            result = asyncio.run(measure(server.url, limit, args.athletes, validator, args.write_ms / 1000))
+            result["speedup"] = result["plansPerSecond"] / results[0]["plansPerSecond"] if results else 1.0
+            results.append(result)
+            print(
+                f"{limit:>6} {result['plansPerSecond']:>9.1f} {result['seconds']:>8.2f} "
+                f"{result['maxInFlight']:>10} {result['speedup']:>7.1f}x"
+            )
+    finally:
+        validator.close()
+        server.close()
+    if args.output:
+        args.output.write_text(json.dumps({"latencyMs": args.latency_ms, "results": results}, indent=2) + "\n")
+    return 1 if any(result["failed"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
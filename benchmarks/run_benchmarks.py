@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Time the Python hot paths on synthetic inputs and compare against a baseline.
+
+Results are written as JSON. With ``--baseline``, every (case, size) present
+in both runs is compared; timings are normalized by the ``calibration`` case
+so a baseline recorded on another machine stays roughly comparable. Any case
+slower than the baseline by more than ``--threshold`` is reported and the
+runner exits non-zero.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_cases import CASES  # noqa: E402
+
+
+def time_call(func, repeat: int, min_time: float) -> tuple[float, int]:
+    """Best seconds per call over ``repeat`` rounds of at least ``min_time`` each."""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    best = min([elapsed, *timer.repeat(repeat=max(0, repeat - 1), number=number)])
+    return best / number, number
+
+
+def run(selected: list[str], repeat: int, min_time: float) -> list[dict]:
+    results: list[dict] = []
+    for name in selected:
+        factory, sizes, unit = CASES[name]
+        for size in sizes:
+            seconds, number = time_call(factory(size), repeat, min_time)
+            results.append({"name": name, "size": size, "unit": unit, "secondsPerCall": seconds, "calls": number})
+            print(f"{name:<40} {size:>8} {unit:<16} {seconds * 1e6:>12.1f} us/call")
+    return results
+
+
+def calibration(results: list[dict]) -> float | None:
+    return next((item["secondsPerCall"] for item in results if item["name"] == "calibration"), None)
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Return one entry per shared (name, size) with the normalized slowdown ratio."""
+    current_cal = calibration(current["results"])
+    baseline_cal = calibration(baseline["results"])
+    scale = (baseline_cal / current_cal) if current_cal and baseline_cal else 1.0
+    previous = {(item["name"], item["size"]): item for item in baseline["results"]}
+    rows: list[dict] = []
+    for item in current["results"]:
+        before = previous.get((item["name"], item["size"]))
+        if item["name"] == "calibration" or not before or not before["secondsPerCall"]:
+            continue
+        ratio = item["secondsPerCall"] * scale / before["secondsPerCall"]
+        rows.append(
+            {
+                "name": item["name"],
+                "size": item["size"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write JSON results to this path.")
+    parser.add_argument("--baseline", help="Compare against a previous JSON results file.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Flag cases slower than baseline by more than this fraction (default: %(default)s).",
+    )
+    parser.add_argument("--filter", action="append", default=[], help="Only run cases containing this text.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing rounds per case (best is kept).")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per timing round.")
+    args = parser.parse_args()
+
+    selected = [name for name in CASES if not args.filter or any(text in name for text in args.filter)]
+    if "calibration" not in selected:
+        selected.insert(0, "calibration")
+
+    payload = {
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": run(selected, args.repeat, args.min_time),
+    }
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(payload, indent=2) + "\n")
+
+    if not args.baseline:
+        return 0
+
+    rows = compare(payload, json.loads(Path(args.baseline).read_text()), args.threshold)
+    print(f"\nCompared with {args.baseline} (threshold +{args.threshold:.0%}, calibration-normalized):")
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(f"{row['name']:<40} {row['size']:>8} {row['ratio']:>7.2f}x  {flag}")
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed beyond the threshold.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
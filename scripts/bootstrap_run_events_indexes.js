@@ -36,6 +36,9 @@ db.plan_snapshots.createIndex({ runId: 1 }, { unique: true, name: "plan_snapshot
 db.plan_snapshots.createIndex({ weekStart: 1 }, { name: "plan_snapshots_weekStart" });
 ensureTtlIndex(db.plan_snapshots, "createdAt", "plan_snapshots_createdAt_ttl", 60 * 60 * 24 * 365);
 
+db.plan_cache.createIndex({ key: 1 }, { unique: true, name: "plan_cache_key_unique" });
+ensureTtlIndex(db.plan_cache, "expiresAt", "plan_cache_expiresAt_ttl", 0);
+
 db.run_artifacts.createIndex({ runId: 1 }, { unique: true, name: "run_artifacts_runId_unique" });
 db.run_artifacts.createIndex({ createdAt: -1 }, { name: "run_artifacts_createdAt_desc" });
 
@@ -43,4 +46,5 @@ print("run_events indexes ensured.");
 print("feedback_events indexes ensured.");
 print("weekly_metrics indexes ensured.");
 print("plan_snapshots indexes ensured.");
+print("plan_cache indexes ensured.");
 print("run_artifacts indexes ensured.");
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""Columnar on-disk copy of the ``activities`` and ``wellness`` collections.
+
+Documents in the shape written by ``Activities DB``/``Wellness DB`` are split
+into one ``.npy`` file per field and partitioned by week (the local Monday of
+``weekly_metrics``), one directory per week::
+
+    <root>/activities/manifest.json
+    <root>/activities/2026-03-02/{time,id,athleteId,type,distance,...}.npy
+    <root>/activities/index/{key,week}.npy
+
+Rows in a partition are sorted by athlete, then time, and files are opened as
+read-only memory maps. A range scan prunes weeks with the manifest (time range
+and athletes per week), binary-searches the athlete and time bounds and copies
+out only the requested fields of the matching rows, so queries never parse the
+full JSON dump again.
+
+Writes upsert by ``(athleteId, id)`` and rewrite only the weeks they touch.
+The ``index`` sidecar maps every stored key to its week (sorted by key), so a
+write finds the old partition of a moved row with a binary search instead of
+reading the key columns of every partition. A missing or stale index (its size
+differs from the manifest's row total) is rebuilt from the partitions once.
+Scalar fields only: ``interval_summary`` and ``sportInfo`` stay in Mongo.
+Parquet would need pyarrow, which the repository does not depend on.
+
+Usage::
+
+    python3 scripts/columnar_store.py --kind activities --input activities.json
+    python3 scripts/columnar_store.py --kind wellness --mongo-uri mongodb://localhost:27017 --db running_coach
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Hashable, Iterable, Iterator, Mapping
+
+import numpy as np
+from zoneinfo import ZoneInfo
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.disk_cache import CACHE_ROOT  # noqa: E402
+from scripts.weekly_metrics import DEFAULT_TIMEZONE, current_monday, js_date_ms  # noqa: E402
+
+DEFAULT_STORE_PATH = CACHE_ROOT / "columnar"
+STORE_VERSION = 1
+DEFAULT_BATCH_SIZE = 10_000
+
+TIME_COLUMN = "time"
+INDEX_DIR = "index"
+_NAT = np.datetime64("NaT", "ms")
+# Joins athleteId and id into one sortable index key.
+_KEY_SEPARATOR = "\x1f"
+
+
+@dataclass(frozen=True)
+class Schema:
+    kind: str
+    # Source field of the row timestamp (the ``time`` column and the week partition).
+    time_field: str
+    strings: tuple[str, ...]
+    numbers: tuple[str, ...]
+    dates: tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return (TIME_COLUMN, *self.strings, *self.numbers, *self.dates)
+
+    @property
+    def source_fields(self) -> tuple[str, ...]:
+        return tuple(dict.fromkeys((self.time_field, *self.strings, *self.numbers, *self.dates)))
+
+
+ACTIVITIES = Schema(
+    kind="activities",
+    time_field="date",
+    strings=("id", "athleteId", "type"),
+    numbers=("duration", "distance", "calories", "trimp", "ctl", "atl", "rampRate", "avgHeartRate", "maxHeartRate"),
+)
+# Wellness ``date`` is the record's update time; the day the values belong to is ``id``.
+WELLNESS = Schema(
+    kind="wellness",
+    time_field="id",
+    strings=("id", "athleteId"),
+    numbers=("ctl", "atl", "rampRate", "ctlLoad", "atlLoad", "restingHR", "hrv", "sleepScore", "steps", "weight"),
+    dates=("date",),
+)
+SCHEMAS = {schema.kind: schema for schema in (ACTIVITIES, WELLNESS)}
+
+
+def _time_ms(value: Any, tz: ZoneInfo) -> float:
+    """Epoch ms of a stored date: BSON datetimes (naive means UTC), extended JSON ``$date`` or ISO strings."""
+    if isinstance(value, dict) and "$date" in value:
+        value = value["$date"]
+        if isinstance(value, dict):
+            value = float(value.get("$numberLong", "nan"))
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp() * 1000
+    return js_date_ms(value, tz)
+
+
+def _datetime64(values: list[float]) -> np.ndarray:
+    return np.array([_NAT if math.isnan(ms) else np.datetime64(int(ms), "ms") for ms in values], dtype="datetime64[ms]")
+
+
+def _float(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+
+def _string(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _to_datetime64(value: date | datetime | str | None, tz: ZoneInfo) -> np.datetime64 | None:
+    if value is None:
+        return None
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day, tzinfo=tz)
+    ms = _time_ms(value, tz)
+    if math.isnan(ms):
+        raise ValueError(f"Unparseable scan bound: {value!r}")
+    return np.datetime64(int(ms), "ms")
+
+
+def _row_keys(athletes: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    return np.char.add(np.char.add(np.asarray(athletes, dtype=str), _KEY_SEPARATOR), np.asarray(ids, dtype=str))
+
+
+def _concat(parts: list[dict[str, np.ndarray]], names: Iterable[str]) -> dict[str, np.ndarray]:
+    return {name: np.concatenate([part[name] for part in parts]) for name in names}
+
+
+class ColumnarStore:
+    def __init__(self, root: Path = DEFAULT_STORE_PATH, tz: str | ZoneInfo = DEFAULT_TIMEZONE) -> None:
+        self.root = Path(root)
+        self.tz = tz if isinstance(tz, ZoneInfo) else ZoneInfo(tz)
+
+    # Layout
+
+    def _kind_dir(self, schema: Schema) -> Path:
+        return self.root / schema.kind
+
+    def _manifest_path(self, schema: Schema) -> Path:
+        return self._kind_dir(schema) / "manifest.json"
+
+    def manifest(self, kind: str) -> dict[str, Any]:
+        schema = SCHEMAS[kind]
+        path = self._manifest_path(schema)
+        if not path.exists():
+            return {"version": STORE_VERSION, "kind": kind, "timezone": self.tz.key, "partitions": {}}
+        manifest = json.loads(path.read_text())
+        if manifest.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported columnar store version in {path}: {manifest.get('version')!r}")
+        if manifest.get("timezone") != self.tz.key:
+            raise ValueError(f"{path} is partitioned in {manifest.get('timezone')}, not {self.tz.key}")
+        return manifest
+
+    def _write_manifest(self, schema: Schema, manifest: dict[str, Any]) -> None:
+        path = self._manifest_path(schema)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+        os.replace(tmp, path)
+
+    def partitions(self, kind: str) -> list[str]:
+        return sorted(self.manifest(kind)["partitions"])
+
+    def _load_partition(self, schema: Schema, week: str, names: Iterable[str], mmap: bool = True) -> dict[str, np.ndarray]:
+        directory = self._kind_dir(schema) / week
+        return {name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None) for name in names}
+
+    def _save_partition(self, schema: Schema, week: str, columns: dict[str, np.ndarray]) -> None:
+        directory = self._kind_dir(schema) / week
+        staging = directory.with_name(f"{week}.new")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name, values in columns.items():
+            np.save(staging / f"{name}.npy", values, allow_pickle=False)
+        retired = directory.with_name(f"{week}.old")
+        if directory.exists():
+            os.replace(directory, retired)
+        os.replace(staging, directory)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def _load_index(self, schema: Schema, manifest: Mapping[str, Any]) -> tuple[np.ndarray, np.ndarray]:
+        """Sorted ``(key, week)`` arrays of every stored row."""
+        directory = self._kind_dir(schema) / INDEX_DIR
+        expected = sum(info["rows"] for info in manifest["partitions"].values())
+        try:
+            keys, weeks = np.load(directory / "key.npy"), np.load(directory / "week.npy")
+        except FileNotFoundError:
+            keys = weeks = None
+        if keys is not None and len(keys) == len(weeks) == expected:
+            return keys, weeks
+        keys_parts, weeks_parts = [np.array([], dtype=str)], [np.array([], dtype=str)]
+        for week in manifest["partitions"]:
+            part = self._load_partition(schema, week, ("athleteId", "id"))
+            keys_parts.append(_row_keys(part["athleteId"], part["id"]))
+            weeks_parts.append(np.full(len(part["id"]), week))
+        keys, weeks = np.concatenate(keys_parts), np.concatenate(weeks_parts)
+        order = np.argsort(keys, kind="stable")
+        return keys[order], weeks[order]
+
+    def _save_index(self, schema: Schema, keys: np.ndarray, weeks: np.ndarray) -> None:
+        directory = self._kind_dir(schema) / INDEX_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, values in (("key", keys), ("week", weeks)):
+            tmp = directory / f"{name}.npy.tmp"
+            with tmp.open("wb") as handle:
+                np.save(handle, values, allow_pickle=False)
+            os.replace(tmp, directory / f"{name}.npy")
+
+    # Writes
+
+    def _columns(self, schema: Schema, documents: list[Mapping[str, Any]]) -> tuple[dict[str, np.ndarray], list[str]]:
+        times = [_time_ms(document.get(schema.time_field), self.tz) for document in documents]
+        columns: dict[str, np.ndarray] = {TIME_COLUMN: _datetime64(times)}
+        for name in schema.strings:
+            columns[name] = np.array([_string(document.get(name)) for document in documents], dtype=str)
+        for name in schema.numbers:
+            columns[name] = np.array([_float(document.get(name)) for document in documents], dtype=np.float64)
+        for name in schema.dates:
+            columns[name] = _datetime64([_time_ms(document.get(name), self.tz) for document in documents])
+        weeks = [
+            "" if math.isnan(ms) else current_monday(datetime.fromtimestamp(ms / 1000, timezone.utc), self.tz).isoformat()
+            for ms in times
+        ]
+        return columns, weeks
+
+    def write(self, kind: str, documents: Iterable[Mapping[str, Any]]) -> dict[str, int]:
+        """Upsert ``documents`` by ``(athleteId, id)``; returns row and partition counts.
+
+        Documents without a parseable time are skipped. A document whose time
+        moved to another week is removed from its old partition.
+        """
+        schema = SCHEMAS[kind]
+        documents = list(documents)
+        manifest = self.manifest(kind)
+        new, weeks = self._columns(schema, documents)
+        placed = np.array([bool(week) for week in weeks], dtype=bool)
+        stats = {"rows": int(placed.sum()), "skipped": int((~placed).sum()), "partitions": 0}
+        if not placed.any():
+            return stats
+
+        new_weeks = np.array(weeks, dtype=str)[placed]
+        new = {name: values[placed] for name, values in new.items()}
+        # Last occurrence of a key in the batch wins.
+        last = {key: row for row, key in enumerate(zip(new["athleteId"].tolist(), new["id"].tolist()))}
+        keep = np.fromiter(sorted(last.values()), dtype=np.intp, count=len(last))
+        new, new_weeks = {name: values[keep] for name, values in new.items()}, new_weeks[keep]
+        keys = _row_keys(new["athleteId"], new["id"])
+
+        def stays(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+            return ~np.isin(_row_keys(columns["athleteId"], columns["id"]), keys)
+
+        rows_by_week: dict[str, list[int]] = {}
+        for row, week in enumerate(new_weeks.tolist()):
+            rows_by_week.setdefault(week, []).append(row)
+        touched = set(rows_by_week)
+        # Rows whose key now lives in this batch are dropped from the partitions the index places them in.
+        index_keys, index_weeks = self._load_index(schema, manifest)
+        positions = np.searchsorted(index_keys, keys)
+        found = positions < len(index_keys)
+        found[found] = index_keys[positions[found]] == keys[found]
+        touched.update(index_weeks[positions[found]].tolist())
+
+        kind_dir = self._kind_dir(schema)
+        kind_dir.mkdir(parents=True, exist_ok=True)
+        for week in sorted(touched):
+            rows = np.array(rows_by_week.get(week, []), dtype=np.intp)
+            parts = [{name: values[rows] for name, values in new.items()}]
+            if week in manifest["partitions"]:
+                current = self._load_partition(schema, week, schema.columns, mmap=False)
+                survivors = stays(current)
+                parts.insert(0, {name: values[survivors] for name, values in current.items()})
+            merged = _concat(parts, schema.columns)
+            if not len(merged[TIME_COLUMN]):
+                shutil.rmtree(kind_dir / week, ignore_errors=True)
+                manifest["partitions"].pop(week, None)
+                continue
+            order = np.lexsort((merged["id"], merged[TIME_COLUMN], merged["athleteId"]))
+            merged = {name: values[order] for name, values in merged.items()}
+            self._save_partition(schema, week, merged)
+            manifest["partitions"][week] = {
+                "rows": int(len(order)),
+                "minTime": str(merged[TIME_COLUMN].min()),
+                "maxTime": str(merged[TIME_COLUMN].max()),
+                "athletes": sorted(set(merged["athleteId"].tolist())),
+            }
+            stats["partitions"] += 1
+        survivors = np.ones(len(index_keys), dtype=bool)
+        survivors[positions[found]] = False
+        index_keys = np.concatenate([index_keys[survivors], keys])
+        index_weeks = np.concatenate([index_weeks[survivors], new_weeks])
+        order = np.argsort(index_keys, kind="stable")
+        self._save_index(schema, index_keys[order], index_weeks[order])
+        self._write_manifest(schema, manifest)
+        return stats
+
+    # Reads
+
+    def scan(
+        self,
+        kind: str,
+        start: date | datetime | str | None = None,
+        end: date | datetime | str | None = None,
+        athlete_id: Hashable | None = None,
+        fields: Iterable[str] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Columns of the rows with ``start <= time < end`` (and ``athleteId``), week by week.
+
+        Dates are local midnight in the store's timezone. Within a week rows are
+        ordered by athlete then time, so a single-athlete scan is time-ordered.
+        """
+        schema = SCHEMAS[kind]
+        names = list(dict.fromkeys([TIME_COLUMN, *(fields or schema.columns)]))
+        unknown = set(names) - set(schema.columns)
+        if unknown:
+            raise ValueError(f"Unknown {kind} fields: {sorted(unknown)}")
+        lower, upper = _to_datetime64(start, self.tz), _to_datetime64(end, self.tz)
+        athlete = None if athlete_id is None else _string(athlete_id)
+
+        parts = []
+        for week, info in sorted(self.manifest(kind)["partitions"].items()):
+            if lower is not None and np.datetime64(info["maxTime"]) < lower:
+                continue
+            if upper is not None and np.datetime64(info["minTime"]) >= upper:
+                continue
+            if athlete is not None and athlete not in info["athletes"]:
+                continue
+            for begin, stop, part in self._partition_slices(schema, week, names, athlete, lower, upper):
+                parts.append({name: np.asarray(part[name][begin:stop]) for name in names})
+        if not parts:
+            return {name: _empty(schema, name) for name in names}
+        return _concat(parts, names)
+
+    def _partition_slices(
+        self,
+        schema: Schema,
+        week: str,
+        names: list[str],
+        athlete: str | None,
+        lower: np.datetime64 | None,
+        upper: np.datetime64 | None,
+    ) -> Iterator[tuple[int, int, dict[str, np.ndarray]]]:
+        part = self._load_partition(schema, week, dict.fromkeys([*names, "athleteId"]))
+        athletes = part["athleteId"]
+        if athlete is None:
+            groups = np.flatnonzero(np.r_[True, athletes[1:] != athletes[:-1]]).tolist() + [len(athletes)]
+            ranges = list(zip(groups[:-1], groups[1:]))
+        else:
+            ranges = [(int(np.searchsorted(athletes, athlete, "left")), int(np.searchsorted(athletes, athlete, "right")))]
+        for first, last in ranges:
+            times = part[TIME_COLUMN][first:last]
+            begin = first + (int(np.searchsorted(times, lower, "left")) if lower is not None else 0)
+            stop = first + (int(np.searchsorted(times, upper, "left")) if upper is not None else len(times))
+            if begin < stop:
+                yield begin, stop, part
+
+
+def _empty(schema: Schema, name: str) -> np.ndarray:
+    if name == TIME_COLUMN or name in schema.dates:
+        return np.array([], dtype="datetime64[ms]")
+    if name in schema.numbers:
+        return np.array([], dtype=np.float64)
+    return np.array([], dtype=str)
+
+
+def _batches(documents: Iterable[Mapping[str, Any]], size: int) -> Iterator[list[Mapping[str, Any]]]:
+    batch: list[Mapping[str, Any]] = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_documents(
+    store: ColumnarStore, kind: str, documents: Iterable[Mapping[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE
+) -> dict[str, int]:
+    totals = {"rows": 0, "skipped": 0, "partitions": 0}
+    for batch in _batches(documents, batch_size):
+        for key, value in store.write(kind, batch).items():
+            totals[key] += value
+    return totals
+
+
+def export_collection(
+    collection: Any, store: ColumnarStore, kind: str, query: Mapping[str, Any] | None = None, batch_size: int = DEFAULT_BATCH_SIZE
+) -> dict[str, int]:
+    """Stream a Mongo collection into the store, reading only the stored fields."""
+    projection = {"_id": 0, **{name: 1 for name in SCHEMAS[kind].source_fields}}
+    return export_documents(store, kind, collection.find(dict(query or {}), projection), batch_size)
+
+
+def read_json_documents(path: Path) -> Iterator[dict[str, Any]]:
+    """Documents from a JSON array or a JSON-lines dump (``mongoexport`` default)."""
+    with Path(path).open(encoding="utf-8") as handle:
+        first = next((line for line in handle if line.strip()), None)
+        if first is None:
+            return
+        if first.lstrip().startswith("["):
+            yield from json.loads(first + handle.read())
+            return
+        yield json.loads(first)
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export activities/wellness into the columnar store.")
+    parser.add_argument("--kind", choices=sorted(SCHEMAS), required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", type=Path, help="JSON array or JSON-lines dump of the collection.")
+    source.add_argument("--mongo-uri", help="Read the collection from MongoDB (requires pymongo).")
+    parser.add_argument("--db", default="running_coach", help="Database name with --mongo-uri (default: %(default)s).")
+    parser.add_argument("--out", type=Path, default=DEFAULT_STORE_PATH, help="Store root (default: %(default)s).")
+    parser.add_argument("--timezone", default=DEFAULT_TIMEZONE, help="Week partition timezone (default: %(default)s).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    store = ColumnarStore(args.out, args.timezone)
+    if args.input:
+        stats = export_documents(store, args.kind, read_json_documents(args.input), args.batch_size)
+    else:
+        from pymongo import MongoClient
+
+        client = MongoClient(args.mongo_uri)
+        try:
+            stats = export_collection(client[args.db][args.kind], store, args.kind, batch_size=args.batch_size)
+        finally:
+            client.close()
+    print(
+        f"Exported {stats['rows']} {args.kind} rows into {len(store.partitions(args.kind))} weekly partitions "
+        f"under {args.out / args.kind} ({stats['skipped']} without a usable date skipped)."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+"""Small size-bounded, on-disk key/value cache for tooling results.
+
+Entries are JSON values stored in a single SQLite file. Every read refreshes
+the entry's access time and writes evict the least recently used entries once
+the cache exceeds ``max_entries`` or ``max_bytes``, so the file never grows
+without bound. Callers are expected to put everything that affects a result
+(content hashes, rule versions, ...) into the key; there is no other
+invalidation.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_ROOT = Path(os.environ.get("RC_CACHE_DIR", ROOT / ".cache"))
+
+# SQLite limits the number of bound parameters per statement.
+_QUERY_CHUNK = 500
+
+
+class DiskCache:
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 100_000,
+        max_bytes: int | None = 256 * 1024 * 1024,
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Callers sharing a cache across threads serialize access themselves.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+        # Running totals so eviction checks do not rescan the table on every write.
+        self._count, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+    def __enter__(self) -> DiskCache:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def count(self) -> int:
+        return self._count
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Any | None:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        found: dict[str, Any] = {}
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start : start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, value FROM entries WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        if found:
+            now = time.time()
+            self._conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?", [(now, key) for key in found])
+            self._conn.commit()
+        return found
+
+    def set(self, key: str, value: Any) -> None:
+        self.set_many({key: value})
+
+    def set_many(self, items: Mapping[str, Any]) -> None:
+        if not items:
+            return
+        keys = list(items)
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start : start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for (size,) in self._conn.execute(f"SELECT size FROM entries WHERE key IN ({placeholders})", chunk):
+                self._count -= 1
+                self._bytes -= size
+
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+            rows.append((key, encoded, len(encoded), now))
+            self._count += 1
+            self._bytes += len(encoded)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)", rows
+        )
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        over_bytes = self.max_bytes is not None and self._bytes > self.max_bytes
+        if self._count <= self.max_entries and not over_bytes:
+            return
+        # Walk entries from least recently used and drop them until within both budgets.
+        doomed: list[str] = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if self._count <= self.max_entries and (self.max_bytes is None or self._bytes <= self.max_bytes):
+                break
+            doomed.append(key)
+            self._count -= 1
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in doomed])
@@ -0,0 +1,138 @@
+"""Bounded weekly history for the prompt: the last N weeks plus rolling summaries.
+
+``Read Previous Weeks`` used to load every earlier ``weekly_metrics`` document.
+The Prompt Builder only keeps the last ``DEFAULT_HISTORY_WEEKS`` weeks, so the
+query is limited to them (mirrored in the node's ``limit``). Documents are not
+projected: ``Message a model`` and ``Run Artifacts DB (inputs)`` serialize
+whole history entries, and ``Build Telegram Message`` reads more fields than
+the prompt (``HISTORY_FIELDS``).
+
+Longer trends come from one ``weekly_metrics_summary`` document per athlete
+with 12- and 52-week aggregates of the weeks before the current one. It is
+rebuilt with a single bounded query when the current week moves on, so reading
+the context costs two small queries however long the history grows.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Hashable, Iterable, Mapping, Sequence
+
+from scripts.weekly_metrics import WELLNESS_MEANS
+
+
+SUMMARY_COLLECTION = "weekly_metrics_summary"
+DEFAULT_HISTORY_WEEKS = 4
+SUMMARY_WINDOWS = (12, 52)
+
+# Fields of each past week read by the Prompt Builder and Build Telegram Message.
+HISTORY_FIELDS = ("weekStart", "runDistance", "atlMean", "rampRateMean", "restHrMean", "hrvMean")
+
+# Summed over a window.
+TOTAL_FIELDS = (
+    "runCount",
+    "runDistance",
+    "runTime",
+    "rideCount",
+    "rideDistance",
+    "rideTime",
+    "rideTrimp",
+    "vo2Sessions",
+    "tempoSessions",
+    "longRuns",
+    "strengthCount",
+    "strengthTrimp",
+)
+# Averaged over the weeks of a window.
+MEAN_FIELDS = tuple(WELLNESS_MEANS)
+SUMMARY_PROJECTION = {"_id": 0, "weekStart": 1, **{name: 1 for name in TOTAL_FIELDS + MEAN_FIELDS}}
+
+
+def history_query(week_start: str, athlete_id: Hashable | None = None) -> dict[str, Any]:
+    """Weeks before ``week_start``; without ``athlete_id`` it matches the node's single-athlete query."""
+    query: dict[str, Any] = {"weekStart": {"$lt": week_start}}
+    if athlete_id is not None:
+        query["athleteId"] = athlete_id
+    return query
+
+
+def read_recent_weeks(
+    collection: Any,
+    week_start: str,
+    weeks: int = DEFAULT_HISTORY_WEEKS,
+    athlete_id: Hashable | None = None,
+) -> list[dict[str, Any]]:
+    """The ``weeks`` most recent documents before ``week_start``, newest first (without ``_id``)."""
+    if weeks < 1:
+        return []
+    cursor = collection.find(history_query(week_start, athlete_id), {"_id": 0})
+    return list(cursor.sort("weekStart", -1).limit(weeks))
+
+
+def _number(value: Any) -> float:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def summarize_weeks(documents: Sequence[Mapping[str, Any]]) -> dict[str, Any] | None:
+    """Totals of ``TOTAL_FIELDS`` and means of ``MEAN_FIELDS`` over ``documents``; missing values count as 0."""
+    if not documents:
+        return None
+    week_starts = [document.get("weekStart") for document in documents]
+    summary: dict[str, Any] = {
+        "weeks": len(documents),
+        "fromWeekStart": min(week_starts),
+        "toWeekStart": max(week_starts),
+    }
+    for name in TOTAL_FIELDS:
+        summary[name] = sum(_number(document.get(name)) for document in documents)
+    for name in MEAN_FIELDS:
+        summary[name] = sum(_number(document.get(name)) for document in documents) / len(documents)
+    return summary
+
+
+def summary_windows(documents: Sequence[Mapping[str, Any]], windows: Iterable[int] = SUMMARY_WINDOWS) -> dict[str, Any]:
+    """``{"last12Weeks": ..., "last52Weeks": ...}`` from documents sorted newest first."""
+    return {f"last{size}Weeks": summarize_weeks(documents[:size]) for size in windows}
+
+
+def rebuild_summary(
+    weekly: Any,
+    summaries: Any,
+    week_start: str,
+    athlete_id: Hashable | None = None,
+    windows: Sequence[int] = SUMMARY_WINDOWS,
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    """Recompute the rolling summary of the weeks before ``week_start`` and upsert it."""
+    cursor = weekly.find(history_query(week_start, athlete_id), SUMMARY_PROJECTION)
+    documents = list(cursor.sort("weekStart", -1).limit(max(windows)))
+    summary = {
+        "athleteId": athlete_id,
+        "beforeWeekStart": week_start,
+        "windows": summary_windows(documents, windows),
+        "updatedAt": now or datetime.now(timezone.utc),
+    }
+    summaries.update_one({"athleteId": athlete_id}, {"$set": summary}, upsert=True)
+    return summary
+
+
+def build_history_context(
+    weekly: Any,
+    summaries: Any,
+    week_start: str,
+    athlete_id: Hashable | None = None,
+    weeks: int = DEFAULT_HISTORY_WEEKS,
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    """``history`` (last ``weeks`` weeks) and ``summary`` (rolling windows) for the prompt.
+
+    The stored summary is reused while it was built for ``week_start``; the
+    first call in a new week rebuilds it.
+    """
+    summary = summaries.find_one({"athleteId": athlete_id}, {"_id": 0})
+    if summary is None or summary.get("beforeWeekStart") != week_start:
+        summary = rebuild_summary(weekly, summaries, week_start, athlete_id, now=now)
+    return {
+        "history": read_recent_weeks(weekly, week_start, weeks, athlete_id),
+        "summary": summary["windows"],
+    }
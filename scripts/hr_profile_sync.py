@@ -0,0 +1,176 @@
+"""Multi-athlete HR profile sync: change detection plus batched Mongo upserts.
+
+Python counterpart of the workflow's ``Sync HR Zones`` -> ``HR Profiles DB``
+path for many athletes. A source profile is usable only when hrMax, hrRest and
+lthr are all present and pass ``validate_hr_fields`` (the node's
+``validationErrors``); it is written only when it differs from the stored
+``HrFields``. Writes go out as ``updateOne``/``upsert`` operations in batches
+of ``batch_size`` instead of one round trip per athlete.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Iterator, Mapping, NamedTuple
+
+from scripts.hr_zone_sync import (
+    HrFields,
+    compute_hrr_zones,
+    diff_hr_fields,
+    extract_hr_fields_from_athlete_payload,
+    validate_hr_fields,
+)
+
+
+PROFILES_COLLECTION = "hr_zone_profiles"
+ZONE_METHOD = "%HRR"
+DEFAULT_BATCH_SIZE = 500
+
+BulkOp = dict[str, Any]
+BulkSink = Callable[[list[BulkOp]], None]
+
+
+class AthletePayload(NamedTuple):
+    athlete_id: int
+    payload: Any
+    wellness_resting_hr: int | float | None = None
+
+
+@dataclass(frozen=True)
+class ProfileChange:
+    athlete_id: int
+    previous: HrFields | None
+    fields: HrFields
+    zones: dict[str, dict[str, int]]
+
+
+@dataclass
+class SyncStats:
+    seen: int = 0
+    invalid: int = 0
+    unchanged: int = 0
+    written: int = 0
+    batches: int = 0
+
+
+def source_errors(fields: HrFields) -> list[str]:
+    """Errors that keep a source profile from replacing the stored one."""
+    errors: list[str] = []
+    if fields.hr_max is None:
+        errors.append("missing hrMax")
+    if fields.hr_rest is None:
+        errors.append("missing hrRest")
+    if fields.lthr is None:
+        errors.append("missing lthr")
+    return errors + validate_hr_fields(fields)
+
+
+def iter_changed_profiles(
+    payloads: Iterable[AthletePayload | tuple],
+    stored: Mapping[int, HrFields],
+    stats: SyncStats | None = None,
+) -> Iterator[ProfileChange]:
+    """Yield one ``ProfileChange`` per athlete whose valid source fields differ from ``stored``."""
+    for item in payloads:
+        athlete = AthletePayload(*item)
+        if stats is not None:
+            stats.seen += 1
+        fields = extract_hr_fields_from_athlete_payload(athlete.payload, athlete.wellness_resting_hr)
+        if source_errors(fields):
+            if stats is not None:
+                stats.invalid += 1
+            continue
+        previous = stored.get(athlete.athlete_id)
+        if previous is not None and not diff_hr_fields(previous, fields):
+            if stats is not None:
+                stats.unchanged += 1
+            continue
+        yield ProfileChange(
+            athlete_id=athlete.athlete_id,
+            previous=previous,
+            fields=fields,
+            zones=compute_hrr_zones(fields.hr_max, fields.hr_rest),
+        )
+
+
+def profile_document(change: ProfileChange, updated_at: datetime) -> dict[str, Any]:
+    """``hr_zone_profiles`` document, same fields as the ``HR Profiles DB`` node."""
+    return {
+        "athleteId": change.athlete_id,
+        "hrMax": change.fields.hr_max,
+        "hrRest": change.fields.hr_rest,
+        "lthr": change.fields.lthr,
+        "zoneMethod": ZONE_METHOD,
+        "computedZones": change.zones,
+        "updatedAt": updated_at,
+        "zonesUpdated": True,
+    }
+
+
+def upsert_op(document: Mapping[str, Any]) -> BulkOp:
+    return {
+        "updateOne": {
+            "filter": {"athleteId": document["athleteId"]},
+            "update": {"$set": dict(document)},
+            "upsert": True,
+        }
+    }
+
+
+def sync_hr_profiles(
+    payloads: Iterable[AthletePayload | tuple],
+    stored: Mapping[int, HrFields],
+    sink: BulkSink,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    now: datetime | None = None,
+) -> SyncStats:
+    """Stream ``payloads`` and hand changed profiles to ``sink`` in upsert batches."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    updated_at = now or datetime.now(timezone.utc)
+    stats = SyncStats()
+    batch: list[BulkOp] = []
+    for change in iter_changed_profiles(payloads, stored, stats):
+        batch.append(upsert_op(profile_document(change, updated_at)))
+        if len(batch) >= batch_size:
+            sink(batch)
+            stats.written += len(batch)
+            stats.batches += 1
+            batch = []
+    if batch:
+        sink(batch)
+        stats.written += len(batch)
+        stats.batches += 1
+    return stats
+
+
+def _fields_from_document(document: Mapping[str, Any]) -> HrFields:
+    return HrFields(
+        hr_max=document.get("hrMax"),
+        hr_rest=document.get("hrRest"),
+        lthr=document.get("lthr"),
+    )
+
+
+def load_stored_fields(collection: Any, athlete_ids: Iterable[int] | None = None) -> dict[int, HrFields]:
+    """Last stored ``HrFields`` per athlete, read with one query and a projection."""
+    query: dict[str, Any] = {}
+    if athlete_ids is not None:
+        query["athleteId"] = {"$in": list(athlete_ids)}
+    projection = {"_id": 0, "athleteId": 1, "hrMax": 1, "hrRest": 1, "lthr": 1}
+    return {doc["athleteId"]: _fields_from_document(doc) for doc in collection.find(query, projection)}
+
+
+def collection_sink(collection: Any) -> BulkSink:
+    """Sink that applies a batch to a pymongo-compatible collection with one unordered ``bulk_write``."""
+    from pymongo import UpdateOne
+
+    def write(ops: list[BulkOp]) -> None:
+        specs = [op["updateOne"] for op in ops]
+        collection.bulk_write(
+            [UpdateOne(spec["filter"], spec["update"], upsert=spec["upsert"]) for spec in specs],
+            ordered=False,
+        )
+
+    return write
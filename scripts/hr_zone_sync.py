@@ -1,7 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 ZONE_BANDS = {
@@ -11,15 +16,61 @@ ZONE_BANDS = {
     "z4": (0.80, 0.89),
     "z5": (0.90, 1.00),
 }
+ZONE_NAMES = tuple(ZONE_BANDS)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HrFields:
     hr_max: int | None
     hr_rest: int | None
     lthr: int | None
 
 
+class ZoneTable:
+    """Fixed-layout HR zone table: ``[z1.min, z1.max, ..., z5.min, z5.max]`` in a signed 16-bit array.
+
+    Holds the same data as the ``compute_hrr_zones`` dict in a fraction of the
+    memory; ``to_dict``/``from_dict`` convert to and from the stored payload format.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: Sequence[int]) -> None:
+        if len(values) != 2 * len(ZONE_NAMES):
+            raise ValueError(f"ZoneTable needs {2 * len(ZONE_NAMES)} values, got {len(values)}")
+        self._values = array("h", values)
+
+    @classmethod
+    def from_dict(cls, zones: Dict[str, Dict[str, int]]) -> ZoneTable:
+        return cls([zones[name][bound] for name in ZONE_NAMES for bound in ("min", "max")])
+
+    @classmethod
+    def from_hrr(cls, hr_max: int, hr_rest: int) -> ZoneTable:
+        return cls.from_dict(compute_hrr_zones(hr_max, hr_rest))
+
+    def to_dict(self) -> Dict[str, Dict[str, int]]:
+        values = self._values
+        return {
+            name: {"min": values[2 * position], "max": values[2 * position + 1]}
+            for position, name in enumerate(ZONE_NAMES)
+        }
+
+    def __getitem__(self, name: str) -> tuple[int, int]:
+        position = 2 * ZONE_NAMES.index(name)
+        return self._values[position], self._values[position + 1]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ZoneTable):
+            return NotImplemented
+        return self._values == other._values
+
+    def __hash__(self) -> int:
+        return hash(tuple(self._values))
+
+    def __repr__(self) -> str:
+        return f"ZoneTable({self._values.tolist()!r})"
+
+
 def _to_int(value: Any) -> int | None:
     if value is None or value == "":
         return None
@@ -76,6 +127,113 @@ def extract_hr_fields_from_athlete_payload(
     return HrFields(hr_max=hr_max, hr_rest=hr_rest, lthr=lthr)
 
 
+@dataclass(frozen=True)
+class SportIndex:
+    """One-pass index over an athlete payload's candidates and sport settings.
+
+    ``by_type`` maps each lowercased sport type to the position
+    ``(candidate, sport)`` and settings of the first sport listing it;
+    ``resting_hr`` is the position and value of the first candidate carrying a
+    resting HR.
+    """
+
+    by_type: dict[str, tuple[tuple[int, int], dict[str, Any]]]
+    resting_hr: tuple[int, int] | None
+    _matches: dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def build(cls, payload: Any) -> SportIndex:
+        candidates: list[Any] = []
+        if isinstance(payload, dict):
+            candidates = [payload]
+        elif isinstance(payload, list):
+            candidates = [item for item in payload if isinstance(item, dict)]
+
+        by_type: dict[str, tuple[tuple[int, int], dict[str, Any]]] = {}
+        resting_hr: tuple[int, int] | None = None
+        for position, candidate in enumerate(candidates):
+            if resting_hr is None:
+                value = _to_int(
+                    candidate.get("icu_resting_hr")
+                    or candidate.get("restingHR")
+                    or candidate.get("restingHr")
+                    or candidate.get("hrRest")
+                )
+                if value is not None:
+                    resting_hr = (position, value)
+            sport_settings = candidate.get("sportSettings")
+            if not isinstance(sport_settings, list):
+                continue
+            for sport_position, sport in enumerate(sport_settings):
+                if not isinstance(sport, dict):
+                    continue
+                sport_types = sport.get("types")
+                if not isinstance(sport_types, list):
+                    continue
+                for value in sport_types:
+                    if isinstance(value, str):
+                        by_type.setdefault(value.lower(), ((position, sport_position), sport))
+        return cls(by_type=by_type, resting_hr=resting_hr)
+
+    def first_sport(self, type_fragment: str) -> tuple[tuple[int, int], dict[str, Any]] | None:
+        """Earliest sport with a type containing ``type_fragment`` (lowercase)."""
+        if type_fragment not in self._matches:
+            matches = [entry for sport_type, entry in self.by_type.items() if type_fragment in sport_type]
+            self._matches[type_fragment] = min(matches, key=lambda entry: entry[0]) if matches else None
+        return self._matches[type_fragment]
+
+    def hr_fields(self, wellness_resting_hr: int | float | None = None) -> HrFields:
+        """Same result as ``extract_hr_fields_from_athlete_payload`` on the indexed payload."""
+        run = self.first_sport("run")
+        run_sport = run[1] if run else None
+        # The scalar extractor stops at the candidate holding the run sport, so
+        # resting HR from later candidates is never used.
+        athlete_resting_hr = None
+        if self.resting_hr is not None and (run is None or self.resting_hr[0] <= run[0][0]):
+            athlete_resting_hr = self.resting_hr[1]
+        return HrFields(
+            hr_max=_to_int(run_sport.get("max_hr")) if run_sport else None,
+            hr_rest=athlete_resting_hr if athlete_resting_hr is not None else _to_int(wellness_resting_hr),
+            lthr=_to_int(run_sport.get("lthr")) if run_sport else None,
+        )
+
+
+class IndexedHrExtractor:
+    """``extract_hr_fields_from_athlete_payload`` with a bounded memo of payload indexes.
+
+    Payloads are memoized by identity (a reference is kept so the id cannot be
+    reused) or by an explicit ``key`` such as a content hash or ETag. Payloads
+    must not be mutated after they have been indexed under the same key.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._memo: OrderedDict[Hashable, tuple[Any, SportIndex]] = OrderedDict()
+
+    def index(self, payload: Any, key: Hashable | None = None) -> SportIndex:
+        memo_key = ("key", key) if key is not None else ("id", id(payload))
+        entry = self._memo.get(memo_key)
+        if entry is not None and (key is not None or entry[0] is payload):
+            self._memo.move_to_end(memo_key)
+            return entry[1]
+        index = SportIndex.build(payload)
+        self._memo[memo_key] = (payload if key is None else None, index)
+        if len(self._memo) > self.maxsize:
+            self._memo.popitem(last=False)
+        return index
+
+    def extract(
+        self,
+        payload: Any,
+        wellness_resting_hr: int | float | None = None,
+        key: Hashable | None = None,
+    ) -> HrFields:
+        return self.index(payload, key).hr_fields(wellness_resting_hr)
+
+    def clear(self) -> None:
+        self._memo.clear()
+
+
 def validate_hr_fields(fields: HrFields) -> list[str]:
     errors: list[str] = []
     if fields.hr_max is not None and fields.hr_rest is not None and fields.hr_rest >= fields.hr_max:
@@ -98,6 +256,47 @@ def compute_hrr_zones(hr_max: int, hr_rest: int) -> Dict[str, Dict[str, int]]:
     return zones
 
 
+def compute_hrr_zones_batch(
+    hr_max: Sequence[float | None] | np.ndarray,
+    hr_rest: Sequence[float | None] | np.ndarray,
+    lthr: Sequence[float | None] | np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized ``compute_hrr_zones`` for many athletes at once.
+
+    Returns ``(zones, valid)``: ``zones`` is an ``int32`` array of shape
+    ``(athletes, len(ZONE_NAMES), 2)`` holding ``[min, max]`` per zone in
+    ``ZONE_NAMES`` order, and ``valid`` is a boolean mask. A row is valid when
+    ``hr_max`` and ``hr_rest`` are present, it passes ``validate_hr_fields``
+    and ``compute_hrr_zones`` would accept it; invalid rows are all zeros.
+    Missing values may be given as ``None`` or NaN. Valid rows match the
+    scalar function exactly (same float64 arithmetic, round-half-to-even).
+    Requires NumPy, which is imported lazily so the scalar API stays
+    dependency-free.
+    """
+    import numpy as np
+
+    hr_max_arr = np.asarray(hr_max, dtype=np.float64)
+    hr_rest_arr = np.asarray(hr_rest, dtype=np.float64)
+    if hr_max_arr.ndim != 1 or hr_max_arr.shape != hr_rest_arr.shape:
+        raise ValueError("hr_max and hr_rest must be 1-D arrays of the same length")
+
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(hr_max_arr) & np.isfinite(hr_rest_arr) & (hr_rest_arr < hr_max_arr)
+        if lthr is not None:
+            lthr_arr = np.asarray(lthr, dtype=np.float64)
+            if lthr_arr.shape != hr_max_arr.shape:
+                raise ValueError("lthr must have the same length as hr_max")
+            valid &= np.isnan(lthr_arr) | (hr_max_arr >= lthr_arr)
+
+    rest = np.where(valid, hr_rest_arr, 0.0)[:, None, None]
+    reserve = np.where(valid, hr_max_arr - hr_rest_arr, 0.0)[:, None, None]
+    bands = np.array(list(ZONE_BANDS.values()), dtype=np.float64)
+    # Same operation order as compute_hrr_zones: hr_rest + reserve * band.
+    zones = np.rint(rest + reserve * bands).astype(np.int32)
+    zones[~valid] = 0
+    return zones, valid
+
+
 def diff_hr_fields(old: HrFields, new: HrFields) -> bool:
     return (
         old.hr_max != new.hr_max
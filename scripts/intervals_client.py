@@ -0,0 +1,324 @@
+"""Cached, coalescing client for the Intervals.icu endpoints the workflow reads.
+
+``GET Activities``, ``GET Wellness`` and ``GET HR Parameters`` hit the API on
+every run. This client serves the same data with far fewer requests:
+
+- One ``HttpSession`` keeps a bounded pool of keep-alive ``http.client``
+  connections per client; the pool size also caps concurrent requests.
+- Responses are kept in a ``DiskCache`` with their ``ETag``/``Last-Modified``
+  and revalidated with ``If-None-Match``/``If-Modified-Since``; a ``304``
+  reuses the cached body.
+- Activity and wellness windows are merged per athlete. When a cached window
+  still covers the requested ``oldest``, only the tail from ``WINDOW_OVERLAP``
+  before its end is fetched again (rows in that tail are replaced, so edits and
+  deletions there are picked up). The cached window is fully refetched after
+  ``COVERAGE_TTL``.
+- Concurrent calls for the same request or the same athlete window share one
+  fetch (``SingleFlight``); different windows of one athlete are fetched one
+  at a time so each sees the coverage left by the previous one.
+
+Results shared between callers must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import ssl
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Hashable, Mapping
+from urllib.parse import urlencode, urlsplit
+
+from zoneinfo import ZoneInfo
+
+from scripts.disk_cache import CACHE_ROOT, DiskCache
+from scripts.weekly_metrics import DEFAULT_TIMEZONE
+
+
+DEFAULT_BASE_URL = "https://intervals.icu"
+DEFAULT_CACHE_PATH = CACHE_ROOT / "intervals_http.sqlite"
+CREDENTIAL_ENV = "INTERVALS_API_KEY"
+# Intervals.icu basic auth uses this fixed user name with the API key as password.
+BASIC_AUTH_USER = "API_KEY"
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_TIMEOUT = 30.0
+WINDOW_OVERLAP = timedelta(days=1)
+COVERAGE_TTL = timedelta(days=7)
+
+ACTIVITY_FORMAT = "%Y-%m-%dT%H:%M:%S"
+WELLNESS_FORMAT = "%Y-%m-%d"
+# Window bound format and row date key per windowed endpoint.
+WINDOWS = {
+    "activities": (ACTIVITY_FORMAT, lambda row: str(row.get("start_date_local") or row.get("start_date") or "")[:19]),
+    "wellness": (WELLNESS_FORMAT, lambda row: str(row.get("id") or "")[:10]),
+}
+
+_RETRYABLE = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+
+class IntervalsError(RuntimeError):
+    def __init__(self, status: int, target: str, body: bytes) -> None:
+        super().__init__(f"GET {target} returned {status}: {body[:200].decode('utf-8', 'replace')}")
+        self.status = status
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+class HttpSession:
+    """Keep-alive connections to one origin, at most ``pool_size`` in use at a time."""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT) -> None:
+        parts = urlsplit(base_url)
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or ""
+        self._port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._context = ssl.create_default_context() if self._https else None
+        self.connections_opened = 0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.connections_opened += 1
+        if self._https:
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout, context=self._context)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def request(self, method: str, target: str, headers: Mapping[str, str], body: bytes | None = None) -> HttpResponse:
+        with self._slots:
+            for attempt in range(2):
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                reused = connection is not None
+                if connection is None:
+                    connection = self._connect()
+                try:
+                    connection.request(method, self.prefix + target, body=body, headers=dict(headers))
+                    response = connection.getresponse()
+                    payload = response.read()
+                except _RETRYABLE:
+                    connection.close()
+                    # The server may drop an idle keep-alive connection; retry once on a fresh one.
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    connection.close()
+                    raise
+                if response.getheader("Content-Encoding", "").lower() == "gzip":
+                    payload = gzip.decompress(payload)
+                if response.will_close:
+                    connection.close()
+                else:
+                    with self._lock:
+                        self._idle.append(connection)
+                return HttpResponse(response.status, {name.lower(): value for name, value in response.getheaders()}, payload)
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers with the same key get its result."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(func())
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+
+def _bound(value: date | datetime | str | None, fmt: str, end: bool = False) -> str | None:
+    """``value`` in the endpoint's ``fmt``; a date-only ``end`` bound covers the whole day, as the API does."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # Date-only and ISO strings with milliseconds or an offset, as the workflow nodes build them.
+        text = value.strip()
+        value = date.fromisoformat(text) if len(text) == 10 else datetime.fromisoformat(text[:-1] + "+00:00" if text.endswith("Z") else text)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.max.time() if end else datetime.min.time())
+    return value.strftime(fmt)
+
+
+class IntervalsClient:
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        api_key: str | None = None,
+        cache: DiskCache | None = None,
+        session: HttpSession | None = None,
+        tz: str = DEFAULT_TIMEZONE,
+        window_overlap: timedelta = WINDOW_OVERLAP,
+        coverage_ttl: timedelta = COVERAGE_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        api_key = api_key if api_key is not None else os.environ.get(CREDENTIAL_ENV, "")
+        credentials = base64.b64encode(f"{BASIC_AUTH_USER}:{api_key}".encode()).decode()
+        self._headers = {"Accept": "application/json", "Accept-Encoding": "gzip", "Authorization": f"Basic {credentials}"}
+        # Cache entries are scoped to the origin and key, never shared across accounts.
+        self._scope = hashlib.sha256(f"{base_url}\0{api_key}".encode()).hexdigest()[:16]
+        self.session = session or HttpSession(base_url)
+        self.cache = cache
+        self.tz = ZoneInfo(tz)
+        self.window_overlap = window_overlap
+        self.coverage_ttl = coverage_ttl
+        self.clock = clock
+        self._flight = SingleFlight()
+        self._cache_lock = threading.Lock()
+        self._window_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "notModified": 0, "windowHits": 0, "windowRowsReused": 0, "bytes": 0}
+
+    def __enter__(self) -> IntervalsClient:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    @property
+    def coalesced(self) -> int:
+        return self._flight.coalesced
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _cache_get(self, key: str) -> Any | None:
+        if self.cache is None:
+            return None
+        with self._cache_lock:
+            return self.cache.get(key)
+
+    def _cache_set(self, key: str, value: Any) -> None:
+        if self.cache is not None:
+            with self._cache_lock:
+                self.cache.set(key, value)
+
+    def get_json(self, path: str, params: Mapping[str, str] | None = None) -> Any:
+        """GET ``path`` with conditional revalidation of the cached response."""
+        target = path + ("?" + urlencode(sorted(params.items())) if params else "")
+        return self._flight.do(("get", target), lambda: self._fetch(target))
+
+    def _fetch(self, target: str, cacheable: bool = True) -> Any:
+        key = f"intervals:{self._scope}:{target}"
+        cached = self._cache_get(key) if cacheable else None
+        headers = dict(self._headers)
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("lastModified"):
+            headers["If-Modified-Since"] = cached["lastModified"]
+        response = self.session.request("GET", target, headers)
+        self._count(requests=1, bytes=len(response.body))
+        if response.status == 304 and cached is not None:
+            self._count(notModified=1)
+            return cached["body"]
+        if response.status != 200:
+            raise IntervalsError(response.status, target, response.body)
+        body = json.loads(response.body)
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if cacheable and (etag or last_modified):
+            self._cache_set(key, {"etag": etag, "lastModified": last_modified, "body": body})
+        return body
+
+    def athlete(self, athlete_id: str) -> dict[str, Any]:
+        """``GET HR Parameters``: the athlete with its sport settings."""
+        return self.get_json(f"/api/v1/athlete/{athlete_id}")
+
+    def activities(self, athlete_id: str, oldest: date | datetime | str, newest: date | datetime | str | None = None) -> list[dict[str, Any]]:
+        """``GET Activities`` for ``[oldest, newest]`` (local times), sorted by start."""
+        return self._window("activities", athlete_id, oldest, newest)
+
+    def wellness(self, athlete_id: str, oldest: date | str, newest: date | str | None = None) -> list[dict[str, Any]]:
+        """``GET Wellness`` for the days ``[oldest, newest]``, sorted by day."""
+        return self._window("wellness", athlete_id, oldest, newest)
+
+    def _window(self, kind: str, athlete_id: str, oldest: Any, newest: Any) -> list[dict[str, Any]]:
+        fmt, _ = WINDOWS[kind]
+        low, high = _bound(oldest, fmt), _bound(newest, fmt, end=True)
+        return self._flight.do(("window", kind, athlete_id, low, high), lambda: self._locked_window(kind, athlete_id, low, high))
+
+    def _locked_window(self, kind: str, athlete_id: str, low: str, high: str | None) -> list[dict[str, Any]]:
+        with self._cache_lock:
+            lock = self._window_locks.setdefault((kind, athlete_id), threading.Lock())
+        with lock:
+            return self._fetch_window(kind, athlete_id, low, high)
+
+    def _fetch_window(self, kind: str, athlete_id: str, low: str, high: str | None) -> list[dict[str, Any]]:
+        fmt, date_key = WINDOWS[kind]
+        key = f"intervals:{self._scope}:window:{kind}:{athlete_id}"
+        now = self.clock()
+        end = high or datetime.fromtimestamp(now, self.tz).strftime(fmt)
+        state = self._cache_get(key)
+
+        rows: dict[str, dict[str, Any]] = {}
+        fetch_from: str | None = low
+        covered = (
+            state is not None
+            and state["oldest"] <= low
+            and now - state["fetchedAt"] < self.coverage_ttl.total_seconds()
+        )
+        if covered:
+            stable = (datetime.strptime(state["newest"], fmt) - self.window_overlap).strftime(fmt)
+            fetch_from = max(low, stable)
+            if high is not None and high < stable:
+                fetch_from = None
+            # Rows from the refetched tail are replaced by the response, so deletions there stick.
+            rows = {row_id: row for row_id, row in state["rows"].items() if low <= date_key(row) and (fetch_from is None or date_key(row) < fetch_from)}
+            self._count(windowHits=1, windowRowsReused=len(rows))
+
+        if fetch_from is not None:
+            params = {"oldest": fetch_from}
+            if high is not None:
+                params["newest"] = high
+            # The merged window is the cache here; tail URLs change every run and are not kept.
+            path = f"/api/v1/athlete/{athlete_id}/{kind}?" + urlencode(sorted(params.items()))
+            for row in self._fetch(path, cacheable=False):
+                rows[str(row.get("id"))] = row
+            self._cache_set(key, {"oldest": low, "newest": end, "fetchedAt": state["fetchedAt"] if covered else now, "rows": rows})
+        selected = [row for row in rows.values() if low <= date_key(row) and (high is None or date_key(row)[: len(high)] <= high)]
+        return sorted(selected, key=lambda row: (date_key(row), str(row.get("id"))))
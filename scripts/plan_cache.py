@@ -0,0 +1,121 @@
+"""Validated weekly plans cached by a canonical hash of the model inputs.
+
+A manual rerun of the workflow, or a retry after a ``Build Failure Event``,
+sends the same week to ``Message a model`` again. ``plan_cache_key`` hashes
+what the plan actually depends on, normalized so that reruns hash the same:
+
+- ``promptVersion`` and ``modelId``;
+- the athlete and the week (``metrics.weekStart``/``weekEnd``);
+- ``metrics`` and ``history`` with floats rounded to ``precision`` decimals
+  and nulls/empty values dropped;
+- the HR zone model (``heartRate``: ``hrMax``, ``hrRest``, ``lthr``,
+  ``zoneMethod``, ``computedZones``).
+
+Run ids, timestamps and the rendered prompt are left out; the prompt is a
+function of the inputs above and the template, which ``promptVersion`` stands
+for. Without a ``promptVersion`` nothing is cached.
+
+Only plans that passed validation are stored, one document per key in
+``plan_cache`` next to ``plan_snapshots``. ``expiresAt`` carries a TTL index
+(``ensure_indexes``, also in ``bootstrap_run_events_indexes.js``), and reads
+ignore expired documents that the TTL monitor has not removed yet.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Mapping
+
+from scripts.hr_profile_sync import BulkOp
+from scripts.prompt_assembly import strip_defaults
+
+PLAN_CACHE_COLLECTION = "plan_cache"
+# Bump when the normalization changes so old keys are not matched.
+KEY_VERSION = "1"
+DEFAULT_PRECISION = 1
+DEFAULT_TTL = timedelta(days=7)
+HEART_RATE_FIELDS = ("hrMax", "hrRest", "lthr", "zoneMethod", "computedZones")
+PLAN_FIELDS = ("schema_version", "activityPlan", "justification")
+
+
+def cache_inputs(context: Mapping[str, Any], precision: int = DEFAULT_PRECISION) -> dict[str, Any] | None:
+    """The normalized inputs a plan depends on, or ``None`` without a ``promptVersion``."""
+    if not context.get("promptVersion"):
+        return None
+    metrics = context.get("metrics") or {}
+    heart_rate = context.get("heartRate") or {}
+    inputs = {
+        "keyVersion": KEY_VERSION,
+        "promptVersion": context.get("promptVersion"),
+        "modelId": context.get("modelId"),
+        "athleteId": context.get("athleteId"),
+        "weekStart": metrics.get("weekStart"),
+        "weekEnd": metrics.get("weekEnd"),
+        "metrics": metrics,
+        "history": sorted(context.get("history") or [], key=lambda week: str(week.get("weekStart") or "")),
+        "heartRate": {name: heart_rate.get(name) for name in HEART_RATE_FIELDS},
+    }
+    return strip_defaults(inputs, precision)
+
+
+def plan_cache_key(context: Mapping[str, Any], precision: int = DEFAULT_PRECISION) -> str | None:
+    inputs = cache_inputs(context, precision)
+    if inputs is None:
+        return None
+    canonical = json.dumps(inputs, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    def __init__(
+        self,
+        collection: Any,
+        ttl: timedelta = DEFAULT_TTL,
+        precision: int = DEFAULT_PRECISION,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        self.collection = collection
+        self.ttl = ttl
+        self.precision = precision
+        self.now = now
+        self.hits = 0
+        self.misses = 0
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index("key", unique=True, name="plan_cache_key_unique")
+        self.collection.create_index("expiresAt", expireAfterSeconds=0, name="plan_cache_expiresAt_ttl")
+
+    def key(self, context: Mapping[str, Any]) -> str | None:
+        return plan_cache_key(context, self.precision)
+
+    def get(self, key: str | None) -> dict[str, Any] | None:
+        """The cached plan document for ``key`` unless it has expired."""
+        document = None
+        if key is not None:
+            document = self.collection.find_one({"key": key, "expiresAt": {"$gt": self.now()}}, {"_id": 0})
+        if document is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return document
+
+    def put_op(self, key: str, context: Mapping[str, Any], plan: Mapping[str, Any], run_id: str, attempt: int) -> BulkOp:
+        """Upsert of a validated plan under ``key``, for a ``BulkSink``."""
+        now = self.now()
+        metrics = context.get("metrics") or {}
+        document = {
+            "key": key,
+            "promptVersion": context.get("promptVersion"),
+            "modelId": context.get("modelId"),
+            "athleteId": context.get("athleteId"),
+            "weekStart": metrics.get("weekStart"),
+            "weekEnd": metrics.get("weekEnd"),
+            **{name: plan.get(name) for name in PLAN_FIELDS},
+            "sourceRunId": run_id,
+            "attempt": attempt,
+            "createdAt": now,
+            "expiresAt": now + self.ttl,
+        }
+        return {"updateOne": {"filter": {"key": key}, "update": {"$set": document}, "upsert": True}}
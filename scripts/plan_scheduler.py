@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""Generate weekly plans for many athletes concurrently.
+
+The workflow runs one athlete per ``Schedule Trigger``:
+``Prompt Builder`` -> ``Message a model`` -> ``Validate WeeklyPlan (attempt 0)``
+-> success (``Plan Snapshots DB``, ``Run Events DB (success)``) or failure
+(``Build Failure Event``, ``Run Events DB (failure)``, ``Send Failure Alert``,
+``Fallback Trigger``). ``PlanScheduler`` runs that chain for N athletes on one
+asyncio loop:
+
+- At most ``llm_concurrency`` chat completions are in flight at a time
+  (``asyncio.Semaphore``). Blocking HTTP runs on a thread pool of that size
+  over one pooled ``HttpSession``.
+- Rate limits, 5xx answers, dropped connections, protocol errors and
+  non-JSON bodies are retried with exponential backoff (``Retry-After`` is
+  honored). The last error becomes the model output, as
+  ``onError: continueRegularOutput`` does in the workflow. Any other error
+  while handling one athlete gives that athlete a failure result and run
+  event; the rest of the batch carries on.
+- Every answer goes through the Validate node's own JavaScript
+  (``NodeValidator``, via the replay workers of ``scripts.workflow_replay``).
+  ``MAX_ATTEMPTS`` is 1 like today. With more attempts, the validation errors
+  are sent back to the model as a repair request. A plan that is still invalid
+  gets a failure event and the ``on_failure`` alert.
+- Snapshot and run event upserts go through ``BoundedWriter`` queues. Once
+  ``queue_size`` writes are waiting, athletes block on ``put`` until the batch
+  writer catches up, so slow Mongo throttles generation instead of buffering
+  without bound.
+- With ``prompt_template`` (``--token-budget``), requests are rebuilt by
+  ``scripts.prompt_assembly`` within the budget; each result carries the
+  bytes and tokens saved.
+- With a ``PlanCache`` (``--plan-cache-ttl-hours``), an athlete whose
+  normalized inputs match a cached validated plan gets that plan without a
+  model call; new validated plans are added through their own bounded writer.
+
+Input is one ``Prompt Builder`` output (run context) per line; ``athleteId``
+identifies the athlete.
+
+Usage::
+
+    python3 scripts/plan_scheduler.py --contexts contexts.jsonl --mongo-uri mongodb://localhost:27017 --llm-concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import queue
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Mapping
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.hr_profile_sync import BulkOp, BulkSink, collection_sink  # noqa: E402
+from scripts.intervals_client import HttpSession  # noqa: E402
+from scripts.plan_cache import PLAN_CACHE_COLLECTION, PLAN_FIELDS, PlanCache  # noqa: E402
+from scripts.prompt_assembly import DEFAULT_TOKEN_BUDGET, assemble_prompt, load_template, user_message  # noqa: E402
+from scripts.weekly_metrics import DEFAULT_TIMEZONE  # noqa: E402
+from scripts.workflow_model import Workflow  # noqa: E402
+from scripts.workflow_replay import JsRuntime  # noqa: E402
+
+OPENAI_BASE_URL = "https://api.openai.com"
+CHAT_COMPLETIONS_PATH = "/v1/chat/completions"
+LLM_CREDENTIAL_ENV = "OPENAI_API_KEY"
+DEFAULT_MODEL = "gpt-5"
+
+VALIDATE_NODE = "Validate WeeklyPlan (attempt 0)"
+PROMPT_NODE = "Prompt Builder"
+# The workflow validates attempt 0 only; an invalid plan goes straight to the failure branch.
+MAX_ATTEMPTS = 1
+FALLBACK_ERROR = "Fallback required after max repair attempts."
+
+PLAN_SNAPSHOTS_COLLECTION = "plan_snapshots"
+RUN_EVENTS_COLLECTION = "run_events"
+DEFAULT_LLM_CONCURRENCY = 4
+DEFAULT_LLM_RETRIES = 2
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_WRITE_BATCH = 100
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LlmError(RuntimeError):
+    def __init__(self, message: str, retryable: bool, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def request_messages(
+    context: Mapping[str, Any],
+    repair: Mapping[str, Any] | None = None,
+    base: list[dict[str, str]] | None = None,
+) -> list[dict[str, str]]:
+    """``base`` (default: the node's prompt and payload as is), plus a repair turn after an invalid plan."""
+    messages = list(base) if base is not None else [
+        {"role": "system", "content": str(context.get("prompt", ""))},
+        {"role": "user", "content": user_message(context)},
+    ]
+    if repair is not None:
+        messages.append({"role": "assistant", "content": str(repair.get("__raw", ""))})
+        messages.append(
+            {
+                "role": "user",
+                "content": "El plan no es válido. Corrige estos errores y responde solo con el JSON completo:\n- "
+                + "\n- ".join(repair.get("__errors") or []),
+            }
+        )
+    return messages
+
+
+class ChatClient:
+    """Blocking OpenAI-compatible chat completions over a pooled session."""
+
+    def __init__(self, base_url: str = OPENAI_BASE_URL, api_key: str | None = None, pool_size: int = DEFAULT_LLM_CONCURRENCY, timeout: float = 120.0) -> None:
+        api_key = api_key if api_key is not None else os.environ.get(LLM_CREDENTIAL_ENV, "")
+        self._headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+        self.session = HttpSession(base_url, pool_size=pool_size, timeout=timeout)
+
+    def complete(self, model: str, messages: list[dict[str, str]]) -> dict[str, Any]:
+        body = json.dumps({"model": model, "messages": messages, "response_format": {"type": "json_object"}}).encode()
+        try:
+            response = self.session.request("POST", CHAT_COMPLETIONS_PATH, self._headers, body)
+        except (OSError, http.client.HTTPException) as exc:
+            raise LlmError(f"chat completion failed: {exc!r}", retryable=True) from exc
+        if response.status != 200:
+            retry_after = response.headers.get("retry-after")
+            raise LlmError(
+                f"chat completion returned {response.status}: {response.body[:200].decode('utf-8', 'replace')}",
+                retryable=response.status in RETRYABLE_STATUS,
+                retry_after=float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else None,
+            )
+        try:
+            return json.loads(response.body)
+        except ValueError as exc:
+            # Truncated or proxy-generated bodies; a fresh request usually succeeds.
+            raise LlmError(
+                f"chat completion returned invalid JSON: {response.body[:200].decode('utf-8', 'replace')}",
+                retryable=True,
+            ) from exc
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class NodeValidator:
+    """``Validate WeeklyPlan (attempt 0)`` itself, run in a pool of node workers."""
+
+    def __init__(self, workers: int = 1, workflow: Workflow | None = None, tz: str = DEFAULT_TIMEZONE) -> None:
+        workflow = workflow or Workflow.from_path()
+        code = {VALIDATE_NODE: workflow.code(VALIDATE_NODE)}
+        self._runtimes: queue.Queue[JsRuntime] = queue.Queue()
+        for _ in range(max(1, workers)):
+            self._runtimes.put(JsRuntime(code, tz))
+        self.workers = max(1, workers)
+
+    def __call__(self, context: Mapping[str, Any], response: Any, attempt: int) -> dict[str, Any]:
+        runtime = self._runtimes.get()
+        try:
+            runtime.begin(None, {}, {})
+            runtime.set_output(PROMPT_NODE, [{"json": dict(context)}])
+            items, _, error = runtime.execute(VALIDATE_NODE, [{"json": response}])
+        finally:
+            self._runtimes.put(runtime)
+        if error is not None:
+            return {"__valid": False, "__errors": [f"validator_error: {error}"], "__attempt": attempt}
+        output = items[0]["json"]
+        # The node hardcodes attempt 0; later repair attempts are numbered here.
+        output["__attempt"] = attempt
+        return output
+
+    def close(self) -> None:
+        for _ in range(self.workers):
+            self._runtimes.get().close()
+
+
+class BoundedWriter:
+    """Upserts for one collection through a bounded queue and a single batch writer."""
+
+    def __init__(self, sink: BulkSink, queue_size: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_WRITE_BATCH) -> None:
+        self.sink = sink
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.written = 0
+        self.batches = 0
+        self.blocked_puts = 0
+        self.max_depth = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(self.queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def put(self, op: BulkOp) -> None:
+        if self._queue.full():
+            self.blocked_puts += 1
+        await self._queue.put(op)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            ops = [op for op in batch if op is not None]
+            if ops:
+                await loop.run_in_executor(self._executor, self.sink, ops)
+                self.written += len(ops)
+                self.batches += 1
+            if None in batch:
+                return
+
+    async def close(self) -> None:
+        await self._queue.put(None)
+        await self._task
+        self._executor.shutdown()
+
+
+def upsert_by_run_id(document: Mapping[str, Any]) -> BulkOp:
+    """``findOneAndUpdate`` on ``updateKey: runId`` with upsert, as the DB nodes do."""
+    return {"updateOne": {"filter": {"runId": document["runId"]}, "update": {"$set": dict(document)}, "upsert": True}}
+
+
+@dataclass
+class PlanResult:
+    athlete_id: Any
+    run_id: str
+    status: str
+    attempts: int
+    errors: list[str] = field(default_factory=list)
+    llm_ms: float = 0.0
+    duration_ms: float = 0.0
+    prompt: dict[str, Any] | None = None
+    cached: bool = False
+
+
+@dataclass
+class SchedulerStats:
+    athletes: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    llm_calls: int = 0
+    llm_retries: int = 0
+    max_llm_in_flight: int = 0
+    cache_hits: int = 0
+    prompt_bytes_saved: int = 0
+    prompt_tokens_saved: int = 0
+    elapsed_s: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **self.__dict__,
+            "plansPerSecond": self.athletes / self.elapsed_s if self.elapsed_s else None,
+        }
+
+
+Complete = Callable[[str, list[dict[str, str]]], dict[str, Any]]
+Validate = Callable[[Mapping[str, Any], Any, int], dict[str, Any]]
+
+
+class PlanScheduler:
+    def __init__(
+        self,
+        complete: Complete,
+        validate: Validate,
+        snapshots: BulkSink,
+        run_events: BulkSink,
+        llm_concurrency: int = DEFAULT_LLM_CONCURRENCY,
+        max_attempts: int = MAX_ATTEMPTS,
+        llm_retries: int = DEFAULT_LLM_RETRIES,
+        backoff_s: float = 0.5,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        write_batch: int = DEFAULT_WRITE_BATCH,
+        validator_workers: int = 1,
+        on_failure: Callable[[PlanResult], Awaitable[None] | None] | None = None,
+        prompt_template: str | None = None,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        plan_cache: PlanCache | None = None,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ) -> None:
+        if llm_concurrency < 1 or max_attempts < 1:
+            raise ValueError("llm_concurrency and max_attempts must be >= 1")
+        self.complete = complete
+        self.validate = validate
+        self.llm_concurrency = llm_concurrency
+        self.max_attempts = max_attempts
+        self.llm_retries = llm_retries
+        self.backoff_s = backoff_s
+        self.on_failure = on_failure
+        self.prompt_template = prompt_template
+        self.token_budget = token_budget
+        self.now = now
+        self.snapshots = BoundedWriter(snapshots, queue_size, write_batch)
+        self.run_events = BoundedWriter(run_events, queue_size, write_batch)
+        self.plan_cache = plan_cache
+        self.cache_writes = (
+            BoundedWriter(collection_sink(plan_cache.collection), queue_size, write_batch) if plan_cache is not None else None
+        )
+        self.stats = SchedulerStats()
+        self._llm_executor = ThreadPoolExecutor(max_workers=llm_concurrency)
+        self._validate_executor = ThreadPoolExecutor(max_workers=max(1, validator_workers))
+        self._semaphore: asyncio.Semaphore | None = None
+        self._in_flight = 0
+
+    async def _call_llm(self, model: str, messages: list[dict[str, str]]) -> Any:
+        loop = asyncio.get_running_loop()
+        for retry in range(self.llm_retries + 1):
+            async with self._semaphore:
+                self._in_flight += 1
+                self.stats.max_llm_in_flight = max(self.stats.max_llm_in_flight, self._in_flight)
+                self.stats.llm_calls += 1
+                try:
+                    return await loop.run_in_executor(self._llm_executor, self.complete, model, messages)
+                except LlmError as exc:
+                    error = exc
+                finally:
+                    self._in_flight -= 1
+            if not error.retryable or retry == self.llm_retries:
+                break
+            self.stats.llm_retries += 1
+            delay = error.retry_after if error.retry_after is not None else self.backoff_s * 2**retry
+            await asyncio.sleep(delay * (1 + random.random() * 0.1))
+        # onError: continueRegularOutput hands the error item to the validator.
+        return {"error": str(error)}
+
+    async def generate(self, context: Mapping[str, Any]) -> PlanResult:
+        started = time.perf_counter()
+        athlete_id = context.get("athleteId")
+        run_id = str(context.get("runId") or f"{athlete_id}-{self.now().strftime('%Y%m%dT%H%M%S')}")
+        context = {**context, "runId": run_id}
+        try:
+            result = await self._generate(context, started)
+        except Exception as exc:
+            # One athlete's error must not abort the batch: record it like a failed validation.
+            errors = [f"scheduler_error: {exc!r}"]
+            result = PlanResult(
+                athlete_id=athlete_id,
+                run_id=run_id,
+                status="failure",
+                attempts=0,
+                errors=errors + [FALLBACK_ERROR],
+                duration_ms=(time.perf_counter() - started) * 1000,
+            )
+            await self.run_events.put(upsert_by_run_id(self._run_event(result, 0, {}, errors, self.now())))
+        if result.status != "success" and self.on_failure is not None:
+            alert = self.on_failure(result)
+            if asyncio.iscoroutine(alert):
+                await alert
+        return result
+
+    def _run_event(
+        self, result: PlanResult, attempt: int, next_week: Mapping[str, Any], errors: list[str], created_at: datetime
+    ) -> dict[str, Any]:
+        return {
+            "runId": result.run_id,
+            "athleteId": result.athlete_id,
+            "status": result.status,
+            "attempt": attempt,
+            "weekStart": next_week.get("weekStart"),
+            "weekEnd": next_week.get("weekEnd"),
+            "errorCount": len(errors),
+            "errors": errors,
+            "createdAt": created_at,
+            "runDurationMs": round(result.duration_ms),
+            "cacheHit": result.cached,
+        }
+
+    async def _generate(self, context: Mapping[str, Any], started: float) -> PlanResult:
+        loop = asyncio.get_running_loop()
+        athlete_id = context.get("athleteId")
+        run_id = context["runId"]
+        model = str(context.get("modelId") or DEFAULT_MODEL)
+
+        cache_key = cached = None
+        if self.plan_cache is not None:
+            cache_key = self.plan_cache.key(context)
+            cached = await loop.run_in_executor(None, self.plan_cache.get, cache_key)
+
+        validated: dict[str, Any] = {}
+        prompt_stats = None
+        llm_ms = 0.0
+        attempt = attempts = 0
+        if cached is not None:
+            # Only validated plans are cached; the model is not called again.
+            validated = {**{name: cached.get(name) for name in PLAN_FIELDS}, "__valid": True, "__errors": []}
+            attempt = cached.get("attempt") or 0
+            self.stats.cache_hits += 1
+        else:
+            base = None
+            if self.prompt_template is not None:
+                assembled = assemble_prompt(context, self.prompt_template, self.token_budget)
+                base, prompt_stats = assembled.messages, assembled.stats.as_dict()
+                self.stats.prompt_bytes_saved += assembled.stats.bytes_saved
+                self.stats.prompt_tokens_saved += assembled.stats.tokens_saved
+            for attempt in range(self.max_attempts):
+                repair = validated if attempt else None
+                llm_started = time.perf_counter()
+                response = await self._call_llm(model, request_messages(context, repair, base))
+                llm_ms += (time.perf_counter() - llm_started) * 1000
+                attempts += 1
+                validated = await loop.run_in_executor(self._validate_executor, self.validate, context, response, attempt)
+                if validated.get("__valid"):
+                    break
+
+        valid = bool(validated.get("__valid"))
+        errors = list(validated.get("__errors") or [])
+        next_week = (validated.get("activityPlan") or {}).get("nextWeek") or {}
+        created_at = self.now()
+        result = PlanResult(
+            athlete_id=athlete_id,
+            run_id=run_id,
+            status="success" if valid else "failure",
+            attempts=attempts,
+            errors=errors if valid else errors + [FALLBACK_ERROR],
+            llm_ms=llm_ms,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            prompt=prompt_stats,
+            cached=cached is not None,
+        )
+        if valid:
+            await self.snapshots.put(
+                upsert_by_run_id(
+                    {
+                        "runId": run_id,
+                        "athleteId": athlete_id,
+                        "attempt": attempt,
+                        "weekStart": next_week.get("weekStart"),
+                        "weekEnd": next_week.get("weekEnd"),
+                        "schema_version": validated.get("schema_version"),
+                        "activityPlan": validated.get("activityPlan"),
+                        "justification": validated.get("justification"),
+                        "createdAt": created_at,
+                    }
+                )
+            )
+        await self.run_events.put(upsert_by_run_id(self._run_event(result, attempt, next_week, errors, created_at)))
+        if valid and cached is None and cache_key is not None:
+            await self.cache_writes.put(self.plan_cache.put_op(cache_key, context, validated, run_id, attempt))
+        return result
+
+    async def run(self, contexts: Iterable[Mapping[str, Any]], max_in_flight: int | None = None) -> AsyncIterator[PlanResult]:
+        """Generate plans for ``contexts``, yielding results as they complete.
+
+        At most ``max_in_flight`` athletes (default: four times the LLM limit)
+        are in progress, so long inputs stream through without a task per athlete.
+        """
+        self._semaphore = asyncio.Semaphore(self.llm_concurrency)
+        self.snapshots.start()
+        self.run_events.start()
+        if self.cache_writes is not None:
+            self.cache_writes.start()
+        source = iter(contexts)
+        results: asyncio.Queue = asyncio.Queue()
+        done = object()
+        started = time.perf_counter()
+
+        async def work() -> None:
+            try:
+                for context in source:
+                    result = await self.generate(context)
+                    self.stats.athletes += 1
+                    if result.status == "success":
+                        self.stats.succeeded += 1
+                    else:
+                        self.stats.failed += 1
+                    await results.put(result)
+            except BaseException as exc:
+                await results.put(exc)
+            finally:
+                await results.put(done)
+
+        workers = [asyncio.create_task(work()) for _ in range(max_in_flight or self.llm_concurrency * 4)]
+        try:
+            running = len(workers)
+            while running:
+                item = await results.get()
+                if item is done:
+                    running -= 1
+                elif isinstance(item, BaseException):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self.snapshots.close()
+            await self.run_events.close()
+            if self.cache_writes is not None:
+                await self.cache_writes.close()
+            self.stats.elapsed_s = time.perf_counter() - started
+
+    def close(self) -> None:
+        self._llm_executor.shutdown()
+        self._validate_executor.shutdown()
+
+
+def read_contexts(path: Path) -> Iterable[dict[str, Any]]:
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def _main(args: argparse.Namespace) -> int:
+    from pymongo import MongoClient
+
+    client = MongoClient(args.mongo_uri)
+    db = client[args.db]
+    chat = ChatClient(args.llm_url, pool_size=args.llm_concurrency)
+    validator = NodeValidator(args.validator_workers)
+    plan_cache = None
+    if args.plan_cache_ttl_hours:
+        plan_cache = PlanCache(db[PLAN_CACHE_COLLECTION], ttl=timedelta(hours=args.plan_cache_ttl_hours))
+        plan_cache.ensure_indexes()
+    scheduler = PlanScheduler(
+        chat.complete,
+        validator,
+        collection_sink(db[PLAN_SNAPSHOTS_COLLECTION]),
+        collection_sink(db[RUN_EVENTS_COLLECTION]),
+        llm_concurrency=args.llm_concurrency,
+        max_attempts=args.max_attempts,
+        validator_workers=args.validator_workers,
+        prompt_template=load_template() if args.token_budget is not None else None,
+        token_budget=args.token_budget or DEFAULT_TOKEN_BUDGET,
+        plan_cache=plan_cache,
+    )
+    try:
+        async for result in scheduler.run(read_contexts(args.contexts)):
+            print(
+                f"{result.athlete_id} {result.run_id} {result.status} attempts={result.attempts} llm={result.llm_ms:.0f}ms"
+                + (" cached" if result.cached else "")
+            )
+    finally:
+        scheduler.close()
+        validator.close()
+        chat.close()
+        client.close()
+    print(json.dumps(scheduler.stats.as_dict()))
+    return 1 if scheduler.stats.failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate weekly plans for many athletes concurrently.")
+    parser.add_argument("--contexts", type=Path, required=True, help="JSONL of Prompt Builder outputs, one per athlete.")
+    parser.add_argument("--mongo-uri", required=True)
+    parser.add_argument("--db", default="running_coach")
+    parser.add_argument("--llm-url", default=OPENAI_BASE_URL)
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_LLM_CONCURRENCY)
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    parser.add_argument("--validator-workers", type=int, default=1)
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="Rebuild each request with scripts/prompt_assembly.py within this many estimated tokens.",
+    )
+    parser.add_argument(
+        "--plan-cache-ttl-hours",
+        type=float,
+        default=0,
+        help="Reuse validated plans for identical inputs from plan_cache for this long (default: off).",
+    )
+    return asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,259 @@
+"""Shared, cached JSON Schema validation for WeeklyPlan and golden-weeks payloads.
+
+Schemas are compiled once into a plain Python predicate (``is_valid``) that
+covers the keyword subset our schemas use. The predicate is generated in
+process and memoized by schema content hash; generated code is never read back
+from disk, so a restored CI cache cannot inject code into validation. Callers that need error details still go through
+``jsonschema`` (``errors``/``iter_errors``), which stays the source of truth;
+schemas using keywords the compiler does not know fall back to it entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from jsonschema import Draft202012Validator, FormatChecker
+from jsonschema.exceptions import ValidationError
+
+ROOT = Path(__file__).resolve().parents[1]
+SCHEMA_PATH = ROOT / "schemas" / "weekly_plan.schema.json"
+GOLDEN_WEEKS_SCHEMA_PATH = ROOT / "schemas" / "golden_weeks_dataset.schema.json"
+
+ANNOTATION_KEYWORDS = {"$schema", "$id", "$comment", "$defs", "title", "description", "examples", "default"}
+TYPE_CHECKS = {
+    "object": "isinstance(data, dict)",
+    "array": "isinstance(data, list)",
+    "string": "isinstance(data, str)",
+    "boolean": "isinstance(data, bool)",
+    "null": "data is None",
+    "number": "(isinstance(data, (int, float)) and not isinstance(data, bool))",
+    "integer": "_is_integer(data)",
+}
+KEYWORDS_BY_TYPE = {
+    "string": ("minLength", "maxLength", "pattern"),
+    "number": ("minimum", "maximum"),
+    "array": ("minItems", "maxItems", "items"),
+    "object": ("required", "properties", "additionalProperties"),
+}
+SUPPORTED_KEYWORDS = {"type", "const", "enum", "format", "$ref"}.union(*KEYWORDS_BY_TYPE.values())
+
+
+class UnsupportedSchema(Exception):
+    """Raised when a schema uses keywords the predicate compiler does not handle."""
+
+
+def _is_integer(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+def _equal(one: Any, two: Any) -> bool:
+    # JSON equality: booleans never equal numbers, containers compare deeply.
+    if isinstance(one, bool) or isinstance(two, bool):
+        return isinstance(one, bool) and isinstance(two, bool) and one == two
+    if isinstance(one, list) and isinstance(two, list):
+        return len(one) == len(two) and all(_equal(a, b) for a, b in zip(one, two))
+    if isinstance(one, dict) and isinstance(two, dict):
+        return one.keys() == two.keys() and all(_equal(one[key], two[key]) for key in one)
+    return one == two
+
+
+class _PredicateCompiler:
+    def __init__(self, root: Any) -> None:
+        self.root = root
+        self.constants: list[str] = []
+        self.functions: list[str] = []
+        self.names: dict[str, str] = {}
+
+    def constant(self, source: str) -> str:
+        name = f"_c{len(self.constants)}"
+        self.constants.append(f"{name} = {source}")
+        return name
+
+    def resolve(self, ref: str) -> tuple[Any, str]:
+        if not ref.startswith("#"):
+            raise UnsupportedSchema(f"remote $ref {ref!r}")
+        node = self.root
+        for part in [p for p in ref[1:].split("/") if p]:
+            part = part.replace("~1", "/").replace("~0", "~")
+            node = node[int(part)] if isinstance(node, list) else node[part]
+        return node, ref[1:]
+
+    def function(self, schema: Any, pointer: str) -> str:
+        if schema is True:
+            return "_accept"
+        if schema is False:
+            return "_reject"
+        if pointer in self.names:
+            return self.names[pointer]
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema(f"{pointer or '#'}: schema must be an object or boolean")
+        unknown = set(schema) - SUPPORTED_KEYWORDS - ANNOTATION_KEYWORDS
+        if unknown:
+            raise UnsupportedSchema(f"{pointer or '#'}: unsupported keywords {sorted(unknown)}")
+
+        name = f"_v{len(self.names)}"
+        self.names[pointer] = name
+        body: list[str] = []
+
+        types = schema.get("type")
+        if types is not None:
+            types = [types] if isinstance(types, str) else list(types)
+            body.append(f"if not ({' or '.join(TYPE_CHECKS[t] for t in types)}): return False")
+        if "const" in schema:
+            body.append(f"if not _equal(data, {self.constant(repr(schema['const']))}): return False")
+        if "enum" in schema:
+            options = self.constant(repr(schema["enum"]))
+            body.append(f"if not any(_equal(data, option) for option in {options}): return False")
+        if "format" in schema:
+            body.append(f"if not _format_checker.conforms(data, {schema['format']!r}): return False")
+        if "$ref" in schema:
+            target, target_pointer = self.resolve(schema["$ref"])
+            body.append(f"if not {self.function(target, target_pointer)}(data): return False")
+
+        for type_name in KEYWORDS_BY_TYPE:
+            checks = self.type_checks(type_name, schema, pointer)
+            if not checks:
+                continue
+            if types == [type_name] or (type_name == "number" and types == ["integer"]):
+                body.extend(checks)
+            else:
+                body.append(f"if {TYPE_CHECKS[type_name]}:")
+                body.extend(f"    {line}" for line in checks)
+
+        body.append("return True")
+        self.functions.append("\n".join([f"def {name}(data):", *(f"    {line}" for line in body)]))
+        return name
+
+    def type_checks(self, type_name: str, schema: dict, pointer: str) -> list[str]:
+        checks: list[str] = []
+        if type_name == "string":
+            if "minLength" in schema:
+                checks.append(f"if len(data) < {int(schema['minLength'])}: return False")
+            if "maxLength" in schema:
+                checks.append(f"if len(data) > {int(schema['maxLength'])}: return False")
+            if "pattern" in schema:
+                pattern = self.constant(f"re.compile({schema['pattern']!r})")
+                checks.append(f"if not {pattern}.search(data): return False")
+        elif type_name == "number":
+            if "minimum" in schema:
+                checks.append(f"if data < {schema['minimum']!r}: return False")
+            if "maximum" in schema:
+                checks.append(f"if data > {schema['maximum']!r}: return False")
+        elif type_name == "array":
+            if "minItems" in schema:
+                checks.append(f"if len(data) < {int(schema['minItems'])}: return False")
+            if "maxItems" in schema:
+                checks.append(f"if len(data) > {int(schema['maxItems'])}: return False")
+            if "items" in schema and schema["items"] is not True:
+                item = self.function(schema["items"], f"{pointer}/items")
+                checks.append(f"if not all(map({item}, data)): return False")
+        elif type_name == "object":
+            properties = schema.get("properties", {})
+            if schema.get("required"):
+                required = self.constant(f"frozenset({sorted(schema['required'])!r})")
+                checks.append(f"if not {required} <= data.keys(): return False")
+            for key, subschema in properties.items():
+                if subschema is True:
+                    continue
+                escaped = key.replace("~", "~0").replace("/", "~1")
+                check = self.function(subschema, f"{pointer}/properties/{escaped}")
+                checks.append(f"if {key!r} in data and not {check}(data[{key!r}]): return False")
+            additional = schema.get("additionalProperties", True)
+            if additional is not True:
+                known = self.constant(f"frozenset({sorted(properties)!r})")
+                if additional is False:
+                    checks.append(f"if data.keys() - {known}: return False")
+                else:
+                    extra = self.function(additional, f"{pointer}/additionalProperties")
+                    checks.append(
+                        f"if not all({extra}(value) for key, value in data.items() if key not in {known}): return False"
+                    )
+        return checks
+
+    def source(self) -> str:
+        entry = self.function(self.root, "")
+        return "\n\n".join([*self.constants, *self.functions, f"validate = {entry}"]) + "\n"
+
+
+def compile_predicate_source(schema: Any) -> str:
+    """Generate Python source defining ``validate(data) -> bool`` for ``schema``."""
+    return _PredicateCompiler(schema).source()
+
+
+def _load_predicate(source: str, format_checker: FormatChecker) -> Callable[[Any], bool]:
+    namespace: dict[str, Any] = {
+        "re": re,
+        "_equal": _equal,
+        "_is_integer": _is_integer,
+        "_format_checker": format_checker,
+        "_accept": lambda data: True,
+        "_reject": lambda data: False,
+    }
+    exec(compile(source, "<compiled-schema>", "exec"), namespace)
+    return namespace["validate"]
+
+
+def format_schema_errors(errors: list) -> list[str]:
+    formatted: list[str] = []
+    for err in sorted(errors, key=lambda item: list(item.absolute_path)):
+        path = ".".join(str(part) for part in err.absolute_path) or "<root>"
+        formatted.append(f"{path}: {err.message}")
+    return formatted
+
+
+class SchemaValidator:
+    """A schema compiled once, with a boolean fast path and full error reporting."""
+
+    def __init__(self, schema: Any, schema_hash: str, predicate_source: str | None) -> None:
+        self.schema = schema
+        self.schema_hash = schema_hash
+        self.validator = Draft202012Validator(schema, format_checker=FormatChecker())
+        self._predicate = (
+            _load_predicate(predicate_source, self.validator.format_checker)
+            if predicate_source is not None
+            else self.validator.is_valid
+        )
+
+    def is_valid(self, instance: Any) -> bool:
+        return self._predicate(instance)
+
+    def iter_errors(self, instance: Any) -> Iterator[ValidationError]:
+        return self.validator.iter_errors(instance)
+
+    def errors(self, instance: Any) -> list[str]:
+        """Formatted errors sorted by path; empty when the instance is valid."""
+        if self._predicate(instance):
+            return []
+        return format_schema_errors(list(self.validator.iter_errors(instance)))
+
+
+_VALIDATORS: dict[str, SchemaValidator] = {}
+
+
+def schema_content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _predicate_source(schema: Any) -> str | None:
+    try:
+        return compile_predicate_source(schema)
+    except UnsupportedSchema:
+        return None
+
+
+def load_schema_validator(path: Path = SCHEMA_PATH) -> SchemaValidator:
+    """Return the compiled validator for the schema at ``path``, shared per process by schema content hash."""
+    text = path.read_text(encoding="utf-8")
+    schema_hash = schema_content_hash(text)
+    validator = _VALIDATORS.get(schema_hash)
+    if validator is None:
+        schema = json.loads(text)
+        validator = SchemaValidator(schema, schema_hash, _predicate_source(schema))
+        _VALIDATORS[schema_hash] = validator
+    return validator
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""Assemble the ``Message a model`` request within a token budget.
+
+Today's request is the ``Prompt Builder`` prompt as system message plus the
+week's ``metrics`` and ``history`` as ``JSON.stringify(value, null, 2)``. Both
+grow with history, and the payload carries every null and unrounded float.
+``assemble_prompt`` builds the same two messages from a ``Prompt Builder``
+output and:
+
+- renders the ``PROMPT_BEGIN``/``PROMPT_END`` template of the workflow (as
+  extracted by ``scripts.workflow_model.extract_prompt_and_version``) in Python, so the history
+  lines follow the same weeks as the payload. ``render_template`` evaluates
+  the template's ``${...}`` expressions and fails on any form it does not know,
+  so a template change cannot silently render differently;
+- with ``compact`` (the default) drops the marker lines, trailing spaces and
+  blank-line runs from the prompt, and sends the payload as minified JSON with
+  nulls, empty strings and empty containers removed and floats rounded;
+- keeps the newest history weeks that fit ``token_budget``, and folds the
+  weeks that do not fit into one ``olderWeeks`` summary (means per field), or
+  drops them when even the summary does not fit.
+
+Tokens are estimated locally (``estimate_tokens``): words, numbers and
+punctuation runs are split the way BPE tokenizers usually split them and
+counted at a few characters per token. It is an estimate, meant for budgeting
+and for comparing requests, not an exact count for any one model.
+
+``PromptStats`` reports bytes and estimated tokens before and after, per run.
+
+Usage::
+
+    python3 scripts/prompt_assembly.py --contexts contexts.jsonl --token-budget 1500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import sys
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.workflow_model import (  # noqa: E402
+    PROMPT_BEGIN,
+    PROMPT_END,
+    MissingNodeError,
+    Workflow,
+    extract_prompt_and_version,
+)
+
+DEFAULT_TOKEN_BUDGET = 2000
+DEFAULT_FLOAT_DIGITS = 2
+
+# phaseNote is not part of the Prompt Builder output; these mirror the node.
+PHASE_NOTES = {
+    "Base": "Rodajes suaves y fuerza general.",
+    "Desarrollo": "Interválicos, tempo runs y fuerza específica.",
+    "Específica": "Ritmo objetivo, simulaciones de competición.",
+    "Taper": "Reducción de carga manteniendo chispa.",
+}
+
+_UNDEFINED = object()
+_TOKEN_PIECES = re.compile(r" ?[^\W\d_]+| ?\d+|[^\w\s]+|\s+")
+_ESCAPE = re.compile(r"\\(.)", re.S)
+_MAP_JOIN = re.compile(r"(\w+)\.map\(\s*(\w+)\s*=>\s*`(.*)`\s*\)\.join\('((?:[^'\\]|\\.)*)'\)", re.S)
+_OR_DEFAULT = re.compile(r"(.+?)\s*\|\|\s*'([^']*)'", re.S)
+_IF_NOT_NULL = re.compile(r"(\w+)\s*!=\s*null\s*\?\s*`(.*)`\s*:\s*'([^']*)'", re.S)
+_FMT = re.compile(r"fmt\((.+)\)", re.S)
+_DIVIDE = re.compile(r"(.+?)\s*/\s*(\d+(?:\.\d+)?)")
+_ISO_DATE = re.compile(r"(\w+)\.toISOString\(\)\.slice\(0,\s*10\)")
+_NAME = re.compile(r"(\w+)(?:\.(\w+))?")
+
+
+class PromptTemplateError(ValueError):
+    pass
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate: letters ~4 chars/token, digits 3, punctuation 2, whitespace runs 1."""
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        core = piece.strip()
+        if not core:
+            tokens += 1
+        elif core[0].isdigit():
+            tokens += math.ceil(len(core) / 3)
+        elif core[0].isalpha():
+            tokens += math.ceil(len(core) / 4)
+        else:
+            tokens += math.ceil(len(core) / 2)
+    return tokens
+
+
+def load_template(workflow: Workflow | None = None) -> str:
+    """The Prompt Builder template between the markers, exactly as the version check sees it."""
+    try:
+        template, _ = extract_prompt_and_version(workflow or Workflow.from_path())
+    except MissingNodeError as exc:
+        raise PromptTemplateError(str(exc)) from exc
+    if template is None:
+        raise PromptTemplateError("Prompt Builder has no PROMPT_BEGIN/PROMPT_END template")
+    return template
+
+
+def _split_template(template: str) -> Iterable[tuple[bool, str]]:
+    """``(False, text)`` and ``(True, expression)`` parts of a JS template literal body."""
+    position = 0
+    while True:
+        start = template.find("${", position)
+        if start == -1:
+            yield False, template[position:]
+            return
+        yield False, template[position:start]
+        depth, end = 0, start + 1
+        while end < len(template):
+            depth += {"{": 1, "}": -1}.get(template[end], 0)
+            if depth == 0:
+                break
+            end += 1
+        if depth:
+            raise PromptTemplateError(f"unterminated ${{ at offset {start}")
+        yield True, template[start + 2 : end]
+        position = end + 1
+
+
+def _js_string(value: Any) -> str:
+    if value is _UNDEFINED:
+        return "undefined"
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def _fmt(value: Any) -> str:
+    """``x != null ? x.toFixed(1) : '—'``; ``toFixed`` rounds exact ties away from zero."""
+    if value is None or value is _UNDEFINED:
+        return "—"
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    text = str(Decimal(value).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
+    return "0.0" if text == "-0.0" else text
+
+
+def _truthy(value: Any) -> bool:
+    if value is _UNDEFINED or value is None:
+        return False
+    if isinstance(value, float) and math.isnan(value):
+        return False
+    return bool(value)
+
+
+def _evaluate(expression: str, scope: Mapping[str, Any]) -> Any:
+    expression = expression.strip()
+    if match := _MAP_JOIN.fullmatch(expression):
+        name, item, body, separator = match.groups()
+        separator = _ESCAPE.sub(lambda escaped: "\n" if escaped.group(1) == "n" else escaped.group(1), separator)
+        return separator.join(_render(body, {**scope, item: entry}) for entry in scope.get(name) or [])
+    if match := _OR_DEFAULT.fullmatch(expression):
+        value = _evaluate(match.group(1), scope)
+        return value if _truthy(value) else match.group(2)
+    if match := _IF_NOT_NULL.fullmatch(expression):
+        value = scope.get(match.group(1), _UNDEFINED)
+        return _render(match.group(2), scope) if value not in (None, _UNDEFINED) else match.group(3)
+    if match := _FMT.fullmatch(expression):
+        return _fmt(_evaluate(match.group(1), scope))
+    if match := _DIVIDE.fullmatch(expression):
+        value = _evaluate(match.group(1), scope)
+        if value is _UNDEFINED:
+            return math.nan
+        return (value or 0) / float(match.group(2))
+    if match := _ISO_DATE.fullmatch(expression):
+        return str(scope.get(match.group(1)))[:10]
+    if match := _NAME.fullmatch(expression):
+        value = scope.get(match.group(1), _UNDEFINED)
+        if match.group(2) is not None:
+            value = value.get(match.group(2), _UNDEFINED) if isinstance(value, Mapping) else _UNDEFINED
+        return value
+    raise PromptTemplateError(f"unsupported template expression: {expression!r}")
+
+
+def _render(template: str, scope: Mapping[str, Any]) -> str:
+    parts = []
+    for is_expression, text in _split_template(template):
+        if is_expression:
+            parts.append(_js_string(_evaluate(text, scope)))
+        else:
+            parts.append(_ESCAPE.sub(lambda escaped: "\n" if escaped.group(1) == "n" else escaped.group(1), text))
+    return "".join(parts)
+
+
+def template_scope(context: Mapping[str, Any], history: Sequence[Mapping[str, Any]] | None = None) -> dict[str, Any]:
+    """Template variables of the Prompt Builder, rebuilt from its output."""
+    metrics = context.get("metrics") or {}
+    heart_rate = context.get("heartRate") or {}
+    zones = heart_rate.get("computedZones")
+    zone_summary = None
+    if isinstance(zones, Mapping) and zones:
+        zone_summary = ", ".join(
+            f"{key.upper()} {_js_string(zone['min'])}-{_js_string(zone['max'])}"
+            for key in ("z1", "z2", "z3", "z4", "z5")
+            if isinstance(zone := zones.get(key), Mapping) and zone.get("min") is not None and zone.get("max") is not None
+        )
+    return {
+        **metrics,
+        "phaseNote": metrics.get("phaseNote", PHASE_NOTES.get(metrics.get("phaseName"))),
+        "zoneSummary": zone_summary,
+        "history": list(context.get("history") or []) if history is None else list(history),
+    }
+
+
+def render_template(
+    template: str,
+    context: Mapping[str, Any],
+    history: Sequence[Mapping[str, Any]] | None = None,
+    compact: bool = False,
+) -> str:
+    """The Prompt Builder's ``prompt``; without ``compact`` it matches the node byte for byte."""
+    body = _render(template, template_scope(context, history))
+    if not compact:
+        return f"{PROMPT_BEGIN}\n{body}\n{PROMPT_END}"
+    lines = [line.rstrip() for line in body.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def strip_defaults(value: Any, float_digits: int | None = DEFAULT_FLOAT_DIGITS) -> Any:
+    """Drop nulls, empty strings and empty containers (recursively) and round floats."""
+    if isinstance(value, Mapping):
+        stripped = {key: strip_defaults(item, float_digits) for key, item in value.items()}
+        return {key: item for key, item in stripped.items() if item not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        stripped = [strip_defaults(item, float_digits) for item in value]
+        return [item for item in stripped if item not in (None, "", [], {})]
+    if isinstance(value, float) and float_digits is not None and math.isfinite(value):
+        rounded = round(value, float_digits)
+        return int(rounded) if rounded.is_integer() else rounded
+    return value
+
+
+def summarize_history(weeks: Sequence[Mapping[str, Any]], float_digits: int | None = DEFAULT_FLOAT_DIGITS) -> dict[str, Any] | None:
+    """One entry for ``weeks``: their count and range, and the mean of every numeric field."""
+    if not weeks:
+        return None
+    starts = [week.get("weekStart") for week in weeks if week.get("weekStart")]
+    summary: dict[str, Any] = {"weeks": len(weeks), "fromWeekStart": min(starts, default=None), "toWeekStart": max(starts, default=None)}
+    fields: dict[str, list[float]] = {}
+    for week in weeks:
+        for name, value in week.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                fields.setdefault(name, []).append(value)
+    for name, values in fields.items():
+        summary[name] = sum(values) / len(values)
+    return strip_defaults(summary, float_digits)
+
+
+def user_message(
+    context: Mapping[str, Any],
+    indent: int | None = 2,
+    older_weeks: Mapping[str, Any] | None = None,
+) -> str:
+    """The user message of ``Message a model`` (``JSON.stringify(value, null, 2)`` by default)."""
+    separators = None if indent is not None else (",", ":")
+    metrics = json.dumps(context.get("metrics"), indent=indent, separators=separators, ensure_ascii=False)
+    history = json.dumps(context.get("history"), indent=indent, separators=separators, ensure_ascii=False)
+    message = f"Datos de la ÚLTIMA SEMANA:\nMétricas: {metrics}\n\nHistorial (semanas anteriores): {history}"
+    if older_weeks:
+        summary = json.dumps(older_weeks, indent=indent, separators=separators, ensure_ascii=False)
+        message += f"\n\nResumen semanas más antiguas: {summary}"
+    return message
+
+
+@dataclass
+class PromptStats:
+    bytes_before: int
+    bytes_after: int
+    tokens_before: int
+    tokens_after: int
+    history_weeks: int
+    summarized_weeks: int
+    dropped_weeks: int
+    token_budget: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    @property
+    def over_budget(self) -> bool:
+        return self.tokens_after > self.token_budget
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "bytesBefore": self.bytes_before,
+            "bytesAfter": self.bytes_after,
+            "bytesSaved": self.bytes_saved,
+            "tokensBefore": self.tokens_before,
+            "tokensAfter": self.tokens_after,
+            "tokensSaved": self.tokens_saved,
+            "historyWeeks": self.history_weeks,
+            "summarizedWeeks": self.summarized_weeks,
+            "droppedWeeks": self.dropped_weeks,
+            "overBudget": self.over_budget,
+        }
+
+
+@dataclass
+class AssembledPrompt:
+    messages: list[dict[str, str]]
+    stats: PromptStats
+
+
+def _measure(messages: Sequence[Mapping[str, str]]) -> tuple[int, int]:
+    return (
+        sum(len(message["content"].encode("utf-8")) for message in messages),
+        sum(estimate_tokens(message["content"]) for message in messages),
+    )
+
+
+def assemble_prompt(
+    context: Mapping[str, Any],
+    template: str,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_history_weeks: int | None = None,
+    summarize: bool = True,
+    compact: bool = True,
+    float_digits: int | None = DEFAULT_FLOAT_DIGITS,
+) -> AssembledPrompt:
+    """System and user messages for one Prompt Builder output, with history cut to ``token_budget``.
+
+    The baseline for the stats is today's request for the same context: the
+    node's ``prompt`` (or the uncompacted template) and the indented payload.
+    """
+    baseline_system = context.get("prompt") or render_template(template, context)
+    baseline = [
+        {"role": "system", "content": str(baseline_system)},
+        {"role": "user", "content": user_message(context)},
+    ]
+    bytes_before, tokens_before = _measure(baseline)
+
+    weeks = sorted(context.get("history") or [], key=lambda week: str(week.get("weekStart") or ""), reverse=True)
+    limit = len(weeks) if max_history_weeks is None else min(len(weeks), max_history_weeks)
+    clean = strip_defaults if compact else (lambda value, _digits: value)
+    metrics = clean(context.get("metrics"), float_digits)
+
+    def build(kept: int, with_summary: bool) -> tuple[list[dict[str, str]], int]:
+        history = weeks[:kept]
+        older = summarize_history(weeks[kept:], float_digits) if with_summary else None
+        payload = {"metrics": metrics, "history": clean(history, float_digits)}
+        messages = [
+            {"role": "system", "content": render_template(template, context, history, compact)},
+            {"role": "user", "content": user_message(payload, None if compact else 2, older)},
+        ]
+        return messages, _measure(messages)[1]
+
+    # Adding a week and removing it from the summary only grows the request, so search for the largest fit.
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if build(middle, summarize and middle < len(weeks))[1] <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    with_summary = summarize and low < len(weeks)
+    messages, tokens = build(low, with_summary)
+    if with_summary and tokens > token_budget:
+        with_summary = False
+        messages, tokens = build(low, False)
+
+    bytes_after, tokens_after = _measure(messages)
+    rest = len(weeks) - low
+    stats = PromptStats(
+        bytes_before=bytes_before,
+        bytes_after=bytes_after,
+        tokens_before=tokens_before,
+        tokens_after=tokens_after,
+        history_weeks=low,
+        summarized_weeks=rest if with_summary else 0,
+        dropped_weeks=0 if with_summary else rest,
+        token_budget=token_budget,
+    )
+    return AssembledPrompt(messages, stats)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report prompt bytes and tokens saved by budgeted assembly.")
+    parser.add_argument("--contexts", type=Path, required=True, help="JSONL of Prompt Builder outputs.")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    parser.add_argument("--max-history-weeks", type=int)
+    parser.add_argument("--no-summary", action="store_true", help="Drop weeks that do not fit instead of summarizing them.")
+    args = parser.parse_args()
+
+    template = load_template()
+    totals = {"runs": 0, "bytesBefore": 0, "bytesAfter": 0, "tokensBefore": 0, "tokensAfter": 0, "overBudget": 0}
+    with args.contexts.open(encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            context = json.loads(line)
+            stats = assemble_prompt(
+                context, template, args.token_budget, args.max_history_weeks, summarize=not args.no_summary
+            ).stats.as_dict()
+            print(json.dumps({"runId": context.get("runId"), **stats}))
+            totals["runs"] += 1
+            totals["overBudget"] += stats["overBudget"]
+            for name in ("bytesBefore", "bytesAfter", "tokensBefore", "tokensAfter"):
+                totals[name] += stats[name]
+    print(json.dumps(totals), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
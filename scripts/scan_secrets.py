@@ -3,14 +3,31 @@
 
 from __future__ import annotations
 
+import argparse
+import hashlib
+import mmap
 import re
 import subprocess
 import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, NamedTuple
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.disk_cache import CACHE_ROOT, DiskCache  # noqa: E402
+
+DEFAULT_CACHE_PATH = CACHE_ROOT / "scan_secrets.sqlite"
+
+# Bump when scan_file logic changes; pattern edits are picked up automatically
+# through rules_fingerprint().
+SCAN_RULES_VERSION = "2"
+
+# Files with a NUL byte in their first block are treated as binary and skipped.
+BINARY_SNIFF_BYTES = 8192
 
 # Binary-ish or non-source files we do not need to scan.
 SKIP_SUFFIXES = {
@@ -45,6 +62,16 @@ GENERIC_ASSIGNMENT = re.compile(
     r"['\"]([A-Za-z0-9._/+~-]{16,})['\"]"
 )
 
+# GENERIC_ASSIGNMENT without the leading identifier part: it matches on the same
+# line wherever GENERIC_ASSIGNMENT does, but starts at the keyword, which keeps
+# the whole-file search fast. Keep the two in sync.
+GENERIC_ASSIGNMENT_PREFILTER = re.compile(
+    r"(?ix)"
+    r"(?:SECRET|TOKEN|PASSWORD|API[_-]?KEY|PRIVATE[_-]?KEY)[A-Z0-9_]*\b"
+    r"\s*[:=]\s*"
+    r"['\"][A-Za-z0-9._/+~-]{16,}['\"]"
+)
+
 SAFE_VALUE_MARKERS = {
     "example",
     "placeholder",
@@ -56,13 +83,40 @@ SAFE_VALUE_MARKERS = {
 }
 
 
+class TrackedFile(NamedTuple):
+    path: Path
+    # Index blob SHA, or None when the working tree copy differs from the index.
+    blob: str | None
+
+
 def tracked_files() -> Iterable[Path]:
-    output = subprocess.check_output(["git", "ls-files"], cwd=REPO_ROOT, text=True)
-    for raw in output.splitlines():
-        path = REPO_ROOT / raw
-        if path.suffix.lower() in SKIP_SUFFIXES:
-            continue
-        yield path
+    for tracked in tracked_blobs():
+        yield tracked.path
+
+
+def tracked_blobs() -> list[TrackedFile]:
+    """Tracked files with their index blob SHA (``git ls-files -s``).
+
+    Files modified in the working tree (``git ls-files -m``) or with unmerged
+    entries get ``blob=None`` so their on-disk content is always scanned.
+    """
+    staged = subprocess.check_output(["git", "ls-files", "-s", "-z"], cwd=REPO_ROOT, text=True)
+    modified = subprocess.check_output(["git", "ls-files", "-m", "-z"], cwd=REPO_ROOT, text=True)
+    dirty = set(filter(None, modified.split("\0")))
+
+    blobs: dict[str, str | None] = {}
+    for entry in filter(None, staged.split("\0")):
+        meta, raw = entry.split("\t", 1)
+        _mode, sha, stage = meta.split()
+        if raw in blobs or stage != "0" or raw in dirty:
+            blobs[raw] = None
+        else:
+            blobs[raw] = sha
+    return [
+        TrackedFile(REPO_ROOT / raw, blob)
+        for raw, blob in blobs.items()
+        if Path(raw).suffix.lower() not in SKIP_SUFFIXES
+    ]
 
 
 def should_skip_value(value: str) -> bool:
@@ -76,37 +130,404 @@ def should_skip_value(value: str) -> bool:
     return False
 
 
-def scan_file(path: Path) -> list[tuple[int, str, str]]:
+def _scan_line(index: int, line: str) -> list[tuple[int, str, str]]:
+    findings: list[tuple[int, str, str]] = []
+    stripped = line.strip()
+    if not stripped or stripped.startswith("#"):
+        return findings
+
+    for label, pattern in TOKEN_PATTERNS:
+        if pattern.search(line):
+            findings.append((index, label, stripped[:200]))
+
+    generic_match = GENERIC_ASSIGNMENT.search(line)
+    if generic_match:
+        value = generic_match.group(2)
+        if not should_skip_value(value):
+            findings.append((index, "generic_secret_assignment", stripped[:200]))
+    return findings
+
+
+def scan_file_by_lines(path: Path) -> list[tuple[int, str, str]]:
+    """Reference scanner: decode the whole file and check every line."""
     findings: list[tuple[int, str, str]] = []
     text = path.read_text(encoding="utf-8", errors="ignore")
-    lines = text.splitlines()
+    for index, line in enumerate(text.splitlines(), start=1):
+        findings.extend(_scan_line(index, line))
+    return findings
+
+
+# Line boundaries as str.splitlines() sees them; "\r\n" counts once.
+_STR_LINE_BREAKS = ("\n", "\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+_STR_LINE_BREAK = re.compile("\r\n|[" + re.escape("".join(_STR_LINE_BREAKS)) + "]")
+_BYTES_LINE_BREAKS = tuple(char.encode("ascii") for char in _STR_LINE_BREAKS if char.isascii())
+_BYTES_LINE_BREAK = re.compile(b"\r\n|[" + re.escape(b"".join(_BYTES_LINE_BREAKS)) + b"]")
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+
+def _scoped_source(pattern: re.Pattern) -> str:
+    """Pattern source wrapped so its flags only apply inside the group."""
+    source = re.sub(r"^\(\?[a-zA-Z]+\)", "", pattern.pattern)
+    flags = "".join(letter for flag, letter in ((re.IGNORECASE, "i"), (re.VERBOSE, "x")) if pattern.flags & flag)
+    return f"(?{flags}:{source})" if flags else f"(?:{source})"
+
 
-    for index, line in enumerate(lines, start=1):
-        stripped = line.strip()
-        if not stripped or stripped.startswith("#"):
+def _ascii_whitespace(source: str) -> str:
+    # str patterns treat \x1c-\x1f as whitespace, bytes patterns do not; widen
+    # \s so the bytes prefilter never misses what a line-level search finds.
+    out: list[str] = []
+    in_class = False
+    index = 0
+    while index < len(source):
+        char = source[index]
+        if char == "\\" and index + 1 < len(source):
+            token = source[index : index + 2]
+            index += 2
+            if token == "\\s":
+                out.append("\\s\\x1c-\\x1f" if in_class else "[\\s\\x1c-\\x1f]")
+            else:
+                out.append(token)
             continue
+        if char == "[" and not in_class:
+            in_class = True
+        elif char == "]" and in_class:
+            in_class = False
+        out.append(char)
+        index += 1
+    return "".join(out)
 
-        for label, pattern in TOKEN_PATTERNS:
-            if pattern.search(line):
-                findings.append((index, label, stripped[:200]))
 
-        generic_match = GENERIC_ASSIGNMENT.search(line)
-        if generic_match:
-            value = generic_match.group(2)
-            if not should_skip_value(value):
-                findings.append((index, "generic_secret_assignment", stripped[:200]))
+# Token rules as one alternation. Labels come from the exact per-line check, so
+# the alternatives are plain groups: named groups disable the regex engine's
+# first-character scan and make the search several times slower. The generic
+# assignment rule is searched separately for the same reason.
+COMBINED_TOKEN_SOURCE = "|".join(_scoped_source(pattern) for _, pattern in TOKEN_PATTERNS)
+PREFILTERS = (re.compile(COMBINED_TOKEN_SOURCE), GENERIC_ASSIGNMENT_PREFILTER)
+BYTES_PREFILTERS = tuple(
+    re.compile(_ascii_whitespace(pattern.pattern).encode("ascii"), pattern.flags & ~re.UNICODE)
+    for pattern in PREFILTERS
+)
+
+
+def _scan_buffer(buffer, prefilters: tuple, line_break: re.Pattern, breaks: tuple, decode) -> list[tuple[int, str, str]]:
+    """Check only the lines where a prefilter matches, in line order.
 
+    Every rule match is also a prefilter match starting on the same line, and
+    searching resumes at the start of the line after each hit, so no line with
+    a finding is skipped. Hit lines go through ``_scan_line`` unchanged.
+    """
+    findings: list[tuple[int, str, str]] = []
+    size = len(buffer)
+    position = 0
+    counted_to = 0
+    line_number = 1
+    next_hits = [-1] * len(prefilters)
+    while position < size:
+        for index, prefilter in enumerate(prefilters):
+            if next_hits[index] is not None and next_hits[index] < position:
+                match = prefilter.search(buffer, position)
+                next_hits[index] = match.start() if match else None
+        pending = [hit for hit in next_hits if hit is not None]
+        if not pending:
+            break
+        hit = min(pending)
+        line_start = max(buffer.rfind(char, position, hit) for char in breaks) + 1
+        line_start = max(line_start, position)
+        line_number += len(line_break.findall(buffer, counted_to, line_start))
+        counted_to = line_start
+        line_end = line_break.search(buffer, hit)
+        end, position = (line_end.start(), line_end.end()) if line_end else (size, size)
+        findings.extend(_scan_line(line_number, decode(buffer[line_start:end])))
     return findings
 
 
-def main() -> int:
+def scan_file(path: Path) -> list[tuple[int, str, str]]:
+    """Scan one file with the combined prefilter; same findings as ``scan_file_by_lines``.
+
+    ASCII files are searched in place through ``mmap``; other text is decoded
+    first. Files that look binary (NUL in the first block) are skipped.
+    """
+    with path.open("rb") as handle:
+        if path.stat().st_size == 0:
+            return []
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if b"\0" in buffer[:BINARY_SNIFF_BYTES]:
+                return []
+            if _NON_ASCII.search(buffer) is None:
+                return _scan_buffer(
+                    buffer,
+                    BYTES_PREFILTERS,
+                    _BYTES_LINE_BREAK,
+                    _BYTES_LINE_BREAKS,
+                    lambda chunk: chunk.decode("ascii"),
+                )
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    return _scan_buffer(text, PREFILTERS, _STR_LINE_BREAK, _STR_LINE_BREAKS, lambda chunk: chunk)
+
+
+def rules_fingerprint() -> str:
+    """Digest of everything that decides findings; part of every cache key."""
+    parts = [SCAN_RULES_VERSION, GENERIC_ASSIGNMENT.pattern, GENERIC_ASSIGNMENT_PREFILTER.pattern]
+    parts.extend(sorted(SAFE_VALUE_MARKERS))
+    parts.extend(f"{label}={pattern.pattern}" for label, pattern in TOKEN_PATTERNS)
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _make_executor(pool: str, workers: int) -> Executor | None:
+    if workers <= 1:
+        return None
+    if pool == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def scan_tracked(
+    files: list[TrackedFile],
+    workers: int = 1,
+    pool: str = "process",
+    cache: DiskCache | None = None,
+    stats: dict[str, int] | None = None,
+) -> list[tuple[Path, int, str, str]]:
+    """Scan ``files`` in order, skipping blobs whose findings are cached.
+
+    Cache entries are keyed by blob SHA plus ``rules_fingerprint()``; files
+    without a blob SHA (locally modified) are always scanned and never cached.
+    """
+    stats = stats if stats is not None else {}
+    fingerprint = rules_fingerprint()
+    keys = [f"{fingerprint}:{item.blob}" if item.blob else None for item in files]
+    cached = cache.get_many(key for key in keys if key) if cache is not None else {}
+
+    pending = [item.path for item, key in zip(files, keys) if key not in cached]
+    stats["cacheHits"] = len(files) - len(pending)
+    stats["scanned"] = len(pending)
+    executor = _make_executor(pool, workers)
+    try:
+        if executor is None:
+            scanned = [scan_file(path) for path in pending]
+        else:
+            chunksize = max(1, len(pending) // (workers * 4))
+            scanned = list(executor.map(scan_file, pending, chunksize=chunksize))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    fresh = iter(scanned)
+    new_entries: dict[str, list] = {}
     all_findings: list[tuple[Path, int, str, str]] = []
-    for file_path in tracked_files():
-        for line, label, snippet in scan_file(file_path):
-            all_findings.append((file_path, line, label, snippet))
+    for item, key in zip(files, keys):
+        if key in cached:
+            findings = [tuple(finding) for finding in cached[key]]
+        else:
+            findings = next(fresh)
+            if key:
+                new_entries[key] = findings
+        for line, label, snippet in findings:
+            all_findings.append((item.path, line, label, snippet))
+    if cache is not None:
+        cache.set_many(new_entries)
+    return all_findings
+
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_GIT_PATH_ESCAPES = {"a": "\a", "b": "\b", "t": "\t", "n": "\n", "v": "\v", "f": "\f", "r": "\r", '"': '"', "\\": "\\"}
+
+
+def _unquote_git_path(raw: str) -> str:
+    """Undo git's C-style quoting of unusual path names ("a\\tb", octal bytes)."""
+    if not (raw.startswith('"') and raw.endswith('"')):
+        return raw
+    body = raw[1:-1]
+    out = bytearray()
+    index = 0
+    while index < len(body):
+        char = body[index]
+        if char == "\\" and index + 1 < len(body):
+            nxt = body[index + 1]
+            if nxt in "01234567":
+                out.append(int(body[index + 1 : index + 4], 8))
+                index += 4
+                continue
+            out += _GIT_PATH_ESCAPES.get(nxt, nxt).encode("utf-8")
+            index += 2
+            continue
+        out += char.encode("utf-8")
+        index += 1
+    return out.decode("utf-8", errors="surrogateescape")
+
+
+def iter_added_lines(diff_lines: Iterable[str]) -> Iterator[tuple[str, int, str]]:
+    """Yield ``(path, line, text)`` for every added line of a ``git diff -U0`` stream.
+
+    ``line`` is the 1-based line number in the new file as git counts lines
+    (split on ``\\n`` only). Hunk line counts decide where content ends, so
+    added lines that look like diff headers are not misread.
+    """
+    path: str | None = None
+    new_line = 0
+    remaining_old = remaining_new = 0
+    for raw in diff_lines:
+        line = raw[:-1] if raw.endswith("\n") else raw
+        if remaining_old or remaining_new:
+            if line.startswith("+"):
+                if path is not None:
+                    yield path, new_line, line[1:]
+                new_line += 1
+                remaining_new -= 1
+            elif line.startswith("-"):
+                remaining_old -= 1
+            continue
+        if line.startswith("+++ "):
+            target = line[4:]
+            # git ends unquoted names that contain a space with a TAB.
+            if target.endswith("\t"):
+                target = target[:-1]
+            target = _unquote_git_path(target)
+            path = None if target == "/dev/null" else target[2:] if target.startswith("b/") else target
+            continue
+        hunk = _HUNK_HEADER.match(line)
+        if hunk:
+            old_count, start, new_count = hunk.groups()
+            remaining_old = int(old_count) if old_count is not None else 1
+            remaining_new = int(new_count) if new_count is not None else 1
+            new_line = int(start)
+
+
+def diff_command(since: str | None = None, staged: bool = False) -> list[str]:
+    command = [
+        "git",
+        "-c",
+        "core.quotePath=false",
+        "diff",
+        "--no-color",
+        "--no-ext-diff",
+        "--no-textconv",
+        "--unified=0",
+        "--src-prefix=a/",
+        "--dst-prefix=b/",
+    ]
+    if staged:
+        command.append("--cached")
+    if since:
+        command.append(since)
+    return command
+
+
+def resolves_to_commit(ref: str) -> bool:
+    result = subprocess.run(
+        ["git", "rev-parse", "--verify", "--quiet", "--end-of-options", f"{ref}^{{commit}}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+    )
+    return result.returncode == 0
+
+
+def _new_file_text(path: str, staged: bool) -> str:
+    if staged:
+        data = subprocess.check_output(["git", "show", f":{path}"], cwd=REPO_ROOT)
+    else:
+        data = (REPO_ROOT / path).read_bytes()
+    return data.decode("utf-8", errors="ignore")
+
+
+def _splitlines_numbers(text: str) -> list[int]:
+    """For each git line (1-based index), the ``str.splitlines`` number of its first segment."""
+    numbers = [0]
+    count = 0
+    for git_line in text.split("\n"):
+        numbers.append(count + 1)
+        count += len((git_line + "\n").splitlines())
+    return numbers
+
+
+def scan_diff(
+    since: str | None = None,
+    staged: bool = False,
+    stats: dict[str, int] | None = None,
+) -> list[tuple[Path, int, str, str]]:
+    """Scan only the lines added in ``git diff`` (``--cached`` when ``staged``, against ``since``).
+
+    Diff output is streamed and only added lines are checked. Files are read
+    only when they have findings, to translate git line numbers into the
+    ``str.splitlines`` numbers a full ``scan_file`` reports (they differ when a
+    file contains separators such as form feed or U+2028).
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("addedLines", 0)
+    raw_findings: list[tuple[str, int, int, str, str]] = []
+    process = subprocess.Popen(diff_command(since, staged), cwd=REPO_ROOT, stdout=subprocess.PIPE)
+    assert process.stdout is not None
+    decoded = (raw.decode("utf-8", errors="ignore") for raw in process.stdout)
+    for path, git_line, text in iter_added_lines(decoded):
+        if Path(path).suffix.lower() in SKIP_SUFFIXES:
+            continue
+        stats["addedLines"] += 1
+        # A git line may hold several splitlines() lines; scan each like scan_file does.
+        for segment, part in enumerate(text.splitlines()):
+            for _, label, snippet in _scan_line(git_line, part):
+                raw_findings.append((path, git_line, segment, label, snippet))
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+
+    numbering: dict[str, list[int]] = {}
+    findings: list[tuple[Path, int, str, str]] = []
+    for path, git_line, segment, label, snippet in raw_findings:
+        if path not in numbering:
+            numbering[path] = _splitlines_numbers(_new_file_text(path, staged))
+        findings.append((REPO_ROOT / path, numbering[path][git_line] + segment, label, snippet))
+    return findings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=1, help="Scan files in parallel with this many workers.")
+    parser.add_argument(
+        "--pool",
+        choices=["process", "thread"],
+        default="process",
+        help="Worker pool type used with --workers > 1 (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(DEFAULT_CACHE_PATH),
+        help="Findings cache keyed by git blob SHA; unchanged blobs are not rescanned (default: %(default)s).",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Scan every tracked file from scratch.")
+    diff_mode = parser.add_mutually_exclusive_group()
+    diff_mode.add_argument(
+        "--since",
+        metavar="REF",
+        help="Only scan lines added since REF (git diff REF, including uncommitted changes).",
+    )
+    diff_mode.add_argument("--staged", action="store_true", help="Only scan lines added in the index (pre-commit).")
+    args = parser.parse_args()
+
+    if args.since or args.staged:
+        if args.since and not resolves_to_commit(args.since):
+            print(f"error: --since {args.since!r} is not a known commit or ref", file=sys.stderr)
+            return 2
+        stats: dict[str, int] = {}
+        try:
+            all_findings = scan_diff(since=args.since, staged=args.staged, stats=stats)
+        except subprocess.CalledProcessError as exc:
+            print(f"error: git diff failed with exit code {exc.returncode}", file=sys.stderr)
+            return 2
+        print(f"Diff scan: {stats['addedLines']} added lines checked", file=sys.stderr)
+        scope = "staged changes" if args.staged else f"changes since {args.since}"
+    else:
+        cache = None if args.no_cache else DiskCache(Path(args.cache))
+        stats = {}
+        try:
+            all_findings = scan_tracked(tracked_blobs(), workers=args.workers, pool=args.pool, cache=cache, stats=stats)
+        finally:
+            if cache is not None:
+                cache.close()
+        if cache is not None:
+            print(f"Secret scan cache: {stats['cacheHits']} hits, {stats['scanned']} scanned", file=sys.stderr)
+        scope = "tracked files"
 
     if not all_findings:
-        print("✅ No obvious hardcoded secrets found in tracked files.")
+        print(f"✅ No obvious hardcoded secrets found in {scope}.")
         return 0
 
     print("❌ Potential secrets found. Review these lines:")
@@ -0,0 +1,305 @@
+"""Columnar ``weekly_metrics`` rollup: the ``Shape Weekly Metrics`` node for any number of weeks.
+
+Activities and wellness entries are loaded once into NumPy columns. Each row
+gets a week index from a sorted array of week start instants, and every metric
+is one ``bincount`` over that index, so a backfill over years of history is a
+single pass instead of one filter per metric per week. ``bincount`` adds the
+weights in row order, like the node's ``reduce``, so sums and means are
+bit-identical to the node's.
+
+Week semantics follow the node running with ``TZ`` set (``Europe/Madrid`` in
+production):
+
+- a week runs from Monday 00:00 to Sunday 23:59:59.999 local time;
+- ``weekStart``/``weekEnd`` are the UTC dates of those two instants
+  (``toISOString().slice(0, 10)``), so in Madrid ``weekStart`` is the Sunday;
+- ``start_date`` and wellness ``id`` are parsed like ``new Date(...)``: a bare
+  ``YYYY-MM-DD`` is UTC midnight, a date-time without offset is local time;
+- missing, zero and NaN values count as 0 (``x || 0``).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Iterable, Mapping, Sequence
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+
+DEFAULT_TIMEZONE = "Europe/Madrid"
+WEEKLY_METRICS_COLLECTION = "weekly_metrics"
+
+# Session keywords in run names. ASCII-only case folding, like a JS /i regex
+# without the u flag (Python would otherwise match "ſ" for "s").
+VO2_PATTERN = re.compile(r"vo2", re.IGNORECASE | re.ASCII)
+TEMPO_PATTERN = re.compile(r"tempo|threshold|umbral", re.IGNORECASE | re.ASCII)
+LONG_PATTERN = re.compile(r"long", re.IGNORECASE | re.ASCII)
+
+# Output field -> wellness field averaged into it.
+WELLNESS_MEANS = {
+    "ctlMean": "ctl",
+    "atlMean": "atl",
+    "rampRateMean": "rampRate",
+    "restHrMean": "restingHR",
+    "stepsMean": "steps",
+    "sleepScoreMean": "sleepScore",
+    "hrvMean": "hrv",
+}
+
+_DATE_ONLY = re.compile(r"\d{4}-\d{2}-\d{2}")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class WeekWindow:
+    monday: date
+    start_ms: int
+    end_ms: int
+    week_start: str
+    week_end: str
+
+
+@dataclass(frozen=True)
+class ActivityColumns:
+    """One row per Intervals.icu activity; ``start_ms`` is NaN when the date does not parse."""
+
+    start_ms: np.ndarray
+    distance: np.ndarray
+    elapsed_time: np.ndarray
+    trimp: np.ndarray
+    is_run: np.ndarray
+    is_ride: np.ndarray
+    is_strength: np.ndarray
+    is_vo2: np.ndarray
+    is_tempo: np.ndarray
+    is_long: np.ndarray
+    athlete_id: Any = None
+
+    @classmethod
+    def from_records(cls, activities: Sequence[Mapping[str, Any]], tz: str | ZoneInfo = DEFAULT_TIMEZONE) -> ActivityColumns:
+        zone = _zone(tz)
+        types = [activity.get("type") for activity in activities]
+        names = [_js_string(activity.get("name")) for activity in activities]
+        return cls(
+            start_ms=np.array([js_date_ms(activity.get("start_date"), zone) for activity in activities], dtype=np.float64),
+            distance=_number_column(activities, "distance"),
+            elapsed_time=_number_column(activities, "elapsed_time"),
+            trimp=_number_column(activities, "trimp"),
+            is_run=np.array([kind == "Run" for kind in types], dtype=bool),
+            is_ride=np.array([isinstance(kind, str) and "Ride" in kind for kind in types], dtype=bool),
+            is_strength=np.array([kind == "WeightTraining" for kind in types], dtype=bool),
+            is_vo2=np.array([bool(VO2_PATTERN.search(name)) for name in names], dtype=bool),
+            is_tempo=np.array([bool(TEMPO_PATTERN.search(name)) for name in names], dtype=bool),
+            is_long=np.array([bool(LONG_PATTERN.search(name)) for name in names], dtype=bool),
+            # The node takes the athlete from the first activity, in or out of the week.
+            athlete_id=activities[0].get("icu_athlete_id") if activities else None,
+        )
+
+
+@dataclass(frozen=True)
+class WellnessColumns:
+    """One row per wellness entry; ``values`` maps each ``WELLNESS_MEANS`` source field to a column."""
+
+    day_ms: np.ndarray
+    values: dict[str, np.ndarray]
+
+    @classmethod
+    def from_records(cls, wellness: Sequence[Mapping[str, Any]], tz: str | ZoneInfo = DEFAULT_TIMEZONE) -> WellnessColumns:
+        zone = _zone(tz)
+        return cls(
+            day_ms=np.array([js_date_ms(entry.get("id"), zone) for entry in wellness], dtype=np.float64),
+            values={field: _number_column(wellness, field) for field in WELLNESS_MEANS.values()},
+        )
+
+
+def _zone(tz: str | ZoneInfo) -> ZoneInfo:
+    return tz if isinstance(tz, ZoneInfo) else ZoneInfo(tz)
+
+
+def _js_string(value: Any) -> str:
+    """``String(value)`` for the keyword regexes; ``null``/``undefined`` match none of them."""
+    return "" if value is None else str(value)
+
+
+def _or_zero(value: Any) -> float:
+    """``value || 0`` for numeric fields; non-numeric values count as 0."""
+    if isinstance(value, (int, float)):
+        # bool is an int here, as true || 0 is 1 in a sum; NaN != NaN.
+        return float(value) if value == value else 0.0
+    return 0.0
+
+
+def _number_column(rows: Sequence[Mapping[str, Any]], field: str) -> np.ndarray:
+    return np.array([_or_zero(row.get(field)) for row in rows], dtype=np.float64)
+
+
+def _to_ms(moment: datetime) -> int:
+    delta = moment - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1000 + delta.microseconds // 1000
+
+
+def js_date_ms(value: Any, tz: ZoneInfo) -> float:
+    """Epoch milliseconds of ``new Date(value)``, or NaN for values the rollup cannot place."""
+    if isinstance(value, bool) or value is None:
+        # new Date(null) is the epoch; treating it as invalid keeps backfills from reaching 1970.
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return math.nan
+    text = value.strip()
+    try:
+        if _DATE_ONLY.fullmatch(text):
+            return float(_to_ms(datetime.fromisoformat(text).replace(tzinfo=timezone.utc)))
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return math.nan
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=tz)
+    return float(_to_ms(moment))
+
+
+def _utc_date(ms: int) -> str:
+    return (_EPOCH + timedelta(milliseconds=ms)).date().isoformat()
+
+
+def monday_of(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def current_monday(now: datetime, tz: str | ZoneInfo = DEFAULT_TIMEZONE) -> date:
+    """Local Monday of the week containing ``now`` (naive ``now`` is taken as UTC)."""
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    return monday_of(now.astimezone(_zone(tz)).date())
+
+
+def week_window(monday: date, tz: str | ZoneInfo = DEFAULT_TIMEZONE) -> WeekWindow:
+    zone = _zone(tz)
+    start_ms = _to_ms(datetime.combine(monday, time(0, 0), tzinfo=zone))
+    end_ms = _to_ms(datetime.combine(monday + timedelta(days=6), time(23, 59, 59, 999_000), tzinfo=zone))
+    return WeekWindow(monday, start_ms, end_ms, _utc_date(start_ms), _utc_date(end_ms))
+
+
+def _weeks_spanning(instants: Iterable[np.ndarray], zone: ZoneInfo) -> list[date]:
+    valid = [column[~np.isnan(column)] for column in instants]
+    valid = [column for column in valid if column.size]
+    if not valid:
+        return []
+    first, last = (
+        monday_of((_EPOCH + timedelta(milliseconds=int(bound))).astimezone(zone).date())
+        for bound in (min(column.min() for column in valid), max(column.max() for column in valid))
+    )
+    return [first + timedelta(weeks=offset) for offset in range((last - first).days // 7 + 1)]
+
+
+def _week_index(instants: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Week position of each instant, or -1 when it falls in none of the windows."""
+    position = np.searchsorted(starts, instants, side="right") - 1
+    inside = (position >= 0) & (instants <= ends[np.clip(position, 0, None)])
+    return np.where(inside, position, -1)
+
+
+def _js_number(value: float) -> int | float:
+    """JS numbers have no int/float split; integral values serialize (and land in Mongo) as integers."""
+    return int(value) if math.isfinite(value) and value.is_integer() else value
+
+
+def _iso_timestamp(moment: datetime) -> str:
+    """``Date.prototype.toISOString`` for ``moment``."""
+    moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def rollup_weekly_metrics(
+    activities: ActivityColumns | Sequence[Mapping[str, Any]],
+    wellness: WellnessColumns | Sequence[Mapping[str, Any]],
+    *,
+    weeks: Iterable[date] | None = None,
+    tz: str | ZoneInfo = DEFAULT_TIMEZONE,
+    now: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """``weekly_metrics`` documents for ``weeks`` (any date in each week), sorted by ``weekStart``.
+
+    Without ``weeks`` every week from the earliest to the latest activity or
+    wellness entry is rolled up, empty weeks included. ``now`` sets
+    ``createdAt``/``updatedAt`` (default: the current time).
+    """
+    zone = _zone(tz)
+    if not isinstance(activities, ActivityColumns):
+        activities = ActivityColumns.from_records(activities, zone)
+    if not isinstance(wellness, WellnessColumns):
+        wellness = WellnessColumns.from_records(wellness, zone)
+    if weeks is None:
+        mondays = _weeks_spanning((activities.start_ms, wellness.day_ms), zone)
+    else:
+        mondays = sorted({monday_of(day) for day in weeks})
+    if not mondays:
+        return []
+
+    windows = [week_window(monday, zone) for monday in mondays]
+    starts = np.array([window.start_ms for window in windows], dtype=np.float64)
+    ends = np.array([window.end_ms for window in windows], dtype=np.float64)
+    size = len(windows)
+
+    activity_week = _week_index(activities.start_ms, starts, ends)
+    in_week = activity_week >= 0
+    runs, rides, strength = (in_week & mask for mask in (activities.is_run, activities.is_ride, activities.is_strength))
+
+    def count(mask: np.ndarray, week: np.ndarray = activity_week) -> np.ndarray:
+        return np.bincount(week[mask], minlength=size)
+
+    def total(mask: np.ndarray, column: np.ndarray, week: np.ndarray = activity_week) -> np.ndarray:
+        return np.bincount(week[mask], weights=column[mask], minlength=size)
+
+    columns = {
+        "runCount": count(runs),
+        "runDistance": total(runs, activities.distance),
+        "runTime": total(runs, activities.elapsed_time),
+        "rideCount": count(rides),
+        "rideDistance": total(rides, activities.distance),
+        "rideTime": total(rides, activities.elapsed_time),
+        "rideTrimp": total(rides, activities.trimp),
+        "vo2Sessions": count(runs & activities.is_vo2),
+        "tempoSessions": count(runs & activities.is_tempo),
+        "longRuns": count(runs & activities.is_long),
+        "strengthCount": count(strength),
+        "strengthTrimp": total(strength, activities.trimp),
+    }
+
+    wellness_week = _week_index(wellness.day_ms, starts, ends)
+    in_wellness_week = wellness_week >= 0
+    days = count(in_wellness_week, wellness_week)
+    for name, field in WELLNESS_MEANS.items():
+        sums = total(in_wellness_week, wellness.values[field], wellness_week)
+        columns[name] = np.divide(sums, days, out=np.zeros(size), where=days > 0)
+
+    timestamp = _iso_timestamp(now or datetime.now(timezone.utc))
+    documents = []
+    for position, window in enumerate(windows):
+        document: dict[str, Any] = {
+            "athleteId": activities.athlete_id,
+            "weekStart": window.week_start,
+            "weekEnd": window.week_end,
+        }
+        for name, values in columns.items():
+            document[name] = _js_number(float(values[position]))
+        document["createdAt"] = timestamp
+        document["updatedAt"] = timestamp
+        documents.append(document)
+    return documents
+
+
+def shape_weekly_metrics(
+    activities: Sequence[Mapping[str, Any]],
+    wellness: Sequence[Mapping[str, Any]],
+    now: datetime | None = None,
+    tz: str | ZoneInfo = DEFAULT_TIMEZONE,
+) -> dict[str, Any]:
+    """The ``Shape Weekly Metrics`` node: the document for the week containing ``now``."""
+    now = now or datetime.now(timezone.utc)
+    return rollup_weekly_metrics(activities, wellness, weeks=[current_monday(now, tz)], tz=tz, now=now)[0]
@@ -0,0 +1,269 @@
+"""Incremental ``weekly_metrics`` maintenance per (athleteId, weekStart).
+
+``WeeklyMetricsAggregator`` keeps, for every athlete week, the resulting
+document and, for open weeks, the activity and wellness rows applied so far.
+``apply`` takes a fetch (typically everything since ``fetch_oldest``), skips
+rows whose id was already applied with the same content, and recomputes only
+the weeks that gained, lost or changed a row. Only those documents are
+returned for upserting.
+
+A changed week is re-derived from its stored rows in start-date order with
+``rollup_weekly_metrics`` rather than by adding and subtracting deltas, so the
+documents are identical to a full recomputation over all rows; subtracting an
+edited activity from a float running sum would not be exact.
+
+A week closes once it ended more than ``retain`` before the newest applied
+activity (well past the ``fetch_oldest`` overlap). Its rows are dropped, so the
+state holds a few weeks of rows however long the history grows; its document
+is kept. Rows that later arrive for a closed week are counted in
+``ApplyStats.closed`` and otherwise ignored: rebuild those weeks with a full
+``rollup_weekly_metrics`` run.
+
+Deleted Intervals.icu activities are not visible in an incremental fetch and
+stay applied until ``forget`` is called with their ids.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Hashable, Iterable, Mapping
+from zoneinfo import ZoneInfo
+
+from scripts.weekly_metrics import (
+    DEFAULT_TIMEZONE,
+    WELLNESS_MEANS,
+    ActivityColumns,
+    current_monday,
+    js_date_ms,
+    monday_of,
+    rollup_weekly_metrics,
+)
+
+
+# Activity and wellness fields the rollup reads; a row counts as changed when any of them does.
+ACTIVITY_FIELDS = ("id", "icu_athlete_id", "start_date", "type", "name", "distance", "elapsed_time", "trimp")
+WELLNESS_FIELDS = ("id", *WELLNESS_MEANS.values())
+STATE_VERSION = 2
+DEFAULT_RETAIN = timedelta(weeks=2)
+
+BulkOp = dict[str, Any]
+
+
+@dataclass
+class ApplyStats:
+    seen: int = 0
+    unchanged: int = 0
+    applied: int = 0
+    skipped: int = 0
+    # Rows for weeks whose rows were already dropped; not applied.
+    closed: int = 0
+    weeks: int = 0
+
+
+@dataclass
+class _AthleteState:
+    activities: dict[Hashable, dict[str, Any]] = field(default_factory=dict)
+    wellness: dict[Hashable, dict[str, Any]] = field(default_factory=dict)
+    # Row id -> (Monday of its week, instant in ms); weeks are None for rows the rollup cannot place.
+    activity_week: dict[Hashable, tuple[date | None, float]] = field(default_factory=dict)
+    wellness_week: dict[Hashable, tuple[date | None, float]] = field(default_factory=dict)
+    documents: dict[date, dict[str, Any]] = field(default_factory=dict)
+    watermark_ms: float = -math.inf
+    # Monday of the oldest open week; rows of earlier weeks have been dropped.
+    closed_before: date | None = None
+
+
+class WeeklyMetricsAggregator:
+    def __init__(self, tz: str | ZoneInfo = DEFAULT_TIMEZONE, retain: timedelta = DEFAULT_RETAIN) -> None:
+        self.tz = tz if isinstance(tz, ZoneInfo) else ZoneInfo(tz)
+        self.retain = retain
+        self._athletes: dict[Hashable, _AthleteState] = {}
+
+    def _week_of(self, instant_ms: float) -> date | None:
+        if math.isnan(instant_ms):
+            return None
+        return current_monday(datetime.fromtimestamp(instant_ms / 1000, timezone.utc), self.tz)
+
+    def _place(
+        self,
+        rows: dict[Hashable, dict[str, Any]],
+        weeks: dict[Hashable, tuple[date | None, float]],
+        record: dict[str, Any],
+        week: date | None,
+        instant_ms: float,
+        dirty: set[date],
+    ) -> None:
+        row_id = record["id"]
+        previous = weeks.get(row_id)
+        if previous is not None and previous[0] is not None:
+            dirty.add(previous[0])
+        rows[row_id] = record
+        weeks[row_id] = (week, instant_ms)
+        if week is not None:
+            dirty.add(week)
+
+    def _prune(self, state: _AthleteState) -> None:
+        """Drop the rows of weeks that closed; their documents stay."""
+        if state.watermark_ms == -math.inf:
+            return
+        cutoff = self._week_of(state.watermark_ms - self.retain.total_seconds() * 1000)
+        if state.closed_before is not None and cutoff <= state.closed_before:
+            return
+        state.closed_before = cutoff
+        for rows, weeks in ((state.activities, state.activity_week), (state.wellness, state.wellness_week)):
+            for row_id in [row_id for row_id, (week, _) in weeks.items() if week is not None and week < cutoff]:
+                del rows[row_id], weeks[row_id]
+
+    def apply(
+        self,
+        athlete_id: Hashable,
+        activities: Iterable[Mapping[str, Any]] = (),
+        wellness: Iterable[Mapping[str, Any]] = (),
+        now: datetime | None = None,
+        stats: ApplyStats | None = None,
+    ) -> list[dict[str, Any]]:
+        """Apply new or changed rows for one athlete; return the recomputed week documents by ``weekStart``."""
+        stats = stats if stats is not None else ApplyStats()
+        state = self._athletes.setdefault(athlete_id, _AthleteState())
+        dirty: set[date] = set()
+        for source, fields, rows, weeks, date_field in (
+            (activities, ACTIVITY_FIELDS, state.activities, state.activity_week, "start_date"),
+            (wellness, WELLNESS_FIELDS, state.wellness, state.wellness_week, "id"),
+        ):
+            for row in source:
+                stats.seen += 1
+                record = {name: row.get(name) for name in fields}
+                if record["id"] is None:
+                    stats.skipped += 1
+                    continue
+                if rows.get(record["id"]) == record:
+                    stats.unchanged += 1
+                    continue
+                instant_ms = js_date_ms(record[date_field], self.tz)
+                week = self._week_of(instant_ms)
+                if week is not None and state.closed_before is not None and week < state.closed_before:
+                    stats.closed += 1
+                    # A row moved into a closed week leaves its open week.
+                    previous = weeks.pop(record["id"], None)
+                    if previous is not None:
+                        rows.pop(record["id"])
+                        if previous[0] is not None:
+                            dirty.add(previous[0])
+                    continue
+                self._place(rows, weeks, record, week, instant_ms, dirty)
+                if date_field == "start_date" and not math.isnan(instant_ms):
+                    state.watermark_ms = max(state.watermark_ms, instant_ms)
+                stats.applied += 1
+        documents = self._recompute(athlete_id, state, dirty, now)
+        self._prune(state)
+        stats.weeks += len(documents)
+        return documents
+
+    def forget(self, athlete_id: Hashable, activity_ids: Iterable[Hashable], now: datetime | None = None) -> list[dict[str, Any]]:
+        """Drop deleted activities and return the recomputed documents of their weeks."""
+        state = self._athletes.get(athlete_id)
+        if state is None:
+            return []
+        dirty: set[date] = set()
+        for activity_id in activity_ids:
+            state.activities.pop(activity_id, None)
+            week, _ = state.activity_week.pop(activity_id, (None, math.nan))
+            if week is not None:
+                dirty.add(week)
+        return self._recompute(athlete_id, state, dirty, now)
+
+    def _recompute(
+        self, athlete_id: Hashable, state: _AthleteState, dirty: set[date], now: datetime | None
+    ) -> list[dict[str, Any]]:
+        if not dirty:
+            return []
+        mondays = sorted(dirty)
+        activities = _rows_in_weeks(state.activities, state.activity_week, dirty)
+        wellness = _rows_in_weeks(state.wellness, state.wellness_week, dirty)
+        # The week documents are independent, so one rollup call covers every dirty week.
+        columns = dataclasses.replace(ActivityColumns.from_records(activities, self.tz), athlete_id=athlete_id)
+        documents = rollup_weekly_metrics(columns, wellness, weeks=mondays, tz=self.tz, now=now)
+        for monday, document in zip(mondays, documents):
+            state.documents[monday] = document
+        return documents
+
+    def documents(self, athlete_id: Hashable) -> list[dict[str, Any]]:
+        state = self._athletes.get(athlete_id)
+        return [state.documents[monday] for monday in sorted(state.documents)] if state else []
+
+    def watermark(self, athlete_id: Hashable) -> datetime | None:
+        """Start of the newest applied activity, in the aggregator's timezone."""
+        state = self._athletes.get(athlete_id)
+        if state is None or state.watermark_ms == -math.inf:
+            return None
+        return datetime.fromtimestamp(state.watermark_ms / 1000, self.tz)
+
+    def fetch_oldest(self, athlete_id: Hashable, overlap: timedelta = timedelta(days=1)) -> str | None:
+        """``oldest`` for ``GET Activities`` (local time, no offset, like the node's ``toISO``).
+
+        ``overlap`` re-fetches recent activities so late edits (names, TRIMP)
+        are still picked up; ``None`` means nothing was applied yet.
+        """
+        watermark = self.watermark(athlete_id)
+        if watermark is None:
+            return None
+        return (watermark - overlap).replace(tzinfo=None).isoformat(timespec="milliseconds")
+
+    def to_state(self) -> dict[str, Any]:
+        """JSON-serializable snapshot: rows of open weeks plus every current document."""
+        return {
+            "version": STATE_VERSION,
+            "timezone": self.tz.key,
+            "retainSeconds": self.retain.total_seconds(),
+            "athletes": [
+                {
+                    "athleteId": athlete_id,
+                    "closedBefore": state.closed_before.isoformat() if state.closed_before else None,
+                    "activities": list(state.activities.values()),
+                    "wellness": list(state.wellness.values()),
+                    "documents": self.documents(athlete_id),
+                }
+                for athlete_id, state in self._athletes.items()
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, snapshot: Mapping[str, Any]) -> WeeklyMetricsAggregator:
+        # Version 1 snapshots kept every row; replaying them closes old weeks.
+        if snapshot.get("version") not in (1, STATE_VERSION):
+            raise ValueError(f"Unsupported weekly metrics state version: {snapshot.get('version')!r}")
+        retain = snapshot.get("retainSeconds")
+        aggregator = cls(snapshot["timezone"], timedelta(seconds=retain) if retain is not None else DEFAULT_RETAIN)
+        for athlete in snapshot["athletes"]:
+            state = aggregator._athletes.setdefault(athlete["athleteId"], _AthleteState())
+            if athlete.get("closedBefore"):
+                state.closed_before = date.fromisoformat(athlete["closedBefore"])
+            aggregator.apply(athlete["athleteId"], athlete["activities"], athlete["wellness"])
+            # Keep the stored documents (and timestamps) rather than the replay's.
+            for document in athlete["documents"]:
+                # weekStart is the UTC date of the local Monday, which may be the Sunday before.
+                state.documents[monday_of(date.fromisoformat(document["weekStart"]) + timedelta(days=3))] = dict(document)
+        return aggregator
+
+
+def _rows_in_weeks(
+    rows: dict[Hashable, dict[str, Any]], weeks: dict[Hashable, tuple[date | None, float]], selected: set[date]
+) -> list[dict[str, Any]]:
+    """Rows of the selected weeks in start-date order, the order a full recomputation sums them in."""
+    chosen = [(instant_ms, row_id) for row_id, (week, instant_ms) in weeks.items() if week in selected]
+    chosen.sort(key=lambda item: (item[0], str(item[1])))
+    return [rows[row_id] for _, row_id in chosen]
+
+
+def upsert_op(document: Mapping[str, Any]) -> BulkOp:
+    """``weekly_metrics`` upsert keyed by athlete and week (the node keys on ``weekStart`` alone)."""
+    return {
+        "updateOne": {
+            "filter": {"athleteId": document["athleteId"], "weekStart": document["weekStart"]},
+            "update": {"$set": dict(document)},
+            "upsert": True,
+        }
+    }
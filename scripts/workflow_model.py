@@ -0,0 +1,123 @@
+"""Parsed n8n workflow export with node lookups for repository tooling.
+
+A workflow export is parsed once into a ``Workflow``. Nodes can then be looked
+up by name or type without rescanning the node list. The source of a code node
+(``jsCode``/``pythonCode``) is pulled out only when a caller asks for it, and
+is then cached on the instance.
+
+``extract_prompt_and_version`` reads the ``Prompt Builder`` template between
+the ``PROMPT_BEGIN``/``PROMPT_END`` markers and its ``PROMPT_VERSION``; the CI
+prompt version check and ``scripts/prompt_assembly.py`` both use it.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+
+ROOT = Path(__file__).resolve().parents[1]
+MAIN_WORKFLOW_PATH = ROOT / "workflows" / "running_coach_workflow.json"
+
+CODE_NODE_TYPE = "n8n-nodes-base.code"
+# Code node parameter holding the source, by language.
+CODE_PARAMETERS = {"javaScript": "jsCode", "python": "pythonCode"}
+
+PROMPT_NODE = "Prompt Builder"
+PROMPT_BEGIN = "// PROMPT_BEGIN"
+PROMPT_END = "// PROMPT_END"
+PROMPT_VERSION_RE = re.compile(r"PROMPT_VERSION\s*=\s*\"([^\"]+)\"")
+
+
+class MissingNodeError(LookupError):
+    """Raised when a workflow lacks a node the caller requires."""
+
+
+@dataclass(frozen=True)
+class CodeNode:
+    name: str
+    language: str
+    code: str
+
+
+class Workflow:
+    def __init__(self, data: dict[str, Any]) -> None:
+        self.data = data
+        self.nodes: list[dict[str, Any]] = [node for node in data.get("nodes", []) if isinstance(node, dict)]
+        self._by_name: dict[str, dict[str, Any]] = {}
+        self._by_type: dict[str, list[dict[str, Any]]] = {}
+        for node in self.nodes:
+            # n8n node names are unique; keep the first like a linear scan would.
+            self._by_name.setdefault(node.get("name"), node)
+            self._by_type.setdefault(node.get("type"), []).append(node)
+        self._code: dict[str, CodeNode | None] = {}
+
+    @classmethod
+    def from_json(cls, text: str | bytes) -> Workflow:
+        return cls(json.loads(text))
+
+    @classmethod
+    def from_path(cls, path: Path = MAIN_WORKFLOW_PATH) -> Workflow:
+        return cls.from_json(Path(path).read_bytes())
+
+    @property
+    def name(self) -> str | None:
+        return self.data.get("name")
+
+    @property
+    def connections(self) -> dict[str, Any]:
+        return self.data.get("connections", {})
+
+    def node(self, name: str) -> dict[str, Any] | None:
+        return self._by_name.get(name)
+
+    def node_names(self) -> list[str]:
+        return list(self._by_name)
+
+    def nodes_of_type(self, node_type: str) -> list[dict[str, Any]]:
+        return list(self._by_type.get(node_type, []))
+
+    def code_node(self, name: str) -> CodeNode | None:
+        """Source of the named code node, or ``None`` if it is missing or has no code."""
+        if name not in self._code:
+            self._code[name] = _extract_code(self._by_name.get(name))
+        return self._code[name]
+
+    def code(self, name: str) -> str | None:
+        code_node = self.code_node(name)
+        return code_node.code if code_node else None
+
+    def code_nodes(self) -> Iterator[CodeNode]:
+        for node in self._by_type.get(CODE_NODE_TYPE, []):
+            code_node = self.code_node(node.get("name"))
+            if code_node is not None:
+                yield code_node
+
+
+def extract_prompt_and_version(workflow: Workflow, node_name: str = PROMPT_NODE) -> tuple[str | None, str | None]:
+    """Template between the prompt markers and ``PROMPT_VERSION``; ``(None, None)`` when either is missing."""
+    if workflow.node(node_name) is None:
+        raise MissingNodeError(f"Missing node {node_name}")
+    code = workflow.code(node_name) or ""
+    version_match = PROMPT_VERSION_RE.search(code)
+    if not version_match:
+        return None, None
+    start = code.find(PROMPT_BEGIN)
+    end = code.find(PROMPT_END)
+    if start == -1 or end == -1 or end <= start:
+        return None, None
+    return code[start + len(PROMPT_BEGIN) : end].strip(), version_match.group(1)
+
+
+def _extract_code(node: dict[str, Any] | None) -> CodeNode | None:
+    if node is None:
+        return None
+    parameters = node.get("parameters") or {}
+    language = parameters.get("language", "javaScript")
+    code = parameters.get(CODE_PARAMETERS.get(language, "jsCode"))
+    if not isinstance(code, str):
+        return None
+    return CodeNode(name=node.get("name"), language=language, code=code)
@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""Replay recorded workflow runs offline and time every node.
+
+``tests/run-it.sh`` needs docker, n8n and a mockserver to run the workflow.
+This runner walks the graph of ``running_coach_workflow.json`` from a trigger
+in Python and executes the Code nodes' JavaScript in persistent ``node``
+worker processes, one per replay thread. Each worker compiles every Code
+node once and exposes the n8n globals the nodes use (``items``, ``$items``,
+``$()``, ``$input``, ``$json``, ``$vars``, ``$env``), with ``Date`` pinned to
+the recording's ``now``.
+
+Every other node is a stand-in:
+
+- HTTP, Mongo ``find``, OpenAI and Telegram nodes return the items recorded
+  for them (``onError: continueRegularOutput`` nodes may record an error).
+- Mongo writes and unrecorded sink nodes pass their input through.
+- Merge nodes append their inputs (``chooseBranch`` keeps the first input),
+  and If nodes route items on ``={{ $json.<field> }}`` boolean conditions.
+
+A recording is one JSON object per line::
+
+    {"runId": "...", "now": "2025-10-12T05:00:00Z", "vars": {}, "env": {},
+     "nodes": {"GET Activities": [{...}, ...], "Message a model": [{...}]},
+     "latencyMs": {"Message a model": 8200}}
+
+n8n execution exports (``data.resultData.runData``) are converted on the fly,
+keeping each stand-in node's recorded output and ``executionTime``. Without
+``--recordings`` the mockserver expectations used by ``run-it.sh`` and a valid
+plan fixture are replayed.
+
+Code-node latency is measured inside the worker around the node function, so
+it excludes the pipe round trip; stand-in latency is whatever the recording
+reports.
+
+Usage::
+
+    python3 scripts/workflow_replay.py --repeat 2000 --workers 8
+    python3 scripts/workflow_replay.py --recordings executions.jsonl --report replay.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping
+from urllib.parse import urlparse
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.weekly_metrics import DEFAULT_TIMEZONE  # noqa: E402
+from scripts.workflow_model import CODE_NODE_TYPE, Workflow  # noqa: E402
+
+MOCKSERVER_EXPECTATIONS_PATH = REPO_ROOT / "tests" / "mockserver-expectations.json"
+DEFAULT_PLAN_PATH = REPO_ROOT / "tests" / "fixtures" / "weekly_plan_valid_1.json"
+DEFAULT_TRIGGER = "Schedule Trigger"
+# Monday morning before the plan fixture's week.
+DEFAULT_NOW = "2026-02-02T05:00:00Z"
+
+TRIGGER_TYPES = {"n8n-nodes-base.manualTrigger", "n8n-nodes-base.scheduleTrigger"}
+MERGE_TYPE = "n8n-nodes-base.merge"
+IF_TYPE = "n8n-nodes-base.if"
+MONGO_TYPE = "n8n-nodes-base.mongoDb"
+TELEGRAM_TYPE = "n8n-nodes-base.telegram"
+
+WORKER_JS = r"""
+const readline = require("readline");
+const RealDate = Date;
+let NOW = null;
+global.Date = class extends RealDate {
+  constructor(...args) { if (args.length) super(...args); else super(NOW === null ? RealDate.now() : NOW); }
+  static now() { return NOW === null ? RealDate.now() : NOW; }
+};
+const out = process.stdout;
+for (const level of ["log", "info", "warn", "debug"]) console[level] = (...args) => process.stderr.write(args.join(" ") + "\n");
+
+const nodes = new Map();
+let run = { outputs: {}, vars: {}, env: {} };
+const $items = name => {
+  if (!(name in run.outputs)) throw new Error(`Referenced node is unexecuted: ${name}`);
+  return run.outputs[name];
+};
+const accessor = all => ({ all, first: () => all()[0], last: () => all()[all().length - 1], get item() { return all()[0]; } });
+const $ = name => accessor(() => $items(name));
+const normalize = value => (Array.isArray(value) ? value : value == null ? [] : [value])
+  .map(item => (item && typeof item === "object" && "json" in item ? item : { json: item }));
+
+const handlers = {
+  load({ code }) {
+    for (const [name, source] of Object.entries(code)) {
+      nodes.set(name, new Function("items", "$items", "$", "$input", "$json", "$vars", "$env", source));
+    }
+    return { nodes: nodes.size };
+  },
+  begin({ now, vars, env }) {
+    NOW = now;
+    run = { outputs: {}, vars: vars || {}, env: env || {} };
+    return {};
+  },
+  set({ node, items }) {
+    run.outputs[node] = items;
+    return {};
+  },
+  exec({ node, items }) {
+    const fn = nodes.get(node);
+    if (!fn) throw new Error(`Unknown code node: ${node}`);
+    const input = accessor(() => items);
+    const start = process.hrtime.bigint();
+    const result = normalize(fn(items, $items, $, input, items.length ? items[0].json : {}, run.vars, run.env));
+    const ms = Number(process.hrtime.bigint() - start) / 1e6;
+    run.outputs[node] = result;
+    return { items: result, ms };
+  },
+};
+
+readline.createInterface({ input: process.stdin }).on("line", line => {
+  let reply;
+  try {
+    const message = JSON.parse(line);
+    for (const queued of message.queued || []) handlers[queued.op](queued);
+    reply = { ok: true, ...handlers[message.op](message) };
+  } catch (err) {
+    reply = { ok: false, error: err && err.message ? err.message : String(err) };
+  }
+  out.write(JSON.stringify(reply) + "\n");
+});
+"""
+
+
+class ReplayError(RuntimeError):
+    pass
+
+
+class JsRuntime:
+    """A persistent ``node`` process running the workflow's Code nodes.
+
+    ``begin`` and ``set_output`` need no reply, so they are queued and sent
+    along with the next ``execute``: one pipe round trip per Code node.
+    """
+
+    def __init__(self, code: Mapping[str, str], tz: str = DEFAULT_TIMEZONE, node_binary: str = "node") -> None:
+        binary = shutil.which(node_binary)
+        if binary is None:
+            raise ReplayError(f"{node_binary} is required to run the Code nodes")
+        self._process = subprocess.Popen(
+            [binary, "-e", WORKER_JS],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            env={**os.environ, "TZ": tz},
+        )
+        self._queued: list[dict[str, Any]] = []
+        self._call({"op": "load", "code": dict(code)})
+
+    def _call(self, message: dict[str, Any]) -> dict[str, Any]:
+        if self._queued:
+            message["queued"], self._queued = self._queued, []
+        try:
+            self._process.stdin.write(json.dumps(message) + "\n")
+            self._process.stdin.flush()
+            line = self._process.stdout.readline()
+        except (BrokenPipeError, OSError) as exc:
+            raise ReplayError(f"node worker died: {exc}") from exc
+        if not line:
+            raise ReplayError(f"node worker exited with {self._process.poll()}")
+        return json.loads(line)
+
+    def begin(self, now_ms: float | None, variables: Mapping[str, Any], env: Mapping[str, Any]) -> None:
+        self._queued = [{"op": "begin", "now": now_ms, "vars": dict(variables), "env": dict(env)}]
+
+    def set_output(self, node: str, items: list[dict[str, Any]]) -> None:
+        self._queued.append({"op": "set", "node": node, "items": items})
+
+    def execute(self, node: str, items: list[dict[str, Any]]) -> tuple[list[dict[str, Any]] | None, float, str | None]:
+        """``(items, ms, None)`` on success, ``(None, 0, error)`` when the node throws."""
+        reply = self._call({"op": "exec", "node": node, "items": items})
+        if not reply["ok"]:
+            return None, 0.0, reply["error"]
+        return reply["items"], reply["ms"], None
+
+    def close(self) -> None:
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+
+    def __enter__(self) -> JsRuntime:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+@dataclass
+class RunResult:
+    run_id: str
+    ok: bool
+    error: str | None = None
+    executed: list[str] = field(default_factory=list)
+    latency_ms: dict[str, float] = field(default_factory=dict)
+    wall_ms: float = 0.0
+    outputs: dict[str, list[dict[str, Any]]] | None = None
+
+
+def _items(values: Iterable[Any]) -> list[dict[str, Any]]:
+    return [{"json": value} for value in values]
+
+
+def _json_path(expression: Any) -> list[str] | None:
+    """Field path of a ``={{ $json.a.b }}`` expression, else ``None``."""
+    if not isinstance(expression, str):
+        return None
+    text = expression.strip()
+    if not (text.startswith("={{") and text.endswith("}}")):
+        return None
+    body = text[3:-2].strip()
+    if not body.startswith("$json."):
+        return None
+    path = body[len("$json.") :].split(".")
+    return path if all(part.isidentifier() for part in path) else None
+
+
+def _lookup(payload: Any, path: list[str]) -> Any:
+    for part in path:
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(part)
+    return payload
+
+
+class ReplayEngine:
+    """Execution plan for one trigger of a workflow; ``replay`` runs one recording."""
+
+    def __init__(self, workflow: Workflow | None = None, trigger: str = DEFAULT_TRIGGER) -> None:
+        self.workflow = workflow or Workflow.from_path()
+        if self.workflow.node(trigger) is None:
+            raise ReplayError(f"Unknown trigger node: {trigger}")
+        self.trigger = trigger
+        self.code = {node.name: node.code for node in self.workflow.code_nodes() if node.language == "javaScript"}
+        self.order = self._topological_order()
+        consumers = {name for name, outputs in self.workflow.connections.items() if any(outputs.get("main") or [])}
+        self.sinks = {name for name in self.order if name not in consumers}
+        # Stand-in outputs are only sent to the worker if some Code node can read
+        # them through $items()/$(); nodes look each other up by literal name.
+        self.referenced = {
+            name
+            for name in self.order
+            if any(f'"{name}"' in code or f"'{name}'" in code for code in self.code.values())
+        }
+
+    def _targets(self, name: str) -> list[list[dict[str, Any]]]:
+        return (self.workflow.connections.get(name) or {}).get("main") or []
+
+    def _topological_order(self) -> list[str]:
+        reachable = {self.trigger}
+        stack = [self.trigger]
+        while stack:
+            for branch in self._targets(stack.pop()):
+                for edge in branch or []:
+                    if edge["node"] not in reachable:
+                        reachable.add(edge["node"])
+                        stack.append(edge["node"])
+        indegree = {name: 0 for name in reachable}
+        for name in reachable:
+            for branch in self._targets(name):
+                for edge in branch or []:
+                    indegree[edge["node"]] += 1
+        # Keep the export's node order among ready nodes so runs are deterministic.
+        position = {name: index for index, name in enumerate(self.workflow.node_names())}
+        ready = sorted((name for name, count in indegree.items() if count == 0), key=position.get)
+        order: list[str] = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for branch in self._targets(name):
+                for edge in branch or []:
+                    indegree[edge["node"]] -= 1
+                    if indegree[edge["node"]] == 0:
+                        ready.append(edge["node"])
+            ready.sort(key=position.get)
+        if len(order) != len(reachable):
+            raise ReplayError("workflow graph has a cycle")
+        return order
+
+    def _stand_in(self, node: dict[str, Any], inputs: list[list[dict[str, Any]]], recording: Mapping[str, Any]) -> list[list[dict[str, Any]]]:
+        name = node["name"]
+        node_type = node.get("type")
+        parameters = node.get("parameters") or {}
+        flat = [item for items in inputs for item in items]
+        if node_type in TRIGGER_TYPES:
+            return [[{"json": {}}]]
+        if node_type == MERGE_TYPE:
+            return [inputs[0] if parameters.get("mode") == "chooseBranch" else flat]
+        if node_type == IF_TYPE:
+            conditions = (parameters.get("conditions") or {}).get("boolean") or []
+            paths = [(_json_path(condition.get("value1")), condition.get("operation")) for condition in conditions]
+            if not paths or any(path is None or operation not in {"isTrue", "isFalse"} for path, operation in paths):
+                raise ReplayError(f"{name}: only $json boolean conditions are supported")
+            branches: list[list[dict[str, Any]]] = [[], []]
+            for item in flat:
+                passed = all(bool(_lookup(item.get("json"), path)) == (operation == "isTrue") for path, operation in paths)
+                branches[0 if passed else 1].append(item)
+            return branches
+        recorded = (recording.get("nodes") or {}).get(name)
+        if isinstance(recorded, dict) and "error" in recorded:
+            if node.get("onError") != "continueRegularOutput":
+                raise ReplayError(f"{name}: {recorded['error']}")
+            return [[{"json": {"error": recorded["error"]}}]]
+        if recorded is not None:
+            return [_items(recorded)]
+        writes = node_type == MONGO_TYPE and parameters.get("operation", "find") != "find"
+        if writes or node_type == TELEGRAM_TYPE or name in self.sinks:
+            return [flat]
+        raise ReplayError(f"{name}: no recorded output")
+
+    def replay(self, runtime: JsRuntime, recording: Mapping[str, Any], keep_outputs: bool = False) -> RunResult:
+        result = RunResult(run_id=str(recording.get("runId", "")), ok=True)
+        started = time.perf_counter()
+        now = recording.get("now")
+        now_ms = datetime.fromisoformat(now.replace("Z", "+00:00")).timestamp() * 1000 if now else None
+        runtime.begin(now_ms, recording.get("vars") or {}, recording.get("env") or {})
+        recorded_latency = recording.get("latencyMs") or {}
+
+        pending: dict[str, dict[int, list[dict[str, Any]]]] = {}
+        outputs: dict[str, list[dict[str, Any]]] = {}
+        try:
+            for name in self.order:
+                node = self.workflow.node(name)
+                received = pending.pop(name, {})
+                if name != self.trigger and not any(received.values()):
+                    continue
+                inputs = [received.get(index, []) for index in range(max(received, default=0) + 1)]
+                if name in self.code and node.get("type") == CODE_NODE_TYPE:
+                    items, ms, error = runtime.execute(name, inputs[0])
+                    if error is not None:
+                        raise ReplayError(f"{name}: {error}")
+                    branches = [items]
+                    result.latency_ms[name] = ms
+                else:
+                    branches = self._stand_in(node, inputs, recording)
+                    if name in recorded_latency:
+                        result.latency_ms[name] = float(recorded_latency[name])
+                if not branches[0] and node.get("alwaysOutputData"):
+                    branches[0] = [{"json": {}}]
+                if name not in self.code and name in self.referenced:
+                    runtime.set_output(name, branches[0])
+                outputs[name] = branches[0]
+                result.executed.append(name)
+                for branch, items in zip(self._targets(name), branches):
+                    for edge in branch or []:
+                        pending.setdefault(edge["node"], {}).setdefault(edge.get("index", 0), []).extend(items)
+        except ReplayError as exc:
+            result.ok = False
+            result.error = str(exc)
+        result.wall_ms = (time.perf_counter() - started) * 1000
+        if keep_outputs:
+            result.outputs = outputs
+        return result
+
+
+def recording_from_execution(execution: Mapping[str, Any], workflow: Workflow) -> dict[str, Any]:
+    """Recording of an n8n execution export: stand-in outputs and their ``executionTime``."""
+    data = execution.get("data", execution)
+    run_data = (data.get("resultData") or {}).get("runData") or {}
+    nodes: dict[str, Any] = {}
+    latency: dict[str, float] = {}
+    for name, runs in run_data.items():
+        node = workflow.node(name)
+        if node is None or node.get("type") in {CODE_NODE_TYPE, MERGE_TYPE, IF_TYPE} | TRIGGER_TYPES or not runs:
+            continue
+        first = runs[0]
+        main = ((first.get("data") or {}).get("main") or [[]])[0] or []
+        nodes[name] = [item.get("json", {}) for item in main]
+        if "executionTime" in first:
+            latency[name] = float(first["executionTime"])
+    return {
+        "runId": str(execution.get("id", "")),
+        "now": execution.get("startedAt"),
+        "nodes": nodes,
+        "latencyMs": latency,
+    }
+
+
+def mockserver_recording(
+    workflow: Workflow,
+    expectations_path: Path = MOCKSERVER_EXPECTATIONS_PATH,
+    plan_path: Path = DEFAULT_PLAN_PATH,
+    now: str = DEFAULT_NOW,
+) -> dict[str, Any]:
+    """The ``run-it.sh`` scenario: mockserver Intervals responses and a valid plan from the model."""
+    by_path = {
+        urlparse(node["parameters"].get("url", "")).path: node["name"]
+        for node in workflow.nodes_of_type("n8n-nodes-base.httpRequest")
+    }
+    nodes: dict[str, Any] = {}
+    for expectation in json.loads(expectations_path.read_text()):
+        name = by_path.get(expectation["httpRequest"].get("path"))
+        if name:
+            body = expectation["httpResponse"]["body"]["json"]
+            nodes[name] = body if isinstance(body, list) else [body]
+    plan = json.loads(plan_path.read_text())
+    nodes["Message a model"] = [{"choices": [{"message": {"role": "assistant", "content": plan}}]}]
+    nodes["Read Previous Weeks"] = []
+    nodes["Read Last HR Profile"] = []
+    return {"runId": "mockserver", "now": now, "nodes": nodes}
+
+
+def read_recordings(path: Path, workflow: Workflow) -> Iterator[dict[str, Any]]:
+    """Recordings or n8n execution exports, one JSON object per line."""
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            payload = json.loads(line)
+            yield payload if "nodes" in payload else recording_from_execution(payload, workflow)
+
+
+def replay_many(
+    engine: ReplayEngine,
+    recordings: Iterable[Mapping[str, Any]],
+    workers: int = 4,
+    tz: str = DEFAULT_TIMEZONE,
+) -> Iterator[RunResult]:
+    """Replay ``recordings`` on ``workers`` threads, each with its own node process.
+
+    Recordings are pulled lazily, so arbitrarily long inputs stream through.
+    Results are yielded in completion order.
+    """
+    source = iter(recordings)
+    lock = threading.Lock()
+    results: queue.Queue = queue.Queue(maxsize=workers * 4)
+    done = object()
+
+    def work() -> None:
+        try:
+            with JsRuntime(engine.code, tz) as runtime:
+                while True:
+                    with lock:
+                        recording = next(source, None)
+                    if recording is None:
+                        break
+                    results.put(engine.replay(runtime, recording))
+        except BaseException as exc:  # surfaced on the consuming thread
+            results.put(exc)
+        finally:
+            results.put(done)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    running = len(threads)
+    while running:
+        item = results.get()
+        if item is done:
+            running -= 1
+        elif isinstance(item, BaseException):
+            raise item
+        else:
+            yield item
+
+
+class LatencyReport:
+    """Per-node latency distribution and run outcomes over many replays."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+        self.runs = 0
+        self.failed = 0
+        self.errors: dict[str, int] = {}
+
+    def add(self, result: RunResult) -> None:
+        self.runs += 1
+        if not result.ok:
+            self.failed += 1
+            self.errors[result.error] = self.errors.get(result.error, 0) + 1
+        for name, ms in result.latency_ms.items():
+            self.samples.setdefault(name, []).append(ms)
+
+    @staticmethod
+    def _percentile(ordered: list[float], fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def nodes(self) -> list[dict[str, Any]]:
+        """One row per node, slowest total first."""
+        rows = []
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            rows.append(
+                {
+                    "node": name,
+                    "calls": len(ordered),
+                    "totalMs": sum(ordered),
+                    "meanMs": sum(ordered) / len(ordered),
+                    "p50Ms": self._percentile(ordered, 0.5),
+                    "p95Ms": self._percentile(ordered, 0.95),
+                    "maxMs": ordered[-1],
+                }
+            )
+        return sorted(rows, key=lambda row: row["totalMs"], reverse=True)
+
+    def summary(self, elapsed_s: float) -> dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failed": self.failed,
+            "elapsedSeconds": elapsed_s,
+            "runsPerSecond": self.runs / elapsed_s if elapsed_s else None,
+            "errors": dict(sorted(self.errors.items(), key=lambda entry: -entry[1])[:20]),
+            "nodes": self.nodes(),
+        }
+
+    def markdown(self, elapsed_s: float) -> str:
+        lines = [
+            f"Replayed {self.runs} runs ({self.failed} failed) in {elapsed_s:.2f}s",
+            "",
+            "| Node | Calls | Mean ms | p50 ms | p95 ms | Max ms | Total ms |",
+            "| --- | ---: | ---: | ---: | ---: | ---: | ---: |",
+        ]
+        for row in self.nodes():
+            lines.append(
+                f"| {row['node']} | {row['calls']} | {row['meanMs']:.3f} | {row['p50Ms']:.3f} | "
+                f"{row['p95Ms']:.3f} | {row['maxMs']:.3f} | {row['totalMs']:.1f} |"
+            )
+        return "\n".join(lines)
+
+
+def _repeated(recordings: Iterable[dict[str, Any]], times: int) -> Iterator[dict[str, Any]]:
+    for recording in recordings:
+        for index in range(times):
+            yield {**recording, "runId": f"{recording.get('runId', '')}#{index}"} if times > 1 else recording
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded runs of the workflow offline and report per-node latency.")
+    parser.add_argument("--workflow", type=Path, default=None, help="Workflow export (default: the main workflow).")
+    parser.add_argument("--trigger", default=DEFAULT_TRIGGER)
+    parser.add_argument("--recordings", type=Path, help="JSONL recordings or n8n execution exports (default: mockserver scenario).")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay every recording this many times.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timezone", default=DEFAULT_TIMEZONE, help="TZ for the node workers (default: %(default)s).")
+    parser.add_argument("--report", type=Path, help="Write the JSON summary here.")
+    args = parser.parse_args()
+
+    workflow = Workflow.from_path(args.workflow) if args.workflow else Workflow.from_path()
+    engine = ReplayEngine(workflow, args.trigger)
+    recordings = read_recordings(args.recordings, workflow) if args.recordings else iter([mockserver_recording(workflow)])
+
+    report = LatencyReport()
+    started = time.perf_counter()
+    for result in replay_many(engine, _repeated(recordings, args.repeat), args.workers, args.timezone):
+        report.add(result)
+    elapsed = time.perf_counter() - started
+
+    print(report.markdown(elapsed))
+    if args.report:
+        args.report.write_text(json.dumps(report.summary(elapsed), indent=2) + "\n")
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
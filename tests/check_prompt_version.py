@@ -1,71 +1,129 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import json
-import re
+import argparse
 import subprocess
 import sys
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import CACHE_ROOT, DiskCache  # noqa: E402
+from scripts.workflow_model import (  # noqa: E402
+    PROMPT_NODE,
+    MissingNodeError,
+    Workflow,
+    extract_prompt_and_version,
+)
+
 WORKFLOW_PATH = "workflows/running_coach_workflow.json"
-NODE_NAME = "Prompt Builder"
-VERSION_RE = re.compile(r"PROMPT_VERSION\s*=\s*\"([^\"]+)\"")
-PROMPT_BEGIN = "// PROMPT_BEGIN"
-PROMPT_END = "// PROMPT_END"
+BASE_REF = "origin/main"
+DEFAULT_CACHE_PATH = CACHE_ROOT / "prompt_version.sqlite"
+# Bump when extract_prompt_and_version changes so cached base results are not reused.
+EXTRACT_VERSION = "1"
+NODE_NAME = PROMPT_NODE
 
 
-def run_git(args: list[str]) -> subprocess.CompletedProcess[str]:
+def run_git(args: list[str], cwd: Path | None = None) -> subprocess.CompletedProcess[str]:
     return subprocess.run(
         ["git", *args],
+        cwd=cwd,
         check=False,
         text=True,
         capture_output=True,
     )
 
 
-def load_workflow_from_git(ref: str) -> dict:
-    show = run_git(["show", f"{ref}:{WORKFLOW_PATH}"])
-    if show.returncode != 0:
-        fetch = run_git(["fetch", "origin", "main", "--depth=1"])
+def load_workflow_from_disk(cwd: Path | None = None) -> Workflow:
+    return Workflow.from_path((cwd or Path()) / WORKFLOW_PATH)
+
+
+def resolve_workflow_blob(ref: str, cwd: Path | None = None) -> str | None:
+    """Blob SHA of the workflow at ``ref`` if the ref is available locally."""
+    parsed = run_git(["rev-parse", "--verify", "--quiet", f"{ref}:{WORKFLOW_PATH}"], cwd=cwd)
+    if parsed.returncode != 0:
+        return None
+    return parsed.stdout.strip() or None
+
+
+def remote_main_commit(cwd: Path | None = None) -> str | None:
+    """Commit SHA of origin's main branch via ``ls-remote`` (no objects are downloaded)."""
+    listed = run_git(["ls-remote", "origin", "refs/heads/main"], cwd=cwd)
+    if listed.returncode != 0 or not listed.stdout.strip():
+        return None
+    return listed.stdout.split()[0]
+
+
+def _cache_key(kind: str, sha: str) -> str:
+    return f"{EXTRACT_VERSION}:{NODE_NAME}:{WORKFLOW_PATH}:{kind}:{sha}"
+
+
+def load_base_prompt_and_version(
+    ref: str = BASE_REF,
+    cache: DiskCache | None = None,
+    cwd: Path | None = None,
+) -> tuple[str | None, str | None]:
+    """Prompt template and version of the base workflow, cached by git object SHA.
+
+    Results are stored under the workflow blob SHA and, when ``ref`` had to be
+    fetched, under the remote ``main`` commit SHA. A repeat run then needs
+    neither ``git fetch`` nor a JSON parse of the base workflow.
+    """
+    blob = resolve_workflow_blob(ref, cwd)
+    commit = None
+    if blob is None:
+        commit = remote_main_commit(cwd) if cache is not None else None
+        cached = cache.get(_cache_key("commit", commit)) if commit else None
+        if cached is not None:
+            return cached["prompt"], cached["version"]
+        fetch = run_git(["fetch", "origin", "main", "--depth=1"], cwd=cwd)
         if fetch.returncode != 0:
             print("Failed to fetch origin/main:", fetch.stderr.strip())
             sys.exit(1)
-        show = run_git(["show", f"{ref}:{WORKFLOW_PATH}"])
+        blob = resolve_workflow_blob(ref, cwd)
+        if blob is None:
+            print("Failed to read workflow from", ref)
+            sys.exit(1)
+
+    cached = cache.get(_cache_key("blob", blob)) if cache is not None else None
+    if cached is None:
+        show = run_git(["cat-file", "blob", blob], cwd=cwd)
         if show.returncode != 0:
             print("Failed to read workflow from", ref)
             print(show.stderr.strip())
             sys.exit(1)
-    return json.loads(show.stdout)
-
-
-def load_workflow_from_disk() -> dict:
-    return json.loads(Path(WORKFLOW_PATH).read_text())
-
-
-def extract_prompt_and_version(workflow: dict) -> tuple[str | None, str | None]:
-    nodes = workflow.get("nodes", [])
-    node = next((n for n in nodes if n.get("name") == NODE_NAME), None)
-    if not node:
-        print(f"Missing node {NODE_NAME}")
-        sys.exit(1)
-    code = node.get("parameters", {}).get("jsCode", "")
-    version_match = VERSION_RE.search(code)
-    if not version_match:
-        return None, None
-    start = code.find(PROMPT_BEGIN)
-    end = code.find(PROMPT_END)
-    if start == -1 or end == -1 or end <= start:
-        return None, None
-    prompt_body = code[start + len(PROMPT_BEGIN) : end].strip()
-    return prompt_body, version_match.group(1)
+        prompt, version = extract_prompt_and_version(Workflow.from_json(show.stdout))
+        cached = {"prompt": prompt, "version": version}
+    if cache is not None:
+        entries = {_cache_key("blob", blob): cached}
+        if commit:
+            entries[_cache_key("commit", commit)] = cached
+        cache.set_many(entries)
+    return cached["prompt"], cached["version"]
 
 
 def main() -> int:
-    base = load_workflow_from_git("origin/main")
-    head = load_workflow_from_disk()
-
-    base_prompt, base_version = extract_prompt_and_version(base)
-    head_prompt, head_version = extract_prompt_and_version(head)
+    parser = argparse.ArgumentParser(description="Fail when the prompt template changes without a PROMPT_VERSION bump.")
+    parser.add_argument(
+        "--cache",
+        default=str(DEFAULT_CACHE_PATH),
+        help="Cache of base prompt/version by git object SHA (default: %(default)s).",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always read and parse the base workflow.")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else DiskCache(Path(args.cache), max_entries=1000)
+    try:
+        base_prompt, base_version = load_base_prompt_and_version(BASE_REF, cache)
+        head_prompt, head_version = extract_prompt_and_version(load_workflow_from_disk())
+    except MissingNodeError as exc:
+        print(exc)
+        return 1
+    finally:
+        if cache is not None:
+            cache.close()
 
     if base_prompt is None or base_version is None:
         print("Base prompt versioning not initialized; skipping check.")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import DiskCache
+from tests import check_prompt_version
+from tests.check_prompt_version import (
+    WORKFLOW_PATH,
+    load_base_prompt_and_version,
+    resolve_workflow_blob,
+    run_git,
+)
+
+
+def workflow_json(prompt: str, version: str) -> str:
+    code = f'// PROMPT_BEGIN\n{prompt}\n// PROMPT_END\nconst PROMPT_VERSION = "{version}";\n'
+    return json.dumps({"nodes": [{"name": "Prompt Builder", "type": "n8n-nodes-base.code", "parameters": {"jsCode": code}}]})
+
+
+class CheckPromptVersionUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.remote = self.tmp / "remote.git"
+        self.git(self.tmp, "init", "-q", "--bare", str(self.remote))
+        self.git(self.remote, "symbolic-ref", "HEAD", "refs/heads/main")
+        self.cache = DiskCache(self.tmp / "cache.sqlite")
+        self.addCleanup(self.cache.close)
+
+    def git(self, cwd: Path, *args: str) -> str:
+        result = run_git(list(args), cwd=cwd)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def push_workflow(self, prompt: str, version: str) -> None:
+        work = self.tmp / "work"
+        if not work.exists():
+            self.git(self.tmp, "clone", "-q", str(self.remote), str(work))
+            self.git(work, "config", "user.email", "ci@example.com")
+            self.git(work, "config", "user.name", "CI")
+            self.git(work, "checkout", "-q", "-b", "main")
+        path = work / WORKFLOW_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(workflow_json(prompt, version))
+        self.git(work, "add", WORKFLOW_PATH)
+        self.git(work, "commit", "-q", "-m", f"prompt {version}")
+        self.git(work, "push", "-q", "origin", "main")
+
+    def fresh_checkout(self, name: str) -> Path:
+        """A repo with origin configured but origin/main not fetched, like a PR checkout."""
+        checkout = self.tmp / name
+        self.git(self.tmp, "init", "-q", str(checkout))
+        self.git(checkout, "remote", "add", "origin", str(self.remote))
+        return checkout
+
+    def test_repeat_run_skips_fetch_and_parse(self) -> None:
+        self.push_workflow("Plan the week.", "v1")
+        first = self.fresh_checkout("first")
+        self.assertEqual(load_base_prompt_and_version(cache=self.cache, cwd=first), ("Plan the week.", "v1"))
+        self.assertIsNotNone(resolve_workflow_blob("origin/main", cwd=first))
+
+        second = self.fresh_checkout("second")
+        with mock.patch.object(check_prompt_version.Workflow, "from_json", side_effect=AssertionError("parsed")):
+            self.assertEqual(load_base_prompt_and_version(cache=self.cache, cwd=second), ("Plan the week.", "v1"))
+        # Served from the commit key: origin/main was never fetched into this checkout.
+        self.assertIsNone(resolve_workflow_blob("origin/main", cwd=second))
+
+    def test_new_base_commit_is_read_again(self) -> None:
+        self.push_workflow("Plan the week.", "v1")
+        load_base_prompt_and_version(cache=self.cache, cwd=self.fresh_checkout("first"))
+        self.push_workflow("Plan the week with rest.", "v2")
+        self.assertEqual(
+            load_base_prompt_and_version(cache=self.cache, cwd=self.fresh_checkout("second")),
+            ("Plan the week with rest.", "v2"),
+        )
+
+    def test_local_ref_uses_blob_cache(self) -> None:
+        self.push_workflow("Plan the week.", "v1")
+        clone = self.tmp / "clone"
+        self.git(self.tmp, "clone", "-q", str(self.remote), str(clone))
+        self.assertEqual(load_base_prompt_and_version(cache=self.cache, cwd=clone), ("Plan the week.", "v1"))
+        with mock.patch.object(check_prompt_version, "run_git", wraps=run_git) as git:
+            with mock.patch.object(check_prompt_version.Workflow, "from_json", side_effect=AssertionError("parsed")):
+                load_base_prompt_and_version(cache=self.cache, cwd=clone)
+        commands = [call.args[0][0] for call in git.call_args_list]
+        self.assertEqual(commands, ["rev-parse"])
+
+    def test_without_cache_reads_base_workflow(self) -> None:
+        self.push_workflow("Plan the week.", "v1")
+        checkout = self.fresh_checkout("plain")
+        self.assertEqual(load_base_prompt_and_version(cwd=checkout), ("Plan the week.", "v1"))
+        self.assertEqual(self.cache.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
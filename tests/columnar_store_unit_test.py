@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import random
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+import sys
+
+import mongomock
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.columnar_store import (
+    ColumnarStore,
+    export_collection,
+    export_documents,
+    read_json_documents,
+)
+
+START = datetime(2025, 1, 6, tzinfo=timezone.utc)
+
+
+def shaped_activities(count: int, seed: int = 1) -> list[dict]:
+    """Documents as ``Shape Activities`` stores them, with the date encodings Mongo dumps use."""
+    rng = random.Random(seed)
+    documents = []
+    for index in range(count):
+        moment = START + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        encoded = [moment, moment.isoformat().replace("+00:00", "Z"), {"$date": moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")}][index % 3]
+        documents.append(
+            {
+                "id": f"i{index}",
+                "athleteId": rng.choice([372001, "i372001", "i555"]),
+                "date": encoded,
+                "type": rng.choice(["Run", "Ride", "WeightTraining"]),
+                "duration": rng.randrange(600, 9000),
+                "distance": rng.choice([None, rng.uniform(1000, 40000)]),
+                "trimp": rng.uniform(1, 200),
+                "interval_summary": ["3x1km"],
+            }
+        )
+    return documents
+
+
+def as_utc(value: object) -> datetime:
+    if isinstance(value, dict):
+        value = value["$date"]
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value
+
+
+class ColumnarStoreUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.store = ColumnarStore(self.tmp / "store")
+
+    def test_range_scans_match_brute_force(self) -> None:
+        documents = shaped_activities(3000)
+        stats = export_documents(self.store, "activities", documents, batch_size=700)
+        self.assertEqual(stats["rows"], 3000)
+        self.assertGreaterEqual(len(self.store.partitions("activities")), 52)
+
+        rng = random.Random(2)
+        for _ in range(25):
+            start = START + timedelta(days=rng.randrange(365))
+            end = start + timedelta(days=rng.randrange(1, 60))
+            athlete = rng.choice([None, 372001, "i372001", "i555"])
+            scan = self.store.scan("activities", start, end, athlete_id=athlete, fields=["id", "trimp"])
+            expected = sorted(
+                (as_utc(doc["date"]), doc["id"], doc["trimp"])
+                for doc in documents
+                if start <= as_utc(doc["date"]) < end and (athlete is None or str(doc["athleteId"]) == str(athlete))
+            )
+            actual = sorted(
+                (datetime.fromtimestamp(ms / 1000, timezone.utc), row_id, trimp)
+                for ms, row_id, trimp in zip(scan["time"].astype("int64").tolist(), scan["id"].tolist(), scan["trimp"].tolist())
+            )
+            self.assertEqual(actual, expected)
+            if athlete is not None:
+                self.assertTrue(np.all(scan["time"][1:] >= scan["time"][:-1]))
+
+        everything = self.store.scan("activities")
+        self.assertEqual(len(everything["id"]), 3000)
+        self.assertEqual(int(np.isnan(everything["distance"]).sum()), sum(doc["distance"] is None for doc in documents))
+
+    def test_scan_opens_only_matching_weeks(self) -> None:
+        export_documents(self.store, "activities", shaped_activities(2000))
+        with mock.patch.object(ColumnarStore, "_load_partition", wraps=self.store._load_partition) as load:
+            scan = self.store.scan("activities", date(2025, 3, 3), date(2025, 3, 17), athlete_id="i555")
+        self.assertEqual(sorted({call.args[1] for call in load.call_args_list}), ["2025-03-03", "2025-03-10"])
+        self.assertTrue(set(scan) >= {"time", "id", "athleteId", "trimp"})
+        self.assertEqual(set(scan["athleteId"].tolist()), {"i555"})
+        empty = self.store.scan("activities", date(2030, 1, 1), fields=["distance"])
+        self.assertEqual((empty["time"].dtype, empty["distance"].dtype, len(empty["distance"])), (np.dtype("datetime64[ms]"), np.float64, 0))
+
+    def test_upsert_moves_rows_between_weeks(self) -> None:
+        base = {"athleteId": "i372001", "type": "Run", "duration": 3600}
+        self.store.write("activities", [{**base, "id": "a", "date": "2025-03-04T07:00:00Z"}, {**base, "id": "b", "date": "2025-03-05T07:00:00Z"}])
+        stats = self.store.write(
+            "activities",
+            [{**base, "id": "a", "date": "2025-03-12T07:00:00Z", "duration": 1}, {**base, "id": "a", "date": "2025-03-12T07:00:00Z", "duration": 2}],
+        )
+        self.assertEqual(stats["partitions"], 2)
+        manifest = self.store.manifest("activities")["partitions"]
+        self.assertEqual({week: info["rows"] for week, info in manifest.items()}, {"2025-03-03": 1, "2025-03-10": 1})
+        self.assertEqual(self.store.scan("activities", "2025-03-10", fields=["duration"])["duration"].tolist(), [2.0])
+
+        self.store.write("activities", [{**base, "id": "b", "date": "2025-03-13T07:00:00Z"}, {**base, "id": "c", "date": None}])
+        self.assertEqual(self.store.partitions("activities"), ["2025-03-10"])
+        with self.assertRaises(ValueError):
+            ColumnarStore(self.tmp / "store", "UTC").scan("activities")
+
+    def test_writes_open_only_indexed_weeks(self) -> None:
+        documents = shaped_activities(2000)
+        export_documents(self.store, "activities", documents, batch_size=500)
+        moved = {**documents[0], "date": "2025-03-12T07:00:00+00:00", "trimp": 1.0}
+        fresh = {**documents[1], "id": "new-activity", "date": "2025-03-13T07:00:00+00:00"}
+        stored = len(self.store.scan("activities", fields=["id"])["id"])
+        old_week = next(
+            week
+            for week in self.store.partitions("activities")
+            if moved["id"] in np.load(self.store.root / "activities" / week / "id.npy").tolist()
+        )
+        with mock.patch.object(ColumnarStore, "_load_partition", wraps=self.store._load_partition) as load:
+            self.store.write("activities", [moved, fresh])
+        opened = {call.args[1] for call in load.call_args_list}
+        self.assertEqual(opened, {old_week, "2025-03-10"})
+        self.assertEqual(len(self.store.scan("activities", fields=["id"])["id"]), stored + 1)
+        march = self.store.scan("activities", "2025-03-12", "2025-03-13", athlete_id=moved["athleteId"], fields=["id", "trimp"])
+        self.assertIn(moved["id"], march["id"].tolist())
+
+        # A lost index is rebuilt from the partitions and gives the same result.
+        index = self.store.root / "activities" / "index"
+        before = {name: np.load(index / f"{name}.npy") for name in ("key", "week")}
+        for path in index.iterdir():
+            path.unlink()
+        self.store.write("activities", [moved])
+        for name, values in before.items():
+            np.testing.assert_array_equal(np.load(index / f"{name}.npy"), values)
+
+    def test_exports_mongo_collection_and_json_dumps(self) -> None:
+        wellness = [
+            {"id": (date(2025, 3, 1) + timedelta(days=day)).isoformat(), "athleteId": "i372001", "date": datetime(2025, 3, 1) + timedelta(days=day, hours=7), "ctl": 50 + day, "hrv": None}
+            for day in range(21)
+        ]
+        collection = mongomock.MongoClient().db["wellness"]
+        collection.insert_many([dict(entry) for entry in wellness])
+        self.assertEqual(export_collection(collection, self.store, "wellness")["rows"], 21)
+        # Wellness is placed by its day id; 2025-03-01/02 belong to the week of Monday 2025-02-24.
+        self.assertEqual(self.store.partitions("wellness"), ["2025-02-24", "2025-03-03", "2025-03-10", "2025-03-17"])
+        week = self.store.scan("wellness", date(2025, 3, 3), date(2025, 3, 10), fields=["id", "ctl", "date"])
+        self.assertEqual(week["id"].tolist(), [f"2025-03-{day:02d}" for day in range(3, 10)])
+        self.assertEqual(week["date"][0], np.datetime64("2025-03-03T07:00:00.000"))
+
+        documents = shaped_activities(5)
+        for entry in documents:
+            entry["date"] = as_utc(entry["date"]).isoformat()
+        lines = self.tmp / "activities.jsonl"
+        lines.write_text("\n".join(json.dumps(entry) for entry in documents) + "\n\n")
+        array = self.tmp / "activities.json"
+        array.write_text(json.dumps(documents, indent=2))
+        self.assertEqual(list(read_json_documents(lines)), documents)
+        self.assertEqual(list(read_json_documents(array)), documents)
+
+
+if __name__ == "__main__":
+    unittest.main()
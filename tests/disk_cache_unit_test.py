@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import DiskCache
+
+
+class DiskCacheUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = Path(tempfile.mkdtemp()) / "cache.sqlite"
+
+    def test_round_trip_persists_across_reopen(self) -> None:
+        with DiskCache(self.path) as cache:
+            cache.set("a", {"status": "pass", "errors": []})
+            self.assertIsNone(cache.get("missing"))
+        with DiskCache(self.path) as cache:
+            self.assertEqual(cache.get("a"), {"status": "pass", "errors": []})
+            self.assertEqual(cache.count(), 1)
+
+    def test_evicts_least_recently_used_beyond_max_entries(self) -> None:
+        with DiskCache(self.path, max_entries=2) as cache:
+            cache.set("a", 1)
+            time.sleep(0.01)
+            cache.set("b", 2)
+            time.sleep(0.01)
+            cache.get("a")
+            time.sleep(0.01)
+            cache.set("c", 3)
+            self.assertEqual(cache.get_many(["a", "b", "c"]), {"a": 1, "c": 3})
+            self.assertEqual(cache.count(), 2)
+
+    def test_evicts_beyond_max_bytes(self) -> None:
+        with DiskCache(self.path, max_bytes=20) as cache:
+            cache.set("a", "x" * 10)
+            time.sleep(0.01)
+            cache.set("b", "y" * 10)
+            self.assertEqual(set(cache.get_many(["a", "b"])), {"b"})
+            self.assertLessEqual(cache.size_bytes(), 20)
+
+    def test_replacing_a_key_keeps_totals_consistent(self) -> None:
+        with DiskCache(self.path) as cache:
+            cache.set("a", "x" * 10)
+            cache.set("a", "x")
+            self.assertEqual(cache.count(), 1)
+            self.assertEqual(cache.size_bytes(), len('"x"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,17 +2,39 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import re
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-
-from jsonschema import Draft202012Validator, FormatChecker
+from typing import Iterable, Iterator, NamedTuple, TypeVar
 
 ROOT = Path(__file__).resolve().parents[1]
-SCHEMA_PATH = ROOT / "schemas" / "weekly_plan.schema.json"
-GOLDEN_WEEKS_SCHEMA_PATH = ROOT / "schemas" / "golden_weeks_dataset.schema.json"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import CACHE_ROOT, DiskCache  # noqa: E402
+from scripts.plan_validation import (  # noqa: E402
+    GOLDEN_WEEKS_SCHEMA_PATH,
+    SCHEMA_PATH,
+    SchemaValidator,
+    format_schema_errors,
+    load_schema_validator,
+)
+
 FIXTURES_DIR = ROOT / "tests" / "fixtures"
 GOLDEN_WEEKS_PATH = FIXTURES_DIR / "golden_weeks_dataset_v1.json"
+DEFAULT_CACHE_PATH = CACHE_ROOT / "eval_harness.sqlite"
+PLAN_KEYS = ("schema_version", "activityPlan", "justification", "extensions")
+# Streaming runs can fail thousands of plans; the summary lists only the first ones.
+MAX_SUMMARY_FAILURES = 50
+
+T = TypeVar("T")
 
 
 HARD_TOKENS = ["z4", "z5", "vo2", "interval", "umbral", "tempo", "threshold"]
@@ -32,6 +54,7 @@ RUN_TOKENS = [
     "trote",
     "continu",
 ]
+REST_INTENSITY_MARKERS = {"-", "--", "—", "–"}
 REQUIRED_DAYS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
 PII_FORBIDDEN_KEYS = {
     "name",
@@ -79,7 +102,83 @@ def contains_token(text: str, tokens: list[str]) -> bool:
     return any(token in text for token in tokens)
 
 
-def guardrail_checks(plan: dict) -> list[str]:
+# Day classification flags (bit set) read by the guardrail and diversity rules.
+DAY_HARD = 1 << 0
+DAY_EASY = 1 << 1
+DAY_REST = 1 << 2
+DAY_LONG = 1 << 3
+DAY_GYM = 1 << 4
+DAY_RUN = 1 << 5
+
+# Flags that may come from the intensity field; everything else is read from
+# the activity/goal/note text only.
+INTENSITY_FLAGS = DAY_HARD | DAY_EASY
+TOKEN_GROUPS = (
+    (DAY_HARD, HARD_TOKENS),
+    (DAY_EASY, EASY_TOKENS),
+    (DAY_REST, REST_TOKENS),
+    (DAY_LONG, LONG_TOKENS),
+    (DAY_GYM, GYM_TOKENS),
+    (DAY_RUN, RUN_TOKENS),
+)
+
+
+def compile_token_classifier(groups: tuple[tuple[int, list[str]], ...]) -> tuple[re.Pattern[str], dict[str, int]]:
+    """Build one regex that reports every token occurrence in a single pass.
+
+    The alternation sits inside a lookahead so matches never consume text and
+    tokens are found at every start position, which gives the same answer as
+    a ``token in text`` scan per token. Two tokens can only match at the same
+    position when one is a prefix of the other; the regex reports the longest,
+    so the flags of its prefixes are folded into it.
+    """
+    token_flags: dict[str, int] = {}
+    for flag, tokens in groups:
+        for token in tokens:
+            token_flags[token] = token_flags.get(token, 0) | flag
+    folded = dict(token_flags)
+    for token in folded:
+        for other, flags in token_flags.items():
+            if other != token and token.startswith(other):
+                folded[token] |= flags
+    alternation = "|".join(re.escape(token) for token in sorted(folded, key=len, reverse=True))
+    return re.compile(f"(?=({alternation}))"), folded
+
+
+TOKEN_PATTERN, TOKEN_FLAGS = compile_token_classifier(TOKEN_GROUPS)
+
+
+@lru_cache(maxsize=65536)
+def classify_text(text: str) -> int:
+    # Model output reuses the same activity/intensity strings heavily, so
+    # repeated texts are answered from the cache without touching the regex.
+    flags = 0
+    for token in TOKEN_PATTERN.findall(text):
+        flags |= TOKEN_FLAGS[token]
+    return flags
+
+
+def activity_text(day: dict) -> str:
+    return f"{day.get('activity','')} {day.get('goal','')} {day.get('note','')}".lower()
+
+
+def classify_day(day: dict) -> int:
+    intensity = day.get("intensity") or ""
+    flags = classify_text(activity_text(day))
+    flags |= classify_text(intensity.lower()) & INTENSITY_FLAGS
+    if intensity.strip() in REST_INTENSITY_MARKERS:
+        flags |= DAY_REST
+    return flags
+
+
+def classify_days(plan: dict) -> list[int] | None:
+    days = plan.get("activityPlan", {}).get("days", [])
+    if not isinstance(days, list) or len(days) != 7:
+        return None
+    return [classify_day(day) for day in days]
+
+
+def guardrail_checks(plan: dict, day_flags: list[int] | None = None) -> list[str]:
     errors: list[str] = []
     days = plan.get("activityPlan", {}).get("days", [])
     if not isinstance(days, list) or len(days) != 7:
@@ -93,52 +192,38 @@ def guardrail_checks(plan: dict) -> list[str]:
         if name not in unique_days:
             errors.append(f"guardrail: missing weekday {name}")
 
-    def activity_text(day: dict) -> str:
-        return f"{day.get('activity','')} {day.get('goal','')} {day.get('note','')}".lower()
+    if day_flags is None:
+        day_flags = [classify_day(day) for day in days]
 
-    def intensity_text(day: dict) -> str:
-        return (day.get("intensity") or "").lower()
+    hard = [bool(flags & DAY_HARD) for flags in day_flags]
 
-    def is_hard(day: dict) -> bool:
-        return contains_token(intensity_text(day), HARD_TOKENS) or contains_token(activity_text(day), HARD_TOKENS)
-
-    def is_easy(day: dict) -> bool:
-        return contains_token(intensity_text(day), EASY_TOKENS) or contains_token(activity_text(day), EASY_TOKENS)
-
-    def is_rest(day: dict) -> bool:
-        return contains_token(activity_text(day), REST_TOKENS) or (day.get("intensity", "").strip() in {"-", "--", "—", "–"})
-
-    def is_long(day: dict) -> bool:
-        return contains_token(activity_text(day), LONG_TOKENS)
-
-    hard_count = sum(1 for day in days if is_hard(day))
+    hard_count = sum(hard)
     if hard_count > 2:
         errors.append(f"guardrail: too many hard sessions ({hard_count} > 2)")
 
     for i in range(1, len(days)):
-        if is_hard(days[i]) and is_hard(days[i - 1]):
+        if hard[i] and hard[i - 1]:
             errors.append(f"guardrail: back-to-back hard sessions (days {i} and {i + 1})")
 
-    if not any(is_rest(day) or is_easy(day) for day in days):
+    if not any(flags & (DAY_REST | DAY_EASY) for flags in day_flags):
         errors.append("guardrail: must include at least one rest or recovery day")
 
-    long_count = sum(1 for day in days if is_long(day))
+    long_count = sum(1 for flags in day_flags if flags & DAY_LONG)
     if long_count > 1:
         errors.append("guardrail: only one long run per week")
 
-    for idx, day in enumerate(days, start=1):
-        if is_long(day) and is_hard(day):
+    for idx, flags in enumerate(day_flags, start=1):
+        if flags & DAY_LONG and flags & DAY_HARD:
             errors.append(f"guardrail: long run cannot be hard intensity (day {idx})")
 
     for name in ["martes", "jueves", "sabado"]:
-        day = next((d for d in days if normalize_day(d.get("day", "")) == name), None)
-        if day and not contains_token(activity_text(day), GYM_TOKENS):
+        if name in unique_days and not day_flags[normalized_days.index(name)] & DAY_GYM:
             errors.append(f"guardrail: {name} should include gym/strength")
 
     return errors
 
 
-def diversity_checks(plan: dict) -> list[str]:
+def diversity_checks(plan: dict, day_flags: list[int] | None = None) -> list[str]:
     errors: list[str] = []
     days = plan.get("activityPlan", {}).get("days", [])
     if not isinstance(days, list) or len(days) != 7:
@@ -149,33 +234,30 @@ def diversity_checks(plan: dict) -> list[str]:
     if len(activities) < 3:
         errors.append("diversity: expected at least 3 unique activity labels")
 
-    def activity_text(day: dict) -> str:
-        return f"{day.get('activity','')} {day.get('goal','')} {day.get('note','')}".lower()
+    if day_flags is None:
+        day_flags = [classify_day(day) for day in days]
 
-    if not any(contains_token(activity_text(day), GYM_TOKENS) for day in days):
+    if not any(flags & DAY_GYM for flags in day_flags):
         errors.append("diversity: expected at least one gym/strength day")
 
-    if not any(contains_token(activity_text(day), RUN_TOKENS) for day in days):
+    if not any(flags & DAY_RUN for flags in day_flags):
         errors.append("diversity: expected at least one run session")
 
     return errors
 
 
-def limit_checks(plan: dict) -> list[str]:
+def serialize_plan(plan: dict) -> str:
+    return json.dumps(plan, ensure_ascii=False, separators=(",", ":"))
+
+
+def limit_checks(plan: dict, serialized: str | None = None) -> list[str]:
     errors: list[str] = []
-    serialized = json.dumps(plan, ensure_ascii=False, separators=(",", ":"))
+    if serialized is None:
+        serialized = serialize_plan(plan)
     if len(serialized) > 3000:
         errors.append("limits: serialized plan exceeds 3000 characters")
     return errors
 
-def format_schema_errors(errors: list) -> list[str]:
-    formatted: list[str] = []
-    for err in sorted(errors, key=lambda item: list(item.absolute_path)):
-        path = ".".join(str(part) for part in err.absolute_path) or "<root>"
-        formatted.append(f"{path}: {err.message}")
-    return formatted
-
-
 def check_status(errors: list[str]) -> str:
     return "pass" if not errors else "fail"
 
@@ -195,19 +277,303 @@ def _collect_forbidden_paths(payload: object, prefix: str = "") -> list[str]:
     return matches
 
 
-def golden_weeks_checks() -> tuple[list[str], dict | None]:
-    errors: list[str] = []
-    metadata: dict | None = None
+def check_report(errors: list[str]) -> dict:
+    return {
+        "status": check_status(errors),
+        "errorCount": len(errors),
+        "errors": errors,
+    }
+
+
+def evaluate_plan(
+    name: str,
+    data: object,
+    validator: SchemaValidator,
+    parse_error: str | None = None,
+) -> dict:
+    """Run schema, guardrail, diversity and limit checks for a single plan.
+
+    The plan is serialized once; the serialized length is returned alongside
+    the fixture report so callers can aggregate it without re-encoding.
+    """
+    if parse_error:
+        schema_errors = [f"<root>: {parse_error}"]
+    else:
+        schema_errors = validator.errors(data)
+    guardrail_errors: list[str] = []
+    diversity_errors: list[str] = []
+    limit_errors: list[str] = []
+    length: int | None = None
+    if not schema_errors:
+        serialized = serialize_plan(data)
+        day_flags = classify_days(data)
+        guardrail_errors = guardrail_checks(data, day_flags)
+        diversity_errors = diversity_checks(data, day_flags)
+        limit_errors = limit_checks(data, serialized)
+        length = len(serialized)
+    all_errors = schema_errors + guardrail_errors + diversity_errors + limit_errors
+
+    return {
+        "fixture": name,
+        "status": check_status(all_errors),
+        "checks": {
+            "schema": check_report(schema_errors),
+            "guardrails": check_report(guardrail_errors),
+            "diversity": check_report(diversity_errors),
+            "limits": check_report(limit_errors),
+        },
+        "errors": all_errors,
+        "length": length if not all_errors else None,
+    }
+
+
+def extract_plan(record: object) -> object:
+    """Return the WeeklyPlan payload stored in an exported Mongo document.
+
+    ``run_artifacts`` keep the plan under ``outputValidated``; ``plan_snapshots``
+    store it flattened next to run metadata. Anything else is treated as a
+    bare WeeklyPlan.
+    """
+    if not isinstance(record, dict):
+        return record
+    if "outputValidated" in record:
+        return record["outputValidated"]
+    if "activityPlan" in record and "runId" in record:
+        return {key: record[key] for key in PLAN_KEYS if key in record}
+    return record
+
+
+class PlanSource(NamedTuple):
+    """One plan to evaluate: a fixture file's text or a raw JSONL dump line."""
 
+    name: str
+    text: str
+    is_record: bool = False
+
+
+def iter_fixture_sources(paths: Iterable[Path]) -> Iterator[PlanSource]:
+    for path in paths:
+        yield PlanSource(path.name, path.read_text())
+
+
+def iter_jsonl_sources(path: Path) -> Iterator[PlanSource]:
+    """Yield one source per non-blank line of a JSONL dump."""
+    with path.open(encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if line.strip():
+                yield PlanSource(f"{path.name}:{line_number}", line, is_record=True)
+
+
+def result_cache_key(source: PlanSource, salt: str) -> str:
+    kind = "record" if source.is_record else "plan"
+    return hashlib.sha256(f"{salt}\0{kind}\0{source.text}".encode("utf-8")).hexdigest()
+
+
+def fixture_label(result: dict) -> str:
+    return f"{result['fixture']} ({result['runId']})" if result.get("runId") else result["fixture"]
+
+
+_WORKER_VALIDATOR: SchemaValidator | None = None
+
+
+def _init_worker() -> None:
+    global _WORKER_VALIDATOR
+    _WORKER_VALIDATOR = load_schema_validator(SCHEMA_PATH)
+
+
+def _evaluate_source(source: PlanSource) -> dict:
+    assert _WORKER_VALIDATOR is not None
+    try:
+        record = json.loads(source.text)
+    except json.JSONDecodeError as exc:
+        return evaluate_plan(source.name, None, _WORKER_VALIDATOR, parse_error=f"invalid JSON ({exc.msg})")
+    if not source.is_record:
+        return evaluate_plan(source.name, record, _WORKER_VALIDATOR)
+    result = evaluate_plan(source.name, extract_plan(record), _WORKER_VALIDATOR)
+    if isinstance(record, dict) and record.get("runId"):
+        result["runId"] = record["runId"]
+    return result
+
+
+def _evaluate_batch(batch: list[PlanSource]) -> list[dict]:
+    return [_evaluate_source(source) for source in batch]
+
+
+def _batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _completed(value: T) -> Future[T]:
+    future: Future[T] = Future()
+    future.set_result(value)
+    return future
+
+
+def evaluate_items(
+    sources: Iterable[PlanSource],
+    workers: int = 1,
+    batch_size: int = 64,
+    cache: DiskCache | None = None,
+    cache_salt: str = "",
+    stats: dict[str, int] | None = None,
+) -> Iterator[dict]:
+    """Evaluate plan sources, in a process pool when ``workers > 1``.
+
+    Results are yielded lazily in input order regardless of which worker
+    finished first, so reports stay deterministic. At most a few batches per
+    worker are in flight, which keeps memory flat for arbitrarily long inputs.
+
+    With a ``cache``, sources whose content (plus ``cache_salt``) was evaluated
+    before are answered from it and only the remaining ones are dispatched.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("cacheHits", 0)
+    stats.setdefault("cacheMisses", 0)
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    if executor is None:
+        _init_worker()
+
+    def submit(batch: list[PlanSource]) -> tuple[list[PlanSource], list[str], dict, Future[list[dict]]]:
+        keys = [result_cache_key(source, cache_salt) for source in batch] if cache is not None else []
+        hits = cache.get_many(keys) if cache is not None else {}
+        misses = [source for index, source in enumerate(batch) if not keys or keys[index] not in hits]
+        if executor is None:
+            return batch, keys, hits, _completed(_evaluate_batch(misses))
+        return batch, keys, hits, executor.submit(_evaluate_batch, misses)
+
+    def collect(entry: tuple[list[PlanSource], list[str], dict, Future[list[dict]]]) -> list[dict]:
+        batch, keys, hits, future = entry
+        fresh = iter(future.result())
+        results: list[dict] = []
+        new_entries: dict[str, dict] = {}
+        for index, source in enumerate(batch):
+            key = keys[index] if keys else None
+            if key in hits:
+                stats["cacheHits"] += 1
+                results.append({"fixture": source.name, **hits[key]})
+                continue
+            stats["cacheMisses"] += 1
+            result = next(fresh)
+            if key is not None:
+                new_entries[key] = {k: v for k, v in result.items() if k != "fixture"}
+            results.append(result)
+        if cache is not None:
+            cache.set_many(new_entries)
+        return results
+
+    try:
+        pending: deque = deque()
+        for batch in _batched(sources, batch_size):
+            pending.append(submit(batch))
+            if len(pending) >= max(workers, 1) * 2:
+                yield from collect(pending.popleft())
+        while pending:
+            yield from collect(pending.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    try:
+        index_text, count_text = value.split("/", 1)
+        index, count = int(index_text), int(count_text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard {value!r}; expected i/n") from None
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"invalid shard {value!r}; expected 1 <= i <= n")
+    return index, count
+
+
+def select_shard(items: Iterable[T], shard: tuple[int, int]) -> Iterator[T]:
+    index, count = shard
+    return islice(items, index - 1, None, count)
+
+
+@lru_cache(maxsize=1)
+def rules_fingerprint() -> str:
+    """Digest of the rule tables and the harness/validation source; part of every cache key.
+
+    Any edit to the rules or report shapes changes it, so cached results from
+    older rules are never reused.
+    """
+    parts = [
+        Path(__file__).read_text(encoding="utf-8"),
+        (ROOT / "scripts" / "plan_validation.py").read_text(encoding="utf-8"),
+        TOKEN_PATTERN.pattern,
+        json.dumps(sorted(TOKEN_FLAGS.items())),
+        json.dumps([sorted(REST_INTENSITY_MARKERS), REQUIRED_DAYS, sorted(PII_FORBIDDEN_KEYS), list(PLAN_KEYS)]),
+    ]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def golden_weeks_cache_key(text: str, schema_hash: str) -> str:
+    return hashlib.sha256(f"{rules_fingerprint()}\0golden\0{schema_hash}\0{text}".encode("utf-8")).hexdigest()
+
+
+def golden_weeks_checks(cache: DiskCache | None = None) -> tuple[list[str], dict | None]:
     if not GOLDEN_WEEKS_PATH.exists():
         return ["golden_weeks: missing tests/fixtures/golden_weeks_dataset_v1.json"], None
     if not GOLDEN_WEEKS_SCHEMA_PATH.exists():
         return ["golden_weeks: missing schemas/golden_weeks_dataset.schema.json"], None
 
-    schema = load_json(GOLDEN_WEEKS_SCHEMA_PATH)
-    dataset = load_json(GOLDEN_WEEKS_PATH)
-    validator = Draft202012Validator(schema, format_checker=FormatChecker())
-    schema_errors = format_schema_errors(list(validator.iter_errors(dataset)))
+    text = GOLDEN_WEEKS_PATH.read_text()
+    validator = load_schema_validator(GOLDEN_WEEKS_SCHEMA_PATH)
+    key = golden_weeks_cache_key(text, validator.schema_hash)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached["errors"], cached["metadata"]
+
+    errors, metadata = golden_weeks_dataset_checks(json.loads(text), validator)
+    if cache is not None:
+        cache.set(key, {"errors": errors, "metadata": metadata})
+    return errors, metadata
+
+
+def iter_golden_weeks_checks(
+    sources: Iterable[PlanSource],
+    cache: DiskCache | None = None,
+    stats: dict[str, int] | None = None,
+    batch_size: int = 64,
+) -> Iterator[tuple[str, list[str], dict | None]]:
+    """Check golden-weeks datasets streamed one per source, yielding ``(name, errors, metadata)`` in order.
+
+    Used for the JSON Lines written by ``tests/golden_weeks_generator.py``;
+    cache lookups and writes are batched like ``evaluate_items``.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("cacheHits", 0)
+    stats.setdefault("cacheMisses", 0)
+    validator = load_schema_validator(GOLDEN_WEEKS_SCHEMA_PATH)
+    for batch in _batched(sources, batch_size):
+        keys = [golden_weeks_cache_key(source.text, validator.schema_hash) for source in batch]
+        hits = cache.get_many(keys) if cache is not None else {}
+        results: list[tuple[str, list[str], dict | None]] = []
+        new_entries: dict[str, dict] = {}
+        for source, key in zip(batch, keys):
+            if key in hits:
+                stats["cacheHits"] += 1
+                results.append((source.name, hits[key]["errors"], hits[key]["metadata"]))
+                continue
+            stats["cacheMisses"] += 1
+            try:
+                dataset = json.loads(source.text)
+            except json.JSONDecodeError as exc:
+                errors, metadata = [f"golden_weeks: invalid JSON ({exc.msg})"], None
+            else:
+                errors, metadata = golden_weeks_dataset_checks(dataset, validator)
+            new_entries[key] = {"errors": errors, "metadata": metadata}
+            results.append((source.name, errors, metadata))
+        if cache is not None:
+            cache.set_many(new_entries)
+        yield from results
+
+
+def golden_weeks_dataset_checks(dataset: dict, validator: SchemaValidator) -> tuple[list[str], dict | None]:
+    errors: list[str] = []
+    schema_errors = validator.errors(dataset)
     if schema_errors:
         return [f"golden_weeks: schema validation failed: {schema_errors[0]}"], None
 
@@ -243,87 +609,155 @@ def golden_weeks_checks() -> tuple[list[str], dict | None]:
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--summary", help="Write markdown summary to this path.")
-    parser.add_argument("--report", help="Write machine-readable JSON report to this path.")
+    parser.add_argument(
+        "--report",
+        help="Write machine-readable JSON report to this path (JSONL, one line per plan, with --input).",
+    )
+    parser.add_argument(
+        "--input",
+        help="Stream plans from a JSONL dump (bare WeeklyPlans, run_artifacts or plan_snapshots) "
+        "instead of tests/fixtures.",
+    )
+    parser.add_argument(
+        "--golden-weeks",
+        help="Check the golden-weeks datasets in this JSONL (one dataset per line, as written by "
+        "tests/golden_weeks_generator.py) instead of tests/fixtures/golden_weeks_dataset_v1.json.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Evaluate fixtures in a pool of N processes (default: 1, in-process).",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=(1, 1),
+        help="Only evaluate shard i of n (1-based, round-robin over sorted fixtures).",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(DEFAULT_CACHE_PATH),
+        help="Result cache file; unchanged fixtures are not re-checked (default: %(default)s).",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Re-check every input from scratch.")
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=200_000,
+        help="Evict least recently used results beyond this many entries.",
+    )
     args = parser.parse_args()
 
-    schema = load_json(SCHEMA_PATH)
-    validator = Draft202012Validator(schema, format_checker=FormatChecker())
-
-    valid_paths = sorted(FIXTURES_DIR.glob("weekly_plan_valid_*.json"))
-    golden = FIXTURES_DIR / "golden_weekly_plan_snapshot.json"
-    if golden.exists():
-        valid_paths.append(golden)
+    sources: Iterable[PlanSource]
+    if args.input:
+        sources = iter_jsonl_sources(Path(args.input))
+    else:
+        valid_paths = sorted(FIXTURES_DIR.glob("weekly_plan_valid_*.json"))
+        golden = FIXTURES_DIR / "golden_weekly_plan_snapshot.json"
+        if golden.exists():
+            valid_paths.append(golden)
+        sources = iter_fixture_sources(valid_paths)
+    sources = select_shard(sources, args.shard)
+
+    # Results depend on the input content, the schema and the harness rules;
+    # all three are part of every cache key.
+    cache = None if args.no_cache else DiskCache(Path(args.cache), max_entries=args.cache_max_entries)
+    cache_salt = f"{rules_fingerprint()}\0{load_schema_validator(SCHEMA_PATH).schema_hash}"
+    cache_stats: dict[str, int] = {}
+
+    # Streaming mode writes each fixture report as soon as it is evaluated
+    # and keeps only counters in memory.
+    stream_report = None
+    if args.input and args.report:
+        report_path = Path(args.report)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        stream_report = report_path.open("w", encoding="utf-8")
 
     failures: list[str] = []
-    lengths: list[int] = []
+    failure_total = 0
+    length_total = 0
+    length_count = 0
+    weekly_fixture_total = 0
     fixture_reports: list[dict] = []
     check_failures = {"schema": 0, "guardrails": 0, "diversity": 0, "limits": 0}
 
-    for path in valid_paths:
-        data = load_json(path)
-        schema_errors = format_schema_errors(list(validator.iter_errors(data)))
-        guardrail_errors = guardrail_checks(data) if not schema_errors else []
-        diversity_errors = diversity_checks(data) if not schema_errors else []
-        limit_errors = limit_checks(data) if not schema_errors else []
-        all_errors = schema_errors + guardrail_errors + diversity_errors + limit_errors
-
-        if schema_errors:
-            check_failures["schema"] += 1
-        if guardrail_errors:
-            check_failures["guardrails"] += 1
-        if diversity_errors:
-            check_failures["diversity"] += 1
-        if limit_errors:
-            check_failures["limits"] += 1
-
-        if all_errors:
-            failures.append(f"{path.name}: " + "; ".join(all_errors))
+    for result in evaluate_items(
+        sources,
+        workers=args.workers,
+        cache=cache,
+        cache_salt=cache_salt,
+        stats=cache_stats,
+    ):
+        weekly_fixture_total += 1
+        for check, report in result["checks"].items():
+            if report["errorCount"]:
+                check_failures[check] += 1
+
+        if result["errors"]:
+            failure_total += 1
+            if not args.input or len(failures) < MAX_SUMMARY_FAILURES:
+                failures.append(f"{fixture_label(result)}: " + "; ".join(result["errors"]))
         else:
-            lengths.append(len(json.dumps(data, ensure_ascii=False, separators=(",", ":"))))
-
-        fixture_reports.append(
-            {
-                "fixture": path.name,
-                "status": check_status(all_errors),
-                "checks": {
-                    "schema": {
-                        "status": check_status(schema_errors),
-                        "errorCount": len(schema_errors),
-                        "errors": schema_errors,
-                    },
-                    "guardrails": {
-                        "status": check_status(guardrail_errors),
-                        "errorCount": len(guardrail_errors),
-                        "errors": guardrail_errors,
-                    },
-                    "diversity": {
-                        "status": check_status(diversity_errors),
-                        "errorCount": len(diversity_errors),
-                        "errors": diversity_errors,
-                    },
-                    "limits": {
-                        "status": check_status(limit_errors),
-                        "errorCount": len(limit_errors),
-                        "errors": limit_errors,
-                    },
-                },
-            }
+            length_total += result["length"]
+            length_count += 1
+
+        fixture_report = {
+            "fixture": fixture_label(result),
+            "status": result["status"],
+            "checks": result["checks"],
+        }
+        if stream_report:
+            stream_report.write(json.dumps(fixture_report, ensure_ascii=False) + "\n")
+        elif not args.input:
+            fixture_reports.append(fixture_report)
+
+    if args.golden_weeks:
+        # Every generated dataset is one check; lines are sharded like the plans.
+        golden_checks = 0
+        golden_failed = 0
+        golden_errors: list[str] = []
+        golden_versions: set[str] = set()
+        golden_fixtures = 0
+        golden_sources = select_shard(iter_jsonl_sources(Path(args.golden_weeks)), args.shard)
+        for name, errors, metadata in iter_golden_weeks_checks(golden_sources, cache, cache_stats):
+            golden_checks += 1
+            if metadata:
+                golden_versions.add(metadata["datasetVersion"])
+                golden_fixtures += metadata["fixtureCount"]
+            if errors:
+                golden_failed += 1
+                if len(golden_errors) < MAX_SUMMARY_FAILURES:
+                    golden_errors.append(f"{name}: " + "; ".join(errors))
+        golden_meta = (
+            {"datasetVersion": ", ".join(sorted(golden_versions)), "fixtureCount": golden_fixtures}
+            if golden_versions
+            else None
+        )
+    else:
+        # The golden weeks dataset is a single check; only the first shard runs it.
+        golden_checks = 1 if args.shard[0] == 1 else 0
+        golden_errors, golden_meta = golden_weeks_checks(cache) if golden_checks else ([], None)
+        golden_failed = len(golden_errors)
+    if cache is not None:
+        cache.close()
+        print(
+            f"Result cache: {cache_stats['cacheHits']} hits, {cache_stats['cacheMisses']} re-checked",
+            file=sys.stderr,
         )
-
-    golden_errors, golden_meta = golden_weeks_checks()
     failures.extend(golden_errors)
-    golden_ok = not golden_errors
+    failure_total += golden_failed
+    golden_ok = not golden_failed
 
-    weekly_fixture_total = len(valid_paths)
-    total_checks = weekly_fixture_total + 1  # golden weeks dataset validation
-    failed = len(failures)
+    total_checks = weekly_fixture_total + golden_checks
+    failed = failure_total
     passed = total_checks - failed
     quality_check_failure_rate = (failed / total_checks) if total_checks else 0.0
 
     lines = [
         "## Evaluation Harness",
         f"- Weekly plan fixtures checked: {weekly_fixture_total}",
-        "- Golden weeks checks: 1",
+        f"- Golden weeks checks: {golden_checks}",
         f"- Passed: {passed}",
         f"- Failed: {failed}",
         f"- quality_check_failure_rate: {quality_check_failure_rate:.4f}",
@@ -332,18 +766,24 @@ def main() -> int:
         f"- Diversity failures: {check_failures['diversity']}",
         f"- Limits failures: {check_failures['limits']}",
     ]
-    if lengths:
-        avg = sum(lengths) / len(lengths)
+    if length_count:
+        avg = length_total / length_count
         lines.append(f"- Average JSON length: {avg:.1f} chars")
-    lines.append(f"- Golden weeks dataset check: {'pass' if golden_ok else 'fail'}")
+    if args.shard != (1, 1):
+        lines.append(f"- Shard: {args.shard[0]}/{args.shard[1]}")
+    if golden_checks:
+        lines.append(f"- Golden weeks dataset check: {'pass' if golden_ok else 'fail'}")
     if golden_meta:
         lines.append(f"- Golden weeks dataset version: {golden_meta['datasetVersion']}")
         lines.append(f"- Golden weeks fixture count: {golden_meta['fixtureCount']}")
-        lines.append("- Golden weeks fixture IDs: " + ", ".join(golden_meta["fixtureIds"]))
+        if "fixtureIds" in golden_meta:
+            lines.append("- Golden weeks fixture IDs: " + ", ".join(golden_meta["fixtureIds"]))
 
     if failures:
         lines.append("\n### Failures")
         lines.extend([f"- {item}" for item in failures])
+        if failure_total > len(failures):
+            lines.append(f"- ... and {failure_total - len(failures)} more (see report)")
 
     summary = "\n".join(lines) + "\n"
     print(summary)
@@ -355,7 +795,8 @@ def main() -> int:
         "generatedAt": datetime.now(timezone.utc).isoformat(),
         "summary": {
             "weeklyFixturesChecked": weekly_fixture_total,
-            "goldenWeeksChecks": 1,
+            "goldenWeeksChecks": golden_checks,
+            "shard": {"index": args.shard[0], "count": args.shard[1]},
             "checksTotal": total_checks,
             "passed": passed,
             "failed": failed,
@@ -363,14 +804,17 @@ def main() -> int:
             "checkFailures": check_failures,
             "goldenWeeks": {
                 "status": "pass" if golden_ok else "fail",
-                "errorCount": len(golden_errors),
+                "errorCount": golden_failed,
                 "errors": golden_errors,
                 "metadata": golden_meta,
             },
         },
-        "fixtures": fixture_reports,
     }
-    if args.report:
+    if stream_report:
+        stream_report.write(json.dumps(report_payload) + "\n")
+        stream_report.close()
+    elif args.report:
+        report_payload["fixtures"] = fixture_reports
         report_path = Path(args.report)
         report_path.parent.mkdir(parents=True, exist_ok=True)
         report_path.write_text(json.dumps(report_payload, indent=2))
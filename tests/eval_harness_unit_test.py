@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import DiskCache
+from tests import eval_harness
+from tests.golden_weeks_generator import iter_datasets, write_datasets
+from tests.eval_harness import (
+    DAY_EASY,
+    DAY_GYM,
+    DAY_HARD,
+    DAY_LONG,
+    DAY_REST,
+    DAY_RUN,
+    EASY_TOKENS,
+    FIXTURES_DIR,
+    GYM_TOKENS,
+    HARD_TOKENS,
+    LONG_TOKENS,
+    REST_TOKENS,
+    RUN_TOKENS,
+    PlanSource,
+    activity_text,
+    classify_day,
+    contains_token,
+    evaluate_items,
+    fixture_label,
+    iter_fixture_sources,
+    iter_jsonl_sources,
+    parse_shard,
+    rules_fingerprint,
+    select_shard,
+)
+
+
+class EvalHarnessCacheUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_path = Path(tempfile.mkdtemp()) / "results.sqlite"
+        self.sources = list(iter_fixture_sources(sorted(FIXTURES_DIR.glob("weekly_plan_*.json"))))
+
+    def run_harness(self, sources: list[PlanSource], salt: str = "rules") -> tuple[list[dict], dict]:
+        stats: dict[str, int] = {}
+        with DiskCache(self.cache_path) as cache:
+            results = list(evaluate_items(sources, cache=cache, cache_salt=salt, stats=stats))
+        return results, stats
+
+    def test_warm_run_matches_cold_run_without_rechecking(self) -> None:
+        cold, cold_stats = self.run_harness(self.sources)
+        warm, warm_stats = self.run_harness(self.sources)
+        self.assertEqual(cold, warm)
+        self.assertEqual(cold_stats["cacheMisses"], len(self.sources))
+        self.assertEqual(warm_stats, {"cacheHits": len(self.sources), "cacheMisses": 0})
+        self.assertEqual(cold, list(evaluate_items(self.sources)))
+
+    def test_only_changed_inputs_or_new_rules_are_rechecked(self) -> None:
+        self.run_harness(self.sources)
+
+        plan = json.loads(self.sources[0].text)
+        plan["justification"] = ["Changed."]
+        changed = [self.sources[0]._replace(text=json.dumps(plan)), *self.sources[1:]]
+        _, stats = self.run_harness(changed)
+        self.assertEqual(stats, {"cacheHits": len(self.sources) - 1, "cacheMisses": 1})
+
+        _, stats = self.run_harness(changed, salt="rules-v2")
+        self.assertEqual(stats, {"cacheHits": 0, "cacheMisses": len(self.sources)})
+
+    def test_rules_fingerprint_follows_the_rule_tables(self) -> None:
+        rules_fingerprint.cache_clear()
+        self.addCleanup(rules_fingerprint.cache_clear)
+        current = rules_fingerprint()
+        self.assertEqual(rules_fingerprint(), current)
+
+        rules_fingerprint.cache_clear()
+        with mock.patch.object(eval_harness, "REQUIRED_DAYS", eval_harness.REQUIRED_DAYS[:-1]):
+            self.assertNotEqual(rules_fingerprint(), current)
+        rules_fingerprint.cache_clear()
+        with mock.patch.object(eval_harness, "TOKEN_FLAGS", {**eval_harness.TOKEN_FLAGS, "sprint": 1}):
+            self.assertNotEqual(rules_fingerprint(), current)
+
+
+def token_scan_flags(day: dict) -> int:
+    """Day flags as the per-token ``contains_token`` scans computed them before the compiled classifier."""
+    activity = activity_text(day)
+    intensity = (day.get("intensity") or "").lower()
+    flags = 0
+    if contains_token(intensity, HARD_TOKENS) or contains_token(activity, HARD_TOKENS):
+        flags |= DAY_HARD
+    if contains_token(intensity, EASY_TOKENS) or contains_token(activity, EASY_TOKENS):
+        flags |= DAY_EASY
+    if contains_token(activity, REST_TOKENS) or (day.get("intensity") or "").strip() in {"-", "--", "—", "–"}:
+        flags |= DAY_REST
+    for flag, tokens in ((DAY_LONG, LONG_TOKENS), (DAY_GYM, GYM_TOKENS), (DAY_RUN, RUN_TOKENS)):
+        if contains_token(activity, tokens):
+            flags |= flag
+    return flags
+
+
+class EvalHarnessClassifierUnitTests(unittest.TestCase):
+    def test_classifier_matches_the_token_scans(self) -> None:
+        rng = random.Random(7)
+        # Overlapping and prefix tokens glued together, plus near misses.
+        pieces = [*HARD_TOKENS, *EASY_TOKENS, *REST_TOKENS, *LONG_TOKENS, *GYM_TOKENS, *RUN_TOKENS]
+        pieces += ["Z2", "Tempo", "intervalos", "restless", "offset", "longo", "rodajes", "z", "inter", "", "-", " "]
+
+        def text() -> str:
+            return rng.choice(["", " ", "-"]).join(rng.choice(pieces) for _ in range(rng.randint(0, 4)))
+
+        days = [
+            {"activity": text(), "goal": text(), "note": text(), "intensity": rng.choice([text(), "-", " — ", None])}
+            for _ in range(3000)
+        ]
+        for path in sorted(FIXTURES_DIR.glob("weekly_plan_*.json")):
+            days += json.loads(path.read_text()).get("activityPlan", {}).get("days", [])
+        for day in days:
+            self.assertEqual(classify_day(day), token_scan_flags(day), day)
+
+
+class EvalHarnessShardUnitTests(unittest.TestCase):
+    def test_shards_partition_the_input_in_order(self) -> None:
+        items = list(range(23))
+        shards = [list(select_shard(iter(items), (index, 4))) for index in range(1, 5)]
+        self.assertEqual(sorted(item for shard in shards for item in shard), items)
+        self.assertEqual(shards[1], [1, 5, 9, 13, 17, 21])
+        for shard in shards:
+            self.assertEqual(shard, sorted(shard))
+        self.assertEqual(list(select_shard(items, (1, 1))), items)
+
+    def test_invalid_shards_are_rejected(self) -> None:
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for value in ("0/4", "5/4", "1/0", "1", "a/b"):
+            with self.assertRaises(argparse.ArgumentTypeError, msg=value):
+                parse_shard(value)
+
+    def test_parallel_results_keep_input_order(self) -> None:
+        fixtures = list(iter_fixture_sources(sorted(FIXTURES_DIR.glob("weekly_plan_*.json"))))
+        sources = [source._replace(name=f"{index}:{source.name}") for index in range(6) for source in fixtures]
+        serial = list(evaluate_items(sources))
+        parallel = list(evaluate_items(sources, workers=3, batch_size=2))
+        self.assertEqual(parallel, serial)
+        self.assertEqual([result["fixture"] for result in parallel], [source.name for source in sources])
+
+
+class EvalHarnessJsonlUnitTests(unittest.TestCase):
+    def test_jsonl_dumps_report_every_line_by_position(self) -> None:
+        plan = json.loads((FIXTURES_DIR / "weekly_plan_valid_1.json").read_text())
+        lines = [
+            json.dumps(plan),
+            "",
+            "{not json",
+            json.dumps([plan]),
+            json.dumps({"runId": "run-7", "outputValidated": plan}),
+            "   ",
+            json.dumps({"runId": "run-8", "createdAt": "2026-02-02T05:00:00Z", **plan}),
+            json.dumps({"runId": "run-9", "outputValidated": None}),
+        ]
+        path = Path(tempfile.mkdtemp()) / "plans.jsonl"
+        path.write_text("\n".join(lines) + "\n")
+
+        sources = list(iter_jsonl_sources(path))
+        self.assertEqual([source.name for source in sources], [f"plans.jsonl:{line}" for line in (1, 3, 4, 5, 7, 8)])
+        self.assertTrue(all(source.is_record for source in sources))
+
+        results = list(evaluate_items(sources))
+        self.assertEqual([result["status"] for result in results], ["pass", "fail", "fail", "pass", "pass", "fail"])
+        self.assertTrue(results[1]["errors"][0].startswith("<root>: invalid JSON"))
+        self.assertEqual(results[2]["checks"]["schema"]["status"], "fail")
+        self.assertEqual([result.get("runId") for result in results], [None, None, None, "run-7", "run-8", "run-9"])
+        self.assertEqual(fixture_label(results[3]), "plans.jsonl:5 (run-7)")
+        # Snapshot metadata next to the plan does not fail additionalProperties.
+        self.assertEqual(results[4]["errors"], [])
+
+
+class EvalHarnessGoldenWeeksUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        datasets = list(iter_datasets(40, seed=3))
+        oversized = {**datasets[0], "fixtures": datasets[0]["fixtures"] + datasets[0]["fixtures"][:1]}
+        self.path = self.tmp / "golden_weeks.jsonl"
+        with self.path.open("w", encoding="utf-8") as handle:
+            write_datasets(iter(datasets), handle)
+            handle.write(json.dumps(oversized) + "\n{not json\n")
+
+    def run_main(self, *args: str) -> tuple[int, dict, str]:
+        report = self.tmp / "report.json"
+        argv = ["eval_harness.py", "--golden-weeks", str(self.path), "--cache", str(self.tmp / "cache.sqlite")]
+        stderr = io.StringIO()
+        with mock.patch.object(sys, "argv", [*argv, "--report", str(report), *args]):
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+                code = eval_harness.main()
+        return code, json.loads(report.read_text())["summary"], stderr.getvalue()
+
+    def test_generated_jsonl_is_checked_line_by_line(self) -> None:
+        code, summary, _ = self.run_main()
+        self.assertEqual(code, 1)
+        self.assertEqual(summary["goldenWeeksChecks"], 6)
+        golden = summary["goldenWeeks"]
+        self.assertEqual(golden["errorCount"], 2)
+        self.assertEqual(golden["metadata"], {"datasetVersion": "v1", "fixtureCount": 40})
+        self.assertTrue(golden["errors"][0].startswith("golden_weeks.jsonl:5: golden_weeks: schema validation failed"))
+        self.assertTrue(golden["errors"][1].startswith("golden_weeks.jsonl:6: golden_weeks: invalid JSON"))
+
+        _, warm, stderr = self.run_main()
+        self.assertEqual(warm, summary)
+        self.assertRegex(stderr, r"Result cache: \d+ hits, 0 re-checked")
+
+        shards = [self.run_main("--shard", f"{index}/2")[1] for index in (1, 2)]
+        self.assertEqual([shard["goldenWeeksChecks"] for shard in shards], [3, 3])
+        self.assertEqual([shard["goldenWeeks"]["errorCount"] for shard in shards], [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
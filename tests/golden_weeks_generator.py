@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic golden-weeks datasets at any scale.
+
+Every fixture is sampled around one of the personas in
+``tests/fixtures/golden_weeks_dataset_v1.json``: the persona's week is scaled
+by a load factor, activities are dropped or lengthened, wellness days get
+noise, and ``weeklyMetrics`` are recomputed from the sampled activities and
+wellness (run count and time, distance from the persona's pace, wellness
+means). The same seed and arguments always produce the same bytes.
+
+The schema allows 5-10 fixtures per dataset, so output is JSON Lines with one
+complete dataset per line, each of about ``--per-dataset`` fixtures and never
+fewer than 5. Lines are written as they are generated, so memory use does not
+grow with ``--count``.
+
+Usage::
+
+    python3 tests/golden_weeks_generator.py --count 10000 --seed 7 --output /tmp/golden_weeks.jsonl --check
+    python3 tests/eval_harness.py --golden-weeks /tmp/golden_weeks.jsonl --shard 1/4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, TextIO
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.eval_harness import GOLDEN_WEEKS_PATH  # noqa: E402
+
+MIN_FIXTURES_PER_DATASET = 5
+MAX_FIXTURES_PER_DATASET = 10
+# Week starts cycle through ten years from here; unique within every dataset.
+FIRST_WEEK = date(2020, 1, 6)
+WEEK_CYCLE = 520
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+RUN_TYPES = {"easy_run", "tempo", "intervals", "long_run"}
+ADHERENCE_BANDS = ("high", "medium", "low")
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return min(high, max(low, value))
+
+
+def load_personas(path: Path = GOLDEN_WEEKS_PATH) -> tuple[dict, list[dict]]:
+    """The source dataset header and its fixtures, used as persona templates."""
+    dataset = json.loads(path.read_text())
+    return dataset, dataset["fixtures"]
+
+
+def dataset_sizes(count: int, per_dataset: int = MAX_FIXTURES_PER_DATASET) -> list[int]:
+    """Split ``count`` fixtures into datasets of about ``per_dataset``, all within the schema's 5-10 bounds."""
+    if not MIN_FIXTURES_PER_DATASET <= per_dataset <= MAX_FIXTURES_PER_DATASET:
+        raise ValueError(f"per_dataset must be between {MIN_FIXTURES_PER_DATASET} and {MAX_FIXTURES_PER_DATASET}")
+    if count < MIN_FIXTURES_PER_DATASET:
+        raise ValueError(f"count must be at least {MIN_FIXTURES_PER_DATASET}")
+    # Fewer, larger datasets when ``per_dataset`` chunks would leave one below the minimum.
+    datasets = min(math.ceil(count / per_dataset), count // MIN_FIXTURES_PER_DATASET)
+    base, extra = divmod(count, datasets)
+    return [base + 1] * extra + [base] * (datasets - extra)
+
+
+def synthesize_fixture(rng: random.Random, persona: dict, fixture_id: str, week_start: date) -> dict:
+    load = _clamp(rng.gauss(1.0, 0.12), 0.6, 1.5)
+
+    activities = []
+    for template in persona["activities"]:
+        if rng.random() < 0.1:
+            continue
+        activity = {
+            "date": (week_start + timedelta(days=DAYS.index(template["day"]))).isoformat(),
+            "day": template["day"],
+            "activityType": template["activityType"],
+            "durationMin": int(_clamp(round(template["durationMin"] * load * rng.gauss(1.0, 0.08)), 0, 240)),
+            "intensity": template["intensity"],
+        }
+        if "notes" in template and rng.random() < 0.5:
+            activity["notes"] = template["notes"]
+        activities.append(activity)
+    if len(activities) < 3:
+        return synthesize_fixture(rng, persona, fixture_id, week_start)
+
+    wellness = []
+    for offset, template in enumerate(persona["wellness"]):
+        wellness.append(
+            {
+                "date": (week_start + timedelta(days=offset)).isoformat(),
+                "sleepScore": int(_clamp(round(template["sleepScore"] + rng.gauss(0, 4)), 0, 100)),
+                "restHr": int(_clamp(round(template["restHr"] + rng.gauss(0, 2) + (load - 1) * 4), 20, 100)),
+                "hrv": int(_clamp(round(template["hrv"] + rng.gauss(0, 5) - (load - 1) * 10), 10, 220)),
+                "energy": int(_clamp(template["energy"] + rng.choice((-1, 0, 0, 1)), 1, 5)),
+                "soreness": int(_clamp(template["soreness"] + rng.choice((-1, 0, 0, 1)), 1, 5)),
+            }
+        )
+
+    metrics = persona["weeklyMetrics"]
+    runs = [activity for activity in activities if activity["activityType"] in RUN_TYPES]
+    run_time = sum(activity["durationMin"] for activity in runs)
+    pace = metrics["runTimeMin"] / metrics["runDistanceKm"] * rng.gauss(1.0, 0.04)
+    weekly_metrics = {
+        "runCount": len(runs),
+        "runDistanceKm": round(_clamp(run_time / pace, 0, 300), 1),
+        "runTimeMin": int(_clamp(run_time, 0, 2000)),
+        "ctlMean": round(_clamp(metrics["ctlMean"] * rng.gauss(1.0, 0.06), 0, 250), 1),
+        "atlMean": round(_clamp(metrics["atlMean"] * load, 0, 250), 1),
+        "hrvMean": round(sum(day["hrv"] for day in wellness) / len(wellness), 1),
+        "restHrMean": round(sum(day["restHr"] for day in wellness) / len(wellness), 1),
+        "sleepScoreMean": round(sum(day["sleepScore"] for day in wellness) / len(wellness), 1),
+    }
+
+    outcome = dict(persona["outcome"])
+    if rng.random() < 0.2:
+        outcome["adherenceBand"] = rng.choice(ADHERENCE_BANDS)
+    if rng.random() < 0.1:
+        outcome["painReported"] = not outcome["painReported"]
+    if load > 1.1:
+        outcome["rpeTrend"] = "up"
+    elif load < 0.9:
+        outcome["rpeTrend"] = "down"
+
+    return {
+        "fixtureId": fixture_id,
+        "athleteProfile": dict(persona["athleteProfile"]),
+        "week": {"weekStart": week_start.isoformat(), "weekEnd": (week_start + timedelta(days=6)).isoformat()},
+        "weeklyMetrics": weekly_metrics,
+        "activities": activities,
+        "wellness": wellness,
+        "outcome": outcome,
+    }
+
+
+def iter_datasets(
+    count: int,
+    seed: int,
+    per_dataset: int = MAX_FIXTURES_PER_DATASET,
+    source: Path = GOLDEN_WEEKS_PATH,
+    generated_at: str | None = None,
+) -> Iterator[dict]:
+    """Yield golden-weeks datasets holding ``count`` synthetic fixtures in total."""
+    header, personas = load_personas(source)
+    rng = random.Random(seed)
+    anonymization = {
+        "strategy": "Synthetic fixtures sampled from anonymized persona templates; no source records copied.",
+        "piiRemoved": True,
+        "notes": f"Generated by tests/golden_weeks_generator.py with seed {seed} from {header['datasetVersion']} personas.",
+    }
+    week = 0
+    for size in dataset_sizes(count, per_dataset):
+        fixtures = []
+        for position in range(size):
+            week_start = FIRST_WEEK + timedelta(weeks=week % WEEK_CYCLE)
+            week += 1
+            fixtures.append(synthesize_fixture(rng, rng.choice(personas), f"gw-{position + 1:03d}", week_start))
+        yield {
+            "datasetVersion": header["datasetVersion"],
+            "generatedAt": generated_at or header["generatedAt"],
+            "anonymization": anonymization,
+            "fixtures": fixtures,
+        }
+
+
+def write_datasets(datasets: Iterator[dict], handle: TextIO, check: bool = False) -> dict[str, int]:
+    """Write one dataset per line; with ``check`` every dataset goes through the harness golden-weeks checks."""
+    validator = None
+    if check:
+        from scripts.plan_validation import GOLDEN_WEEKS_SCHEMA_PATH, load_schema_validator
+        from tests.eval_harness import golden_weeks_dataset_checks
+
+        validator = load_schema_validator(GOLDEN_WEEKS_SCHEMA_PATH)
+    stats = {"datasets": 0, "fixtures": 0, "failed": 0}
+    for dataset in datasets:
+        if validator is not None:
+            errors, _ = golden_weeks_dataset_checks(dataset, validator)
+            if errors:
+                stats["failed"] += 1
+                print(f"dataset {stats['datasets'] + 1}: " + "; ".join(errors), file=sys.stderr)
+        handle.write(json.dumps(dataset, separators=(",", ":")) + "\n")
+        stats["datasets"] += 1
+        stats["fixtures"] += len(dataset["fixtures"])
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic golden-weeks datasets as JSON Lines.")
+    parser.add_argument("--count", type=int, default=10_000, help="Total fixtures to generate (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--per-dataset",
+        type=int,
+        default=MAX_FIXTURES_PER_DATASET,
+        help="Target fixtures per dataset line, 5-10 per the schema (default: %(default)s).",
+    )
+    parser.add_argument("--output", default="-", help="Output JSONL path, or - for stdout (default).")
+    parser.add_argument("--generated-at", help="generatedAt date for every dataset (default: the source dataset's).")
+    parser.add_argument("--check", action="store_true", help="Run the schema and PII checks on every dataset.")
+    args = parser.parse_args()
+
+    try:
+        datasets = iter_datasets(args.count, args.seed, args.per_dataset, generated_at=args.generated_at)
+        if args.output == "-":
+            stats = write_datasets(datasets, sys.stdout, args.check)
+        else:
+            output = Path(args.output)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with output.open("w", encoding="utf-8") as handle:
+                stats = write_datasets(datasets, handle, args.check)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    print(
+        f"Generated {stats['fixtures']} fixtures in {stats['datasets']} datasets (seed {args.seed})"
+        + (f"; {stats['failed']} datasets failed checks" if args.check else ""),
+        file=sys.stderr,
+    )
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
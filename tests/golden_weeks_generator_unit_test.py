@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import io
+import json
+import unittest
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.plan_validation import GOLDEN_WEEKS_SCHEMA_PATH, load_schema_validator
+from tests.eval_harness import golden_weeks_dataset_checks
+from tests.golden_weeks_generator import (
+    MAX_FIXTURES_PER_DATASET,
+    MIN_FIXTURES_PER_DATASET,
+    dataset_sizes,
+    iter_datasets,
+    load_personas,
+    write_datasets,
+)
+
+
+def generate(count: int, seed: int, **kwargs: object) -> str:
+    handle = io.StringIO()
+    write_datasets(iter_datasets(count, seed, **kwargs), handle)
+    return handle.getvalue()
+
+
+class GoldenWeeksGeneratorUnitTests(unittest.TestCase):
+    def test_generated_datasets_pass_schema_and_pii_checks(self) -> None:
+        validator = load_schema_validator(GOLDEN_WEEKS_SCHEMA_PATH)
+        _, personas = load_personas()
+        persona_ids = {persona["athleteProfile"]["personaId"] for persona in personas}
+        seen_personas = set()
+        total = 0
+        for dataset in iter_datasets(1003, seed=11):
+            errors, _ = golden_weeks_dataset_checks(dataset, validator)
+            self.assertEqual(errors, [])
+            for fixture in dataset["fixtures"]:
+                seen_personas.add(fixture["athleteProfile"]["personaId"])
+                runs = [a for a in fixture["activities"] if a["activityType"] in {"easy_run", "tempo", "intervals", "long_run"}]
+                self.assertEqual(fixture["weeklyMetrics"]["runCount"], len(runs))
+                self.assertEqual(fixture["weeklyMetrics"]["runTimeMin"], sum(a["durationMin"] for a in runs))
+            total += len(dataset["fixtures"])
+        self.assertEqual(total, 1003)
+        self.assertEqual(seen_personas, persona_ids)
+
+    def test_output_is_reproducible_per_seed(self) -> None:
+        first = generate(40, seed=3)
+        self.assertEqual(first, generate(40, seed=3))
+        self.assertNotEqual(first, generate(40, seed=4))
+        lines = first.splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(json.loads(lines[0])["generatedAt"], load_personas()[0]["generatedAt"])
+        self.assertEqual(json.loads(generate(5, 3, generated_at="2026-10-01"))["generatedAt"], "2026-10-01")
+
+    def test_dataset_sizes_respect_schema_bounds(self) -> None:
+        for count, per_dataset in [(count, per) for count in (5, 9, 10, 11, 19, 21, 10_000, 10_001) for per in (5, 7, 10)]:
+            sizes = dataset_sizes(count, per_dataset)
+            self.assertEqual(sum(sizes), count)
+            self.assertTrue(all(MIN_FIXTURES_PER_DATASET <= size <= MAX_FIXTURES_PER_DATASET for size in sizes), sizes)
+        self.assertEqual(dataset_sizes(15, per_dataset=5), [5, 5, 5])
+        self.assertEqual(dataset_sizes(12, per_dataset=5), [6, 6])
+        with self.assertRaises(ValueError):
+            dataset_sizes(4)
+        with self.assertRaises(ValueError):
+            dataset_sizes(50, per_dataset=11)
+
+    def test_datasets_are_generated_lazily(self) -> None:
+        datasets = iter_datasets(10_000_000, seed=1)
+        first = next(datasets)
+        self.assertEqual([fixture["fixtureId"] for fixture in first["fixtures"]], [f"gw-{index:03d}" for index in range(1, 11)])
+        self.assertEqual(len({fixture["week"]["weekStart"] for fixture in next(datasets)["fixtures"]}), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
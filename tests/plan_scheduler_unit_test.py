@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+
+import mongomock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hr_profile_sync import collection_sink
+from scripts.plan_scheduler import (
+    FALLBACK_ERROR,
+    ChatClient,
+    NodeValidator,
+    PlanScheduler,
+    request_messages,
+)
+
+PLAN = json.loads((ROOT / "tests" / "fixtures" / "weekly_plan_valid_1.json").read_text())
+NOW = datetime(2026, 2, 2, 5, 0, tzinfo=timezone.utc)
+TRUNCATED = b'{"choices": []}'
+
+
+def context(athlete: int) -> dict:
+    return {
+        "athleteId": athlete,
+        "runId": f"run-{athlete}",
+        "promptVersion": "test",
+        "modelId": "gpt-5",
+        "prompt": "Eres un entrenador.",
+        "metrics": {"runCount": 3},
+        "history": [],
+    }
+
+
+def completion(content: object) -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": json.dumps(content)}}]}
+
+
+def parse_validator(context: dict, response: dict, attempt: int) -> dict:
+    """Stand-in for the Validate node: valid when the content parses to an object with activityPlan."""
+    if "choices" not in response:
+        return {"__valid": False, "__errors": ["missing choices"], "__attempt": attempt}
+    plan = json.loads(response["choices"][0]["message"]["content"])
+    valid = "activityPlan" in plan
+    return {**plan, "__valid": valid, "__errors": [] if valid else ["activityPlan must be object"], "__attempt": attempt}
+
+
+def run(scheduler: PlanScheduler, contexts: list[dict]) -> list:
+    async def collect() -> list:
+        return [result async for result in scheduler.run(contexts)]
+
+    try:
+        return asyncio.run(collect())
+    finally:
+        scheduler.close()
+
+
+class FakeChat:
+    """OpenAI-shaped endpoint that answers queued statuses first, then the plan.
+
+    A queued ``bytes`` value is sent as a 200 body; ``TRUNCATED`` cuts the body
+    short and closes the connection.
+    """
+
+    def __init__(self, statuses: list[int | bytes]) -> None:
+        self.statuses = list(statuses)
+        self.requests: list[dict] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                fake.requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                status = fake.statuses.pop(0) if fake.statuses else 200
+                body = json.dumps(completion(PLAN) if status == 200 else {"error": "busy"}).encode()
+                if isinstance(status, bytes):
+                    status, body = 200, status
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0.01")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body == TRUNCATED:
+                    self.close_connection = True
+                    body = body[:4]
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PlanSchedulerUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db = mongomock.MongoClient()["running_coach"]
+
+    def scheduler(self, complete, **kwargs) -> PlanScheduler:
+        return PlanScheduler(
+            complete,
+            kwargs.pop("validate", parse_validator),
+            kwargs.pop("snapshots", collection_sink(self.db.plan_snapshots)),
+            collection_sink(self.db.run_events),
+            backoff_s=0.001,
+            now=lambda: NOW,
+            **kwargs,
+        )
+
+    def test_llm_calls_never_exceed_the_concurrency_limit(self) -> None:
+        lock = threading.Lock()
+        state = {"in_flight": 0, "max": 0}
+
+        def complete(model: str, messages: list) -> dict:
+            with lock:
+                state["in_flight"] += 1
+                state["max"] = max(state["max"], state["in_flight"])
+            time.sleep(0.02)
+            with lock:
+                state["in_flight"] -= 1
+            return completion(PLAN)
+
+        scheduler = self.scheduler(complete, llm_concurrency=3)
+        results = run(scheduler, [context(athlete) for athlete in range(12)])
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual(state["max"], 3)
+        self.assertEqual(scheduler.stats.max_llm_in_flight, 3)
+        self.assertEqual(self.db.plan_snapshots.count_documents({}), 12)
+        snapshot = self.db.plan_snapshots.find_one({"runId": "run-5"})
+        self.assertEqual(snapshot["athleteId"], 5)
+        self.assertEqual(snapshot["weekStart"], PLAN["activityPlan"]["nextWeek"]["weekStart"])
+        self.assertEqual(self.db.run_events.count_documents({"status": "success"}), 12)
+
+    def test_rate_limits_and_server_errors_are_retried_over_http(self) -> None:
+        fake = FakeChat([429, 503])
+        chat = ChatClient(fake.url, api_key="", pool_size=2)
+        try:
+            scheduler = self.scheduler(chat.complete, llm_concurrency=2, llm_retries=2)
+            [result] = run(scheduler, [context(1)])
+        finally:
+            chat.close()
+            fake.close()
+
+        self.assertEqual(result.status, "success")
+        self.assertEqual(scheduler.stats.llm_calls, 3)
+        self.assertEqual(scheduler.stats.llm_retries, 2)
+        self.assertEqual(fake.requests[0]["response_format"], {"type": "json_object"})
+        self.assertEqual([message["role"] for message in fake.requests[0]["messages"]], ["system", "user"])
+
+    def test_non_json_and_truncated_answers_are_retried(self) -> None:
+        fake = FakeChat([b"<html>Bad gateway</html>", TRUNCATED])
+        chat = ChatClient(fake.url, api_key="", pool_size=1)
+        try:
+            scheduler = self.scheduler(chat.complete, llm_concurrency=1, llm_retries=2)
+            [result] = run(scheduler, [context(1)])
+        finally:
+            chat.close()
+            fake.close()
+
+        self.assertEqual(result.status, "success")
+        self.assertEqual((scheduler.stats.llm_calls, scheduler.stats.llm_retries), (3, 2))
+
+    def test_unexpected_errors_fail_only_that_athlete(self) -> None:
+        alerts = []
+
+        def validate(context: dict, response: dict, attempt: int) -> dict:
+            if context["athleteId"] == 3:
+                raise KeyError("choices")
+            return parse_validator(context, response, attempt)
+
+        scheduler = self.scheduler(lambda model, messages: completion(PLAN), validate=validate, on_failure=lambda result: alerts.append(result.run_id))
+        results = run(scheduler, [context(athlete) for athlete in range(5)])
+
+        self.assertEqual(sorted(result.status for result in results), ["failure"] + ["success"] * 4)
+        self.assertEqual(alerts, ["run-3"])
+        self.assertEqual((scheduler.stats.succeeded, scheduler.stats.failed), (4, 1))
+        event = self.db.run_events.find_one({"runId": "run-3"})
+        self.assertEqual(event["status"], "failure")
+        self.assertIn("KeyError", event["errors"][0])
+        self.assertEqual(self.db.plan_snapshots.count_documents({}), 4)
+
+    def test_invalid_plans_take_the_failure_branch(self) -> None:
+        alerts = []
+
+        async def on_failure(result) -> None:
+            alerts.append(result.run_id)
+
+        scheduler = self.scheduler(lambda model, messages: completion({"note": "no plan"}), on_failure=on_failure)
+        [result] = run(scheduler, [context(7)])
+
+        self.assertEqual(result.status, "failure")
+        self.assertEqual(result.attempts, 1)
+        self.assertIn(FALLBACK_ERROR, result.errors)
+        self.assertEqual(alerts, ["run-7"])
+        self.assertEqual(self.db.plan_snapshots.count_documents({}), 0)
+        event = self.db.run_events.find_one({"runId": "run-7"})
+        self.assertEqual((event["status"], event["errorCount"]), ("failure", 1))
+
+    def test_repair_attempts_send_the_validation_errors_back(self) -> None:
+        seen: list[list] = []
+
+        def complete(model: str, messages: list) -> dict:
+            seen.append(messages)
+            return completion(PLAN if len(seen) > 1 else {"note": "no plan"})
+
+        scheduler = self.scheduler(complete, max_attempts=2)
+        [result] = run(scheduler, [context(2)])
+
+        self.assertEqual((result.status, result.attempts), ("success", 2))
+        self.assertEqual(seen[1][:2], request_messages(context(2)))
+        self.assertIn("activityPlan must be object", seen[1][-1]["content"])
+        self.assertEqual(self.db.plan_snapshots.find_one({"runId": "run-2"})["attempt"], 1)
+
+    def test_slow_writes_apply_backpressure(self) -> None:
+        batches: list[int] = []
+
+        def slow_sink(ops: list) -> None:
+            time.sleep(0.02)
+            batches.append(len(ops))
+
+        scheduler = self.scheduler(
+            lambda model, messages: completion(PLAN),
+            snapshots=slow_sink,
+            llm_concurrency=8,
+            queue_size=2,
+            write_batch=2,
+        )
+        results = run(scheduler, [context(athlete) for athlete in range(20)])
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(sum(batches), 20)
+        self.assertLessEqual(max(batches), 2)
+        self.assertGreater(scheduler.snapshots.blocked_puts, 0)
+        self.assertLessEqual(scheduler.snapshots.max_depth, 2)
+
+    def test_prompt_template_rebuilds_requests_within_the_budget(self) -> None:
+        seen: list[list] = []
+
+        def complete(model: str, messages: list) -> dict:
+            seen.append(messages)
+            return completion(PLAN)
+
+        athlete = {
+            **context(3),
+            "metrics": {"weekStart": "2026-01-26", "restHR": None},
+            "history": [{"weekStart": "2026-01-19", "atlMean": 41.234}],
+        }
+        scheduler = self.scheduler(complete, prompt_template="Semana ${weekStart}", token_budget=500)
+        [result] = run(scheduler, [athlete])
+
+        self.assertEqual(seen[0][0]["content"], "Semana 2026-01-26")
+        self.assertIn('"atlMean":41.23', seen[0][1]["content"])
+        self.assertEqual(result.prompt["historyWeeks"], 1)
+        self.assertGreater(result.prompt["bytesSaved"], 0)
+        self.assertEqual(scheduler.stats.prompt_bytes_saved, result.prompt["bytesSaved"])
+
+    @unittest.skipUnless(shutil.which("node"), "node is required to run the Validate node")
+    def test_node_validator_runs_the_workflow_validate_node(self) -> None:
+        validator = NodeValidator()
+        try:
+            valid = validator(context(1), completion(PLAN), 0)
+            invalid = validator(context(1), {"error": "timeout"}, 1)
+        finally:
+            validator.close()
+
+        self.assertTrue(valid["__valid"], valid["__errors"])
+        self.assertEqual(valid["__runId"], "run-1")
+        self.assertFalse(invalid["__valid"])
+        self.assertEqual(invalid["__attempt"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
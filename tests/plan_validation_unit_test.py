@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import plan_validation
+from scripts.plan_validation import (
+    GOLDEN_WEEKS_SCHEMA_PATH,
+    SCHEMA_PATH,
+    UnsupportedSchema,
+    compile_predicate_source,
+    load_schema_validator,
+)
+
+FIXTURES_DIR = ROOT / "tests" / "fixtures"
+
+
+class PlanValidationUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.schema_dir = Path(tempfile.mkdtemp())
+        plan_validation._VALIDATORS.clear()
+
+    def test_predicate_matches_jsonschema_on_fixtures(self) -> None:
+        validator = load_schema_validator(SCHEMA_PATH)
+        for path in sorted(FIXTURES_DIR.glob("weekly_plan_*.json")):
+            data = json.loads(path.read_text())
+            expected = path.name.startswith("weekly_plan_valid_")
+            self.assertEqual(validator.is_valid(data), expected, path.name)
+            self.assertEqual(validator.validator.is_valid(data), expected, path.name)
+
+    def test_errors_are_formatted_and_empty_when_valid(self) -> None:
+        validator = load_schema_validator(SCHEMA_PATH)
+        valid = json.loads((FIXTURES_DIR / "weekly_plan_valid_1.json").read_text())
+        self.assertEqual(validator.errors(valid), [])
+
+        invalid = dict(valid, schema_version="2.0")
+        self.assertEqual(validator.errors(invalid), ["schema_version: '1.0' was expected"])
+
+    def test_golden_weeks_schema_compiles(self) -> None:
+        validator = load_schema_validator(GOLDEN_WEEKS_SCHEMA_PATH)
+        dataset = json.loads((FIXTURES_DIR / "golden_weeks_dataset_v1.json").read_text())
+        self.assertTrue(validator.is_valid(dataset))
+
+        dataset["anonymization"]["piiRemoved"] = 1
+        self.assertFalse(validator.is_valid(dataset))
+        self.assertFalse(validator.validator.is_valid(dataset))
+
+    def test_validators_are_memoized_by_schema_hash(self) -> None:
+        first = load_schema_validator(SCHEMA_PATH)
+        self.assertIs(load_schema_validator(SCHEMA_PATH), first)
+
+        copy = self.schema_dir / "weekly_plan.schema.json"
+        copy.write_text(SCHEMA_PATH.read_text())
+        self.assertIs(load_schema_validator(copy), first)
+        self.assertEqual(list(self.schema_dir.iterdir()), [copy])
+
+        plan_validation._VALIDATORS.clear()
+        self.assertIsNot(load_schema_validator(SCHEMA_PATH), first)
+
+    def test_unsupported_keywords_fall_back_to_jsonschema(self) -> None:
+        schema = {"type": "array", "uniqueItems": True}
+        with self.assertRaises(UnsupportedSchema):
+            compile_predicate_source(schema)
+
+        schema_path = self.schema_dir / "unique.schema.json"
+        schema_path.write_text(json.dumps(schema))
+        validator = load_schema_validator(schema_path)
+        self.assertTrue(validator.is_valid([1, 2]))
+        self.assertFalse(validator.is_valid([1, 1]))
+
+    def test_const_does_not_treat_booleans_as_numbers(self) -> None:
+        schema_path = self.schema_dir / "const.schema.json"
+        schema_path.write_text(json.dumps({"const": 1}))
+        validator = load_schema_validator(schema_path)
+        self.assertTrue(validator.is_valid(1.0))
+        self.assertFalse(validator.is_valid(True))
+
+
+if __name__ == "__main__":
+    unittest.main()
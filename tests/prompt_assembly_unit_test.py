@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import unittest
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.prompt_assembly import (
+    PROMPT_BEGIN,
+    PromptTemplateError,
+    assemble_prompt,
+    estimate_tokens,
+    load_template,
+    render_template,
+    strip_defaults,
+)
+from scripts.workflow_model import Workflow, extract_prompt_and_version
+
+WORKFLOW = Workflow.from_path()
+TEMPLATE, _ = extract_prompt_and_version(WORKFLOW)
+
+
+def weeks(count: int) -> list[dict]:
+    return [
+        {
+            "weekStart": f"2025-{1 + index // 4:02d}-{1 + 7 * (index % 4):02d}",
+            "runDistance": 30000 + index * 1250.5,
+            "atlMean": 40.25 + index,
+            "rampRateMean": None,
+            "restHrMean": 50.05,
+        }
+        for index in range(count)
+    ]
+
+
+def prompt_builder_items(history: list[dict]) -> list[dict]:
+    return [
+        {
+            "json": {
+                "runId": "run-1",
+                "current": {"weekStart": "2026-01-26", "weekEnd": "2026-02-01"},
+                "history": history,
+                "activities": [{"icu_ctl": 50.3, "icu_atl": 60.1, "icu_rampRate": 1.25, "trimp": 80, "max_heartrate": 185}],
+                "wellness": [{"hrv": 70, "sleepScore": 80, "steps": 9000, "restingHR": 48}],
+                "heartRateSync": {
+                    "hrMax": 190,
+                    "hrRest": None,
+                    "lthr": 172,
+                    "zoneMethod": "hrr",
+                    "computedZones": {"z1": {"min": 110, "max": 130}, "z2": {"min": 130, "max": None}},
+                },
+            }
+        }
+    ]
+
+
+def context(history: list[dict]) -> dict:
+    """A Prompt Builder output without running the node."""
+    return {
+        "runId": "run-1",
+        "metrics": {
+            "programStartDate": "2025-07-19",
+            "weeksSinceStart": 29,
+            "totalPlanWeeks": 31,
+            "weeksToRace": 2,
+            "phaseName": "Taper",
+            "weekStart": "2026-01-26",
+            "weekEnd": "2026-02-01",
+            "ctlActs": 50.333333333,
+            "atlActs": 60.1,
+            "rampActs": 1.25,
+            "totalTrimp": 80,
+            "restHR": 0,
+            "steps": 9000,
+            "hrvWel": 70,
+            "sleepWel": 80,
+            "fcMax": 190,
+            "hrMax": 190,
+            "hrRest": None,
+            "lthr": 172,
+            "zoneMethod": None,
+            "zonesUpdated": False,
+        },
+        "heartRate": {"hrMax": 190, "hrRest": None, "computedZones": None},
+        "history": history,
+    }
+
+
+class PromptAssemblyUnitTests(unittest.TestCase):
+    @unittest.skipUnless(shutil.which("node"), "node is required to run the Prompt Builder")
+    def test_template_renders_like_the_prompt_builder(self) -> None:
+        from scripts.workflow_replay import JsRuntime
+
+        with JsRuntime({"Prompt Builder": WORKFLOW.code("Prompt Builder")}) as runtime:
+            runtime.begin(1769990400000, {}, {})
+            items, _, error = runtime.execute("Prompt Builder", prompt_builder_items(weeks(9) + [{"weekStart": "2024-12-30"}]))
+
+        self.assertIsNone(error)
+        output = items[0]["json"]
+        self.assertEqual(render_template(TEMPLATE, output), output["prompt"])
+
+    def test_unknown_template_expressions_are_rejected(self) -> None:
+        with self.assertRaises(PromptTemplateError):
+            render_template("Semana ${weeksSinceStart + 1}", context([]))
+        rendered = render_template("Zonas: ${zoneSummary || 'ninguna'} · FC ${fmt(fcMax)}", context([]), compact=True)
+        self.assertEqual(rendered, "Zonas: ninguna · FC 190.0")
+
+    def test_strip_defaults_drops_nulls_and_rounds(self) -> None:
+        stripped = strip_defaults({"a": None, "b": "", "c": [], "d": {"e": None}, "f": 1.23456, "g": 2.0, "h": 0, "i": False})
+        self.assertEqual(stripped, {"f": 1.23, "g": 2, "h": 0, "i": False})
+
+    def test_history_is_cut_to_the_budget_newest_first(self) -> None:
+        full = assemble_prompt(context(weeks(20)), TEMPLATE, token_budget=100_000)
+        self.assertEqual((full.stats.history_weeks, full.stats.summarized_weeks), (20, 0))
+        self.assertGreater(full.stats.bytes_saved, 0)
+        self.assertNotIn(PROMPT_BEGIN, full.messages[0]["content"])
+        self.assertNotIn("null", full.messages[1]["content"])
+
+        budget = full.stats.tokens_after - 400
+        cut = assemble_prompt(context(weeks(20)), TEMPLATE, token_budget=budget)
+        self.assertLessEqual(cut.stats.tokens_after, budget)
+        self.assertGreater(cut.stats.summarized_weeks, 0)
+        self.assertEqual(cut.stats.history_weeks + cut.stats.summarized_weeks, 20)
+        payload = cut.messages[1]["content"]
+        history = json.loads(payload.split("Historial (semanas anteriores): ")[1].split("\n\n")[0])
+        self.assertEqual(history[0]["weekStart"], max(week["weekStart"] for week in weeks(20)))
+        summary = json.loads(payload.split("Resumen semanas más antiguas: ")[1])
+        self.assertEqual(summary["weeks"], cut.stats.summarized_weeks)
+
+        dropped = assemble_prompt(context(weeks(20)), TEMPLATE, token_budget=budget, summarize=False)
+        self.assertEqual(dropped.stats.dropped_weeks, 20 - dropped.stats.history_weeks)
+
+        tiny = assemble_prompt(context(weeks(20)), TEMPLATE, token_budget=10)
+        self.assertEqual((tiny.stats.history_weeks, tiny.stats.dropped_weeks), (0, 20))
+        self.assertTrue(tiny.stats.over_budget)
+
+    def test_assembler_and_prompt_version_check_are_independent(self) -> None:
+        for module, other in (("tests.check_prompt_version", "scripts.prompt_assembly"), ("scripts.prompt_assembly", "tests.check_prompt_version")):
+            probe = f"import sys, {module}; sys.exit({other!r} in sys.modules)"
+            self.assertEqual(subprocess.run([sys.executable, "-c", probe], cwd=ROOT).returncode, 0, module)
+
+    def test_missing_prompt_builder_raises_template_error(self) -> None:
+        with self.assertRaises(PromptTemplateError):
+            load_template(Workflow({"nodes": []}))
+
+    def test_compact_json_estimates_fewer_tokens(self) -> None:
+        value = {"metrics": context(weeks(4))["metrics"]}
+        indented = json.dumps(value, indent=2)
+        compact = json.dumps(value, separators=(",", ":"))
+        self.assertLess(estimate_tokens(compact), estimate_tokens(indented))
+        self.assertEqual(estimate_tokens(""), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
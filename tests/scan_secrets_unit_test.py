@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import io
+import re
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from unittest import mock
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts import scan_secrets
+from scripts.disk_cache import DiskCache
+from scripts.scan_secrets import (
+    TrackedFile,
+    iter_added_lines,
+    scan_diff,
+    scan_file,
+    scan_file_by_lines,
+    scan_tracked,
+    tracked_blobs,
+)
+
+# Built at runtime so the repository secret scan does not flag this file.
+FAKE_KEY = "sk-" + "abcdefghijklmnopqrstuvwx"
+LEAK = f'OPENAI_API_KEY = "{FAKE_KEY}"\n'
+
+
+class ScanSecretsUnitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.cache = DiskCache(self.tmp / "cache.sqlite")
+        self.addCleanup(self.cache.close)
+
+    def write(self, name: str, text: str) -> Path:
+        path = self.tmp / name
+        path.write_text(text)
+        return path
+
+    def test_unchanged_blobs_are_served_from_cache(self) -> None:
+        leaky = self.write("leaky.env", LEAK)
+        clean = self.write("clean.txt", "nothing here\n")
+        files = [TrackedFile(leaky, "a" * 40), TrackedFile(clean, "b" * 40)]
+
+        stats: dict[str, int] = {}
+        first = scan_tracked(files, cache=self.cache, stats=stats)
+        self.assertEqual(
+            [(path, label) for path, _, label, _ in first],
+            [(leaky, "openai_api_key"), (leaky, "generic_secret_assignment")],
+        )
+        self.assertEqual(stats, {"cacheHits": 0, "scanned": 2})
+
+        # Same blob SHA: the file is not read again, so edits on disk are not seen.
+        leaky.write_text("nothing here\n")
+        second = scan_tracked(files, cache=self.cache, stats=stats)
+        self.assertEqual(second, first)
+        self.assertEqual(stats, {"cacheHits": 2, "scanned": 0})
+
+    def test_modified_files_are_always_rescanned(self) -> None:
+        dirty = self.write("dirty.env", LEAK)
+        stats: dict[str, int] = {}
+        scan_tracked([TrackedFile(dirty, None)], cache=self.cache, stats=stats)
+        dirty.write_text("nothing here\n")
+        self.assertEqual(scan_tracked([TrackedFile(dirty, None)], cache=self.cache, stats=stats), [])
+        self.assertEqual(stats, {"cacheHits": 0, "scanned": 1})
+        self.assertEqual(self.cache.count(), 0)
+
+    def test_parallel_scan_matches_serial_order(self) -> None:
+        files = [TrackedFile(self.write(f"f{index}.env", LEAK if index % 3 == 0 else "ok\n"), None) for index in range(12)]
+        serial = scan_tracked(files)
+        self.assertEqual(scan_tracked(files, workers=3, pool="thread"), serial)
+        self.assertEqual(scan_tracked(files, workers=2, pool="process"), serial)
+
+    def test_engine_matches_line_scanner(self) -> None:
+        samples = {
+            "crlf.env": "ok\r\n" + LEAK.replace("\n", "\r\n") * 2 + f"# {FAKE_KEY}\r\n",
+            "breaks.txt": 'a\x0bb\x1cc\x0cAPI_KEY =\x1f"abcdefghijklmnopqrs"\rTOKEN=\n"abcdefghijklmnopqrst"\n',
+            "unicode.json": f'{{"note": "caf\u00e9 \u2028 {FAKE_KEY}", "x": "\u00e9{FAKE_KEY}"}}\n',
+            "tail.txt": "line one\n\n\nAKIAABCDEFGHIJKLMNOP",
+            "safe.env": 'SECRET_TOKEN = "example_abcdefghijklmnop"\n',
+            "empty.txt": "",
+        }
+        for name, text in samples.items():
+            path = self.write(name, text)
+            self.assertEqual(scan_file(path), scan_file_by_lines(path), name)
+        self.assertEqual([line for line, _, _ in scan_file(self.tmp / "tail.txt")], [4])
+
+    def test_engine_skips_binary_content(self) -> None:
+        path = self.tmp / "blob.bin"
+        path.write_bytes(b"\x00\x01" + LEAK.encode("ascii"))
+        self.assertEqual(scan_file(path), [])
+
+    def git(self, *args: str) -> None:
+        subprocess.run(["git", *args], cwd=self.tmp, check=True, capture_output=True)
+
+    def init_repo(self) -> None:
+        self.git("init", "-q")
+        self.git("config", "user.email", "ci@example.com")
+        self.git("config", "user.name", "CI")
+        self.git("config", "core.autocrlf", "false")
+        self.write("config.env", "# settings\nDEBUG=1\n")
+        self.write("notes.txt", "first\n")
+        self.git("add", ".")
+        self.git("commit", "-q", "-m", "base")
+
+    def test_iter_added_lines_uses_hunk_counts(self) -> None:
+        diff = [
+            "diff --git a/x.txt b/x.txt\n",
+            "--- a/x.txt\n",
+            "+++ b/x.txt\n",
+            "@@ -1,0 +2,2 @@\n",
+            "+++ b/not-a-header\n",
+            "+plain\n",
+            "@@ -9 +10 @@\n",
+            "-old\n",
+            "+new\n",
+            "diff --git a/gone.txt b/gone.txt\n",
+            "--- a/gone.txt\n",
+            "+++ /dev/null\n",
+            "@@ -1 +0,0 @@\n",
+            "-bye\n",
+        ]
+        self.assertEqual(
+            list(iter_added_lines(diff)),
+            [("x.txt", 2, "++ b/not-a-header"), ("x.txt", 3, "plain"), ("x.txt", 10, "new")],
+        )
+
+    def test_iter_added_lines_handles_spaces_and_quoted_paths(self) -> None:
+        diff = [
+            "+++ b/my notes.txt\t\n",
+            "@@ -0,0 +1 @@\n",
+            "+spaced\n",
+            '+++ "b/tab\\there.txt"\n',
+            "@@ -0,0 +1 @@\n",
+            "+quoted\n",
+        ]
+        self.assertEqual(
+            list(iter_added_lines(diff)),
+            [("my notes.txt", 1, "spaced"), ("tab\there.txt", 1, "quoted")],
+        )
+
+    def test_diff_scan_reads_paths_with_spaces_and_tabs(self) -> None:
+        self.init_repo()
+        self.write("my notes.txt", LEAK)
+        self.write("tab\tname.env", LEAK)
+        self.git("add", ".")
+        with mock.patch.object(scan_secrets, "REPO_ROOT", self.tmp):
+            findings = scan_diff(staged=True)
+        self.assertEqual(
+            sorted({path.name for path, _, _, _ in findings}),
+            ["my notes.txt", "tab\tname.env"],
+        )
+
+    def test_unknown_since_ref_is_a_clean_error(self) -> None:
+        self.init_repo()
+        argv = ["scan_secrets.py", "--since", "no-such-ref"]
+        with mock.patch.object(scan_secrets, "REPO_ROOT", self.tmp), mock.patch.object(sys, "argv", argv):
+            with redirect_stderr(io.StringIO()) as stderr:
+                self.assertEqual(scan_secrets.main(), 2)
+        self.assertIn("no-such-ref", stderr.getvalue())
+
+    def test_diff_scan_reports_same_lines_as_full_scan(self) -> None:
+        self.init_repo()
+        self.write("config.env", "# settings\nDEBUG=1\n" + LEAK)
+        # Form feed and CRLF: git and str.splitlines() number these lines differently.
+        self.write("notes.txt", f"first\nintro\x0cpage two\r\nok\x0b{FAKE_KEY}\r\n\n{LEAK}")
+        with mock.patch.object(scan_secrets, "REPO_ROOT", self.tmp):
+            findings = scan_diff(since="HEAD")
+        expected = [
+            (path, *finding)
+            for path in (self.tmp / "config.env", self.tmp / "notes.txt")
+            for finding in scan_file_by_lines(path)
+        ]
+        self.assertEqual(findings, expected)
+        self.assertEqual([line for path, line, _, _ in findings if path.name == "notes.txt"], [5, 7, 7])
+
+    def test_staged_scan_ignores_unstaged_lines(self) -> None:
+        self.init_repo()
+        self.write("notes.txt", "first\n" + LEAK)
+        self.git("add", "notes.txt")
+        self.write("notes.txt", "first\n" + LEAK + LEAK.replace("OPENAI", "SECOND"))
+        with mock.patch.object(scan_secrets, "REPO_ROOT", self.tmp):
+            staged = scan_diff(staged=True)
+            since = scan_diff(since="HEAD")
+        self.assertEqual({line for _, line, _, _ in staged}, {2})
+        self.assertEqual({line for _, line, _, _ in since}, {2, 3})
+
+    def test_tracked_blobs_reports_index_shas(self) -> None:
+        blobs = tracked_blobs()
+        self.assertTrue(blobs)
+        for tracked in blobs:
+            self.assertTrue(tracked.blob is None or re.fullmatch(r"[0-9a-f]{40,64}", tracked.blob), tracked)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,11 +5,12 @@ import json
 import sys
 from pathlib import Path
 
-from jsonschema import Draft202012Validator, FormatChecker
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
+from scripts.plan_validation import SCHEMA_PATH, SchemaValidator, load_schema_validator  # noqa: E402
 
-ROOT = Path(__file__).resolve().parents[1]
-SCHEMA_PATH = ROOT / "schemas" / "weekly_plan.schema.json"
 FIXTURES_DIR = ROOT / "tests" / "fixtures"
 
 
@@ -17,14 +18,16 @@ def load_json(path: Path) -> dict:
     return json.loads(path.read_text())
 
 
-def validate(path: Path, validator: Draft202012Validator) -> list:
+def validate(path: Path, validator: SchemaValidator) -> list:
     data = load_json(path)
-    return sorted(validator.iter_errors(data), key=lambda e: list(e.path))
+    errors = sorted(validator.iter_errors(data), key=lambda e: list(e.path))
+    if validator.is_valid(data) != (not errors):
+        raise AssertionError(f"compiled schema predicate disagrees with jsonschema for {path.name}")
+    return errors
 
 
 def main() -> int:
-    schema = load_json(SCHEMA_PATH)
-    validator = Draft202012Validator(schema, format_checker=FormatChecker())
+    validator = load_schema_validator(SCHEMA_PATH)
 
     valid_files = sorted(FIXTURES_DIR.glob("weekly_plan_valid_*.json"))
     invalid_files = sorted(FIXTURES_DIR.glob("weekly_plan_invalid_*.json"))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import random
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+import mongomock
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.hr_profile_sync import collection_sink
+from scripts.weekly_metrics import WEEKLY_METRICS_COLLECTION, current_monday, js_date_ms, rollup_weekly_metrics
+from scripts.weekly_metrics_sync import ApplyStats, WeeklyMetricsAggregator, upsert_op
+from tests.weekly_metrics_unit_test import synthetic_history
+
+TZ = "Europe/Madrid"
+ATHLETE = "i372001"
+NOW = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+
+
+def without_timestamps(documents: list[dict]) -> list[dict]:
+    return [{key: value for key, value in doc.items() if key not in ("createdAt", "updatedAt")} for doc in documents]
+
+
+def full_recomputation(activities: dict[str, dict], wellness: list[dict], weeks: list[date]) -> list[dict]:
+    zone = WeeklyMetricsAggregator(TZ).tz
+    ordered = sorted(activities.values(), key=lambda row: (js_date_ms(row["start_date"], zone), row["id"]))
+    return rollup_weekly_metrics(ordered, wellness, weeks=weeks, tz=TZ, now=NOW)
+
+
+class WeeklyMetricsSyncUnitTests(unittest.TestCase):
+    def test_incremental_fetches_match_full_recomputation(self) -> None:
+        activities, wellness = synthetic_history(seed=11, start=date(2025, 9, 1), days=120)
+        rng = random.Random(11)
+        latest = {row["id"]: row for row in activities}
+        # Edits reach back to the first week, so keep every week open here.
+        aggregator = WeeklyMetricsAggregator(TZ, retain=timedelta(days=365))
+        stats = ApplyStats()
+        # Daily runs, each fetching a 7-day window in no particular order; some activities are edited or moved between runs.
+        for day in range(0, 120, 3):
+            edited = rng.sample(activities, 4)
+            for row in edited:
+                row = latest[row["id"]] = dict(latest[row["id"]])
+                row["trimp"] = rng.uniform(1, 300)
+                row["name"] = rng.choice(["Tempo 3x10", "Long run", "Recovery"])
+                if rng.random() < 0.5:
+                    row["start_date"] = f"2025-{rng.randrange(9, 13):02d}-{rng.randrange(1, 29):02d}T08:00:00Z"
+            window = [
+                row
+                for row in latest.values()
+                if row["start_date"][:10] <= (date(2025, 9, 1) + timedelta(days=day)).isoformat()
+            ][-40:] + [latest[row["id"]] for row in edited]
+            days = wellness[max(0, day - 7) : day + 1]
+            rng.shuffle(window)
+            aggregator.apply(ATHLETE, window, rng.sample(days, len(days)), stats=stats)
+        aggregator.apply(ATHLETE, rng.sample(list(latest.values()), len(latest)), wellness[::-1], stats=stats)
+
+        documents = aggregator.documents(ATHLETE)
+        weeks = [date.fromisoformat(doc["weekStart"]) + timedelta(days=1) for doc in documents]
+        self.assertEqual(without_timestamps(documents), without_timestamps(full_recomputation(latest, wellness, weeks)))
+        self.assertGreater(stats.unchanged, stats.applied)
+
+        # Re-applying the same fetch changes nothing and produces nothing to write.
+        stats = ApplyStats()
+        self.assertEqual(aggregator.apply(ATHLETE, latest.values(), wellness, stats=stats), [])
+        self.assertEqual((stats.applied, stats.unchanged), (0, len(latest) + len(wellness)))
+
+    def test_only_touched_weeks_are_written(self) -> None:
+        aggregator = WeeklyMetricsAggregator(TZ)
+        run = {"id": 1, "icu_athlete_id": ATHLETE, "start_date": "2026-02-24T07:00:00Z", "type": "Run", "distance": 10000, "elapsed_time": 3000}
+        ride = {"id": 2, "icu_athlete_id": ATHLETE, "start_date": "2026-02-17T07:00:00Z", "type": "Ride", "distance": 40000, "elapsed_time": 5400}
+        self.assertEqual([doc["weekStart"] for doc in aggregator.apply(ATHLETE, [run, ride], now=NOW)], ["2026-02-15", "2026-02-22"])
+
+        # Moving the run a week back rewrites both its old and its new week.
+        moved = aggregator.apply(ATHLETE, [{**run, "start_date": "2026-02-18T07:00:00Z"}, ride], now=NOW)
+        self.assertEqual([(doc["weekStart"], doc["runCount"], doc["rideCount"]) for doc in moved], [("2026-02-15", 1, 1), ("2026-02-22", 0, 0)])
+        self.assertEqual([doc["runCount"] for doc in aggregator.forget(ATHLETE, [1], now=NOW)], [0])
+
+        collection = mongomock.MongoClient().db[WEEKLY_METRICS_COLLECTION]
+        collection_sink(collection)([upsert_op(doc) for doc in aggregator.documents(ATHLETE)])
+        stored = list(collection.find({"athleteId": ATHLETE}, {"_id": 0}).sort("weekStart", 1))
+        self.assertEqual(stored, aggregator.documents(ATHLETE))
+
+    def test_closed_weeks_drop_their_rows(self) -> None:
+        activities, wellness = synthetic_history(seed=5, start=date(2025, 9, 1), days=150)
+        rng = random.Random(5)
+        zone = WeeklyMetricsAggregator(TZ).tz
+        aggregator = WeeklyMetricsAggregator(TZ)
+        stats = ApplyStats()
+        # Daily runs fetching everything since fetch_oldest, shuffled, with edits inside the fetched window.
+        for day in range(150):
+            today = (date(2025, 9, 1) + timedelta(days=day)).isoformat()
+            oldest = aggregator.fetch_oldest(ATHLETE) or ""
+            fetched = [row for row in activities if oldest[:10] <= row["start_date"][:10] <= today]
+            for row in rng.sample(fetched, min(2, len(fetched))):
+                row["trimp"] = rng.uniform(1, 300)
+            rng.shuffle(fetched)
+            aggregator.apply(ATHLETE, fetched, [row for row in wellness if oldest[:10] <= row["id"] <= today], stats=stats)
+        self.assertEqual(stats.closed, 0)
+
+        documents = aggregator.documents(ATHLETE)
+        weeks = [date.fromisoformat(doc["weekStart"]) + timedelta(days=1) for doc in documents]
+        latest = {row["id"]: row for row in activities}
+        self.assertEqual(without_timestamps(documents), without_timestamps(full_recomputation(latest, wellness, weeks)))
+
+        # Only the open weeks' rows are kept, however long the history is.
+        state = aggregator.to_state()
+        [athlete] = state["athletes"]
+        closed_before = date.fromisoformat(athlete["closedBefore"])
+        self.assertGreater(closed_before, weeks[0])
+        self.assertLess(len(athlete["activities"]), len(activities) / 5)
+        self.assertTrue(all(current_monday(datetime.fromtimestamp(js_date_ms(row["start_date"], zone) / 1000, timezone.utc), zone) >= closed_before for row in athlete["activities"]))
+        self.assertEqual(len(athlete["documents"]), len(documents))
+
+        restored = WeeklyMetricsAggregator.from_state(json.loads(json.dumps(state)))
+        self.assertEqual(restored.documents(ATHLETE), documents)
+
+        # A late edit to a closed week is reported, not applied.
+        late = {**activities[0], "trimp": 999}
+        stats = ApplyStats()
+        self.assertEqual(restored.apply(ATHLETE, [late], stats=stats), [])
+        self.assertEqual((stats.closed, stats.applied), (1, 0))
+        self.assertEqual(restored.documents(ATHLETE), documents)
+        # Moving an open week's activity into a closed week takes it out of the open week.
+        moved = {**latest[athlete["activities"][0]["id"]], "start_date": activities[0]["start_date"]}
+        [rewritten] = restored.apply(ATHLETE, [moved], now=NOW)
+        self.assertIn(rewritten, restored.documents(ATHLETE))
+        self.assertEqual(restored.to_state()["athletes"][0]["activities"], athlete["activities"][1:])
+
+    def test_state_round_trip_and_fetch_window(self) -> None:
+        activities, wellness = synthetic_history(seed=2, start=date(2026, 1, 5), days=30)
+        aggregator = WeeklyMetricsAggregator(TZ)
+        aggregator.apply(ATHLETE, activities, wellness, now=NOW)
+        restored = WeeklyMetricsAggregator.from_state(json.loads(json.dumps(aggregator.to_state())))
+        self.assertEqual(restored.documents(ATHLETE), aggregator.documents(ATHLETE))
+        self.assertEqual(restored.apply(ATHLETE, activities, wellness), [])
+
+        newest = max(js_date_ms(row["start_date"], aggregator.tz) for row in activities)
+        watermark = aggregator.watermark(ATHLETE)
+        self.assertEqual(watermark.timestamp() * 1000, newest)
+        self.assertEqual(aggregator.fetch_oldest(ATHLETE), (watermark - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S.000"))
+        self.assertIsNone(aggregator.fetch_oldest("unknown"))
+        with self.assertRaises(ValueError):
+            WeeklyMetricsAggregator.from_state({"version": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
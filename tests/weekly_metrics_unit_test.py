@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.weekly_metrics import ActivityColumns, rollup_weekly_metrics, shape_weekly_metrics, week_window
+from scripts.workflow_model import Workflow
+
+# Runs the node's code once per "now", with Date() pinned to that instant.
+NODE_HARNESS = r"""
+const { code, items, nows } = JSON.parse(require("fs").readFileSync(0, "utf8"));
+const RealDate = Date;
+let NOW = 0;
+global.Date = class extends RealDate {
+  constructor(...args) { if (args.length) super(...args); else super(NOW); }
+  static now() { return NOW; }
+};
+const node = new Function("items", code);
+process.stdout.write(JSON.stringify(nows.map(now => { NOW = now; return node(items)[0].json; })));
+"""
+
+TYPES = ["Run", "Run", "Run", "Ride", "VirtualRide", "EBikeRide", "WeightTraining", "Swim", "Walk", None]
+NAMES = ["Easy run", "VO2 max 5x3'", "Tempo 20'", "Umbral 3x10", "Long run", "long THRESHOLD", "Morning Ride", None]
+
+
+def synthetic_history(seed: int, start: date, days: int) -> tuple[list[dict], list[dict]]:
+    rng = random.Random(seed)
+    base = datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc)
+    activities = []
+    for index in range(days * 2):
+        moment = base + timedelta(minutes=rng.randrange(days * 24 * 60))
+        if index % 7 == 0:
+            # Local time without offset, parsed in the runtime timezone.
+            start_date = moment.strftime("%Y-%m-%dT%H:%M:%S")
+        elif index % 11 == 0:
+            # Right on a local week boundary in Madrid or New York.
+            start_date = moment.strftime("%Y-%m-%dT") + rng.choice(["22:00:00Z", "22:59:59Z", "23:00:00Z", "04:59:59Z", "05:00:00Z"])
+        else:
+            start_date = moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+        activities.append(
+            {
+                "id": f"a{index}",
+                "icu_athlete_id": "i372001",
+                "start_date": start_date,
+                "type": rng.choice(TYPES),
+                "name": rng.choice(NAMES),
+                "distance": rng.choice([None, 0, round(rng.uniform(1000, 30000), 1)]),
+                "elapsed_time": rng.choice([None, rng.randrange(600, 12000)]),
+                "trimp": rng.choice([None, rng.uniform(5, 250)]),
+            }
+        )
+    wellness = []
+    for offset in range(days):
+        entry = {"id": (start + timedelta(days=offset)).isoformat()}
+        for field in ("ctl", "atl", "rampRate", "restingHR", "steps", "sleepScore", "hrv"):
+            if rng.random() > 0.15:
+                entry[field] = rng.choice([rng.uniform(-5, 90), rng.randrange(40, 20000)])
+        wellness.append(entry)
+    return activities, wellness
+
+
+def run_node(code: str, activities: list[dict], wellness: list[dict], nows: list[datetime], tz: str) -> list[dict]:
+    payload = {
+        "code": code,
+        "items": [{"json": {"activities": activities, "wellness": wellness}}],
+        "nows": [int(now.timestamp() * 1000) for now in nows],
+    }
+    result = subprocess.run(
+        ["node", "-e", NODE_HARNESS],
+        input=json.dumps(payload),
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "TZ": tz},
+    )
+    return json.loads(result.stdout)
+
+
+class WeeklyMetricsUnitTests(unittest.TestCase):
+    @unittest.skipUnless(shutil.which("node"), "node is required to run the workflow code node")
+    def test_matches_shape_weekly_metrics_node(self) -> None:
+        code = Workflow.from_path().code("Shape Weekly Metrics")
+        activities, wellness = synthetic_history(seed=3, start=date(2025, 10, 1), days=240)
+        for tz in ("Europe/Madrid", "America/New_York", "UTC"):
+            # Wednesday noon UTC every week, crossing both DST changes.
+            nows = [datetime(2025, 10, 8, 12, tzinfo=timezone.utc) + timedelta(weeks=week) for week in range(32)]
+            expected = run_node(code, activities, wellness, nows, tz)
+            actual = rollup_weekly_metrics(activities, wellness, weeks=[now.date() for now in nows], tz=tz, now=nows[0])
+            for node_doc, doc in zip(expected, actual):
+                node_doc["createdAt"] = node_doc["updatedAt"] = doc["createdAt"]
+                self.assertEqual(doc, node_doc, (tz, doc["weekStart"]))
+            self.assertEqual(shape_weekly_metrics(activities, wellness, now=nows[5], tz=tz), run_node(code, activities, wellness, [nows[5]], tz)[0])
+
+    def test_backfill_matches_week_by_week(self) -> None:
+        activities, wellness = synthetic_history(seed=5, start=date(2024, 1, 1), days=400)
+        columns = ActivityColumns.from_records(activities)
+        now = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        backfill = rollup_weekly_metrics(columns, wellness, now=now)
+        self.assertGreaterEqual(len(backfill), 57)
+        for doc in backfill:
+            monday = date.fromisoformat(doc["weekStart"]) + timedelta(days=1)
+            self.assertEqual(rollup_weekly_metrics(activities, wellness, weeks=[monday], now=now), [doc])
+        self.assertEqual(sum(doc["runCount"] for doc in backfill), sum(activity["type"] == "Run" for activity in activities))
+
+    def test_week_window_uses_utc_dates_of_local_bounds(self) -> None:
+        window = week_window(date(2026, 3, 23), "Europe/Madrid")
+        self.assertEqual((window.week_start, window.week_end), ("2026-03-22", "2026-03-29"))
+        self.assertEqual(window.end_ms - window.start_ms, (7 * 24 - 1) * 3600 * 1000 - 1)
+        self.assertEqual(rollup_weekly_metrics([], []), [])
+        empty = shape_weekly_metrics([], [], now=datetime(2026, 3, 25, tzinfo=timezone.utc))
+        self.assertIsNone(empty["athleteId"])
+        self.assertEqual((empty["runCount"], empty["ctlMean"]), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import unittest
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.workflow_model import (
+    CODE_NODE_TYPE,
+    MAIN_WORKFLOW_PATH,
+    MissingNodeError,
+    Workflow,
+    extract_prompt_and_version,
+)
+
+
+class WorkflowModelUnitTests(unittest.TestCase):
+    def test_indexes_match_linear_scan(self) -> None:
+        data = json.loads(MAIN_WORKFLOW_PATH.read_text())
+        workflow = Workflow(data)
+        for node in data["nodes"]:
+            self.assertIs(workflow.node(node["name"]), node)
+        code_nodes = [node["name"] for node in data["nodes"] if node["type"] == CODE_NODE_TYPE]
+        self.assertEqual([node["name"] for node in workflow.nodes_of_type(CODE_NODE_TYPE)], code_nodes)
+        self.assertIsNone(workflow.node("Missing"))
+        self.assertEqual(workflow.nodes_of_type("missing"), [])
+
+    def test_code_is_extracted_lazily_and_cached(self) -> None:
+        workflow = Workflow(
+            {
+                "nodes": [
+                    {"name": "JS", "type": CODE_NODE_TYPE, "parameters": {"jsCode": "return items;"}},
+                    {"name": "Py", "type": CODE_NODE_TYPE, "parameters": {"language": "python", "pythonCode": "pass"}},
+                    {"name": "HTTP", "type": "n8n-nodes-base.httpRequest", "parameters": {"url": "x"}},
+                ]
+            }
+        )
+        self.assertEqual(workflow._code, {})
+        self.assertEqual(workflow.code("JS"), "return items;")
+        self.assertIs(workflow.code_node("JS"), workflow.code_node("JS"))
+        self.assertEqual(workflow.code_node("Py").language, "python")
+        self.assertIsNone(workflow.code("HTTP"))
+        self.assertEqual([node.name for node in workflow.code_nodes()], ["JS", "Py"])
+
+    def test_prompt_and_version_are_read_from_model(self) -> None:
+        prompt, version = extract_prompt_and_version(Workflow.from_path())
+        self.assertTrue(prompt)
+        self.assertTrue(version)
+        with self.assertRaises(MissingNodeError):
+            extract_prompt_and_version(Workflow({"nodes": []}))
+
+
+if __name__ == "__main__":
+    unittest.main()
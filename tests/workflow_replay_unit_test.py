@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+import shutil
+import unittest
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.workflow_model import Workflow
+from scripts.workflow_replay import (
+    JsRuntime,
+    LatencyReport,
+    ReplayEngine,
+    mockserver_recording,
+    recording_from_execution,
+    replay_many,
+)
+
+PIPELINE_NODES = [
+    "Shape Activities",
+    "Shape Weekly Metrics",
+    "Prompt Builder",
+    "Validate WeeklyPlan (attempt 0)",
+    "Build Run Event (success)",
+]
+
+
+def code_node(name: str, code: str) -> dict:
+    return {"name": name, "type": "n8n-nodes-base.code", "typeVersion": 2, "parameters": {"jsCode": code}}
+
+
+def small_workflow() -> Workflow:
+    """Trigger -> Source -> If -> (Yes | No) -> Merge -> Collect, plus an HTTP stand-in."""
+    return Workflow(
+        {
+            "nodes": [
+                {"name": "Start", "type": "n8n-nodes-base.manualTrigger", "parameters": {}},
+                {"name": "Fetch", "type": "n8n-nodes-base.httpRequest", "parameters": {"url": "https://example.invalid/x"}},
+                code_node("Source", "return $input.all().map(i => ({ n: i.json.n, fail: i.json.fail, flag: i.json.n % 2 === 0, at: new Date().toISOString() }));"),
+                {
+                    "name": "Even?",
+                    "type": "n8n-nodes-base.if",
+                    "parameters": {"conditions": {"boolean": [{"value1": "={{ $json.flag }}", "operation": "isTrue"}]}},
+                },
+                code_node("Yes", "return items.map(i => ({ json: { ...i.json, side: 'even' } }));"),
+                code_node("No", "return items.map(i => ({ json: { ...i.json, side: 'odd', env: $env.MODE, first: $('Fetch').first().json.n } }));"),
+                {"name": "Join", "type": "n8n-nodes-base.merge", "typeVersion": 3.2, "parameters": {}},
+                code_node("Collect", "if ($json.fail) throw new Error('boom'); return { total: items.length, sides: items.map(i => i.json.side) };"),
+            ],
+            "connections": {
+                "Start": {"main": [[{"node": "Fetch", "type": "main", "index": 0}]]},
+                "Fetch": {"main": [[{"node": "Source", "type": "main", "index": 0}]]},
+                "Source": {"main": [[{"node": "Even?", "type": "main", "index": 0}]]},
+                "Even?": {"main": [[{"node": "Yes", "type": "main", "index": 0}], [{"node": "No", "type": "main", "index": 0}]]},
+                "Yes": {"main": [[{"node": "Join", "type": "main", "index": 0}]]},
+                "No": {"main": [[{"node": "Join", "type": "main", "index": 1}]]},
+                "Join": {"main": [[{"node": "Collect", "type": "main", "index": 0}]]},
+            },
+        }
+    )
+
+
+@unittest.skipUnless(shutil.which("node"), "node is required to run the workflow code nodes")
+class WorkflowReplayUnitTests(unittest.TestCase):
+    def test_graph_routing_and_n8n_globals(self) -> None:
+        engine = ReplayEngine(small_workflow(), trigger="Start")
+        recording = {"now": "2026-03-02T06:00:00Z", "env": {"MODE": "replay"}, "nodes": {"Fetch": [{"n": 1}, {"n": 2}, {"n": 3}]}}
+        with JsRuntime(engine.code) as runtime:
+            result = engine.replay(runtime, recording, keep_outputs=True)
+            self.assertTrue(result.ok, result.error)
+            self.assertEqual(result.outputs["Source"][0]["json"]["at"], "2026-03-02T06:00:00.000Z")
+            self.assertEqual([item["json"]["n"] for item in result.outputs["Yes"]], [2])
+            self.assertEqual({item["json"]["env"] for item in result.outputs["No"]}, {"replay"})
+            self.assertEqual({item["json"]["first"] for item in result.outputs["No"]}, {1})
+            self.assertEqual(result.outputs["Collect"], [{"json": {"total": 3, "sides": ["even", "odd", "odd"]}}])
+            self.assertEqual(set(result.latency_ms), {"Source", "Yes", "No", "Collect"})
+
+            # Only odd items: the Yes branch never runs and the merge appends what it got.
+            skipped = engine.replay(runtime, {"nodes": {"Fetch": [{"n": 1}]}}, keep_outputs=True)
+            self.assertNotIn("Yes", skipped.executed)
+            self.assertEqual(skipped.outputs["Collect"][0]["json"]["sides"], ["odd"])
+
+            empty = engine.replay(runtime, {"nodes": {"Fetch": []}})
+            self.assertEqual((empty.ok, empty.executed), (True, ["Start", "Fetch"]))
+            failed = engine.replay(runtime, {"nodes": {"Fetch": [{"n": 1, "fail": True}]}})
+            self.assertEqual((failed.ok, failed.error), (False, "Collect: boom"))
+            missing = engine.replay(runtime, {"nodes": {}})
+            self.assertEqual(missing.error, "Fetch: no recorded output")
+
+    def test_replays_running_coach_workflow_offline(self) -> None:
+        engine = ReplayEngine()
+        recording = mockserver_recording(engine.workflow)
+        with JsRuntime(engine.code) as runtime:
+            result = engine.replay(runtime, recording, keep_outputs=True)
+            self.assertTrue(result.ok, result.error)
+            self.assertLessEqual(set(PIPELINE_NODES), set(result.latency_ms))
+            self.assertNotIn("Build Failure Event", result.executed)
+            self.assertTrue(result.outputs["Validate WeeklyPlan (attempt 0)"][0]["json"]["__valid"])
+
+            invalid = dict(recording, nodes={**recording["nodes"], "Message a model": [{"choices": [{"message": {"content": "not json"}}]}]})
+            failure = engine.replay(runtime, invalid)
+            # The failure branch ends in Fallback Trigger, which throws to fail the execution.
+            self.assertFalse(failure.ok)
+            self.assertTrue(failure.error.startswith("Fallback Trigger: "), failure.error)
+            self.assertIn("Build Failure Event", failure.executed)
+            self.assertNotIn("Build Run Event (success)", failure.executed)
+
+        # An n8n execution export of that run replays to the same shaped data.
+        run_data = {
+            name: [{"executionTime": 7, "data": {"main": [items]}}] for name, items in result.outputs.items()
+        }
+        converted = recording_from_execution({"id": 42, "startedAt": recording["now"], "data": {"resultData": {"runData": run_data}}}, engine.workflow)
+        self.assertNotIn("Prompt Builder", converted["nodes"])
+        self.assertEqual(converted["latencyMs"]["Message a model"], 7.0)
+        with JsRuntime(engine.code) as runtime:
+            again = engine.replay(runtime, converted, keep_outputs=True)
+        for name in ("Shape Activities", "Shape Weekly Metrics"):
+            self.assertEqual(again.outputs[name], result.outputs[name])
+
+    def test_parallel_replay_reports_latency_per_node(self) -> None:
+        engine = ReplayEngine()
+        base = mockserver_recording(engine.workflow)
+        recordings = ({**base, "runId": f"run-{index}"} for index in range(24))
+        report = LatencyReport()
+        run_ids = []
+        for result in replay_many(engine, recordings, workers=3):
+            report.add(result)
+            run_ids.append(result.run_id)
+        self.assertEqual(sorted(run_ids), sorted(f"run-{index}" for index in range(24)))
+        summary = report.summary(1.0)
+        self.assertEqual((summary["runs"], summary["failed"]), (24, 0))
+        rows = {row["node"]: row for row in summary["nodes"]}
+        for name in PIPELINE_NODES:
+            self.assertEqual(rows[name]["calls"], 24)
+            self.assertLessEqual(rows[name]["p50Ms"], rows[name]["maxMs"])
+        self.assertEqual([row["totalMs"] for row in summary["nodes"]], sorted((row["totalMs"] for row in summary["nodes"]), reverse=True))
+        self.assertIn("| Prompt Builder | 24 |", report.markdown(1.0))
+        json.dumps(summary)
+
+
+if __name__ == "__main__":
+    unittest.main()